@@ -1,8 +1,56 @@
 import os
 import django
+import pytest
 from django.conf import settings
 
-def pytest_configure():
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'extraction benchmarks (tests/benchmarks)')
+    group.addoption('--benchmark', action='store_true',
+                    help='run the benchmarks and fail on regressions against the baseline')
+    group.addoption('--benchmark-update', action='store_true',
+                    help='run the benchmarks and rewrite the baseline with the results')
+    group.addoption('--benchmark-tolerance', type=float, default=0.5,
+                    help='allowed slowdown against the baseline (0.5 = 50%%)')
+    group.addoption('--benchmark-sizes', default='5,50',
+                    help='comma-separated page counts of the synthetic filings (5 to 500)')
+
+
+def pytest_configure(config):
     """Configure Django settings for pytest"""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dealmover_case.settings')
     django.setup()
+
+
+def pytest_collection_modifyitems(config, items):
+    """Benchmarks are slow and machine dependent, so they only run on request"""
+    if config.getoption('--benchmark') or config.getoption('--benchmark-update'):
+        return
+    skip = pytest.mark.skip(reason='benchmarks run with --benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def isolated_extraction_cache(settings, tmp_path):
+    """
+    Give every test empty extraction, job, artifact, upload session and
+    profile stores outside the source tree. Results are only stored in the
+    extraction history by tests that turn it on (it needs the test database).
+    """
+    from django.core.cache import caches
+
+    caches_setting = dict(settings.CACHES)
+    caches_setting['extraction_disk'] = {
+        **caches_setting['extraction_disk'],
+        'LOCATION': str(tmp_path / 'extraction_cache'),
+    }
+    settings.CACHES = caches_setting
+    settings.EXTRACTION_JOB_DIR = str(tmp_path / 'extraction_jobs')
+    settings.EXTRACTION_ARTIFACT_DIR = str(tmp_path / 'extraction_artifacts')
+    settings.EXTRACTION_UPLOAD_SESSION_DIR = str(tmp_path / 'upload_sessions')
+    settings.EXTRACTION_PROFILE_DIR = str(tmp_path / 'profiles')
+    settings.EXTRACTION_HISTORY = False
+    caches['extraction_memory'].clear()
+    yield
+    caches['extraction_memory'].clear()
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Extraction
+
+
+@admin.register(Extraction)
+class ExtractionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'period_end_date', 'mode', 'engine', 'cache', 'seconds', 'updated_at')
+    list_filter = ('mode', 'engine', 'cache')
+    search_fields = ('content_hash', 'filename')
+    date_hierarchy = 'period_end_date'
@@ -0,0 +1,219 @@
+"""
+Admission control for extractions.
+
+A burst of uploads would otherwise start one parse per request at once and
+push the machine into swap, slowing every request down. Extractions that
+miss the cache have to be admitted first:
+
+- at most EXTRACTION_MAX_CONCURRENT run at a time, and together they may
+  parse at most EXTRACTION_COST_BUDGET pages (an extraction's cost is the
+  number of pages it may parse, see extraction_cost)
+- the rest wait in a first-come first-served queue of at most
+  EXTRACTION_MAX_QUEUED requests, for up to EXTRACTION_QUEUE_TIMEOUT seconds
+
+A request that finds the queue full is rejected straight away with 429, and
+one that waits too long with 503, both with a Retry-After estimate. Background
+jobs (see background()) wait as long as it takes instead. Set
+EXTRACTION_MAX_CONCURRENT to None to turn admission control off.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from . import metrics
+from .cancellation import raise_if_cancelled
+
+QUEUE_FULL = 'queue_full'
+QUEUE_TIMEOUT = 'queue_timeout'
+
+# Used for the Retry-After estimate until an extraction has finished
+DEFAULT_EXTRACTION_SECONDS = 5.0
+# Weight of the latest extraction in the running average duration
+DURATION_SMOOTHING = 0.2
+# How often a queued request checks its cancel event
+CANCEL_POLL_INTERVAL = 0.25
+
+
+class Overloaded(Exception):
+    """The extraction was not admitted; retry after retry_after seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f'Server is busy ({reason.replace("_", " ")}), retry after {retry_after}s')
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def status_code(self):
+        return 429 if self.reason == QUEUE_FULL else 503
+
+
+class AdmissionController:
+    """Bounds the running extractions by count and total cost, with a bounded wait queue"""
+
+    def __init__(self, max_concurrent, max_queued=0, cost_budget=None, queue_timeout=None):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.cost_budget = cost_budget
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.cost_in_use = 0
+        self.average_seconds = DEFAULT_EXTRACTION_SECONDS
+        self._waiting = deque()
+        self._condition = threading.Condition()
+
+    @property
+    def queued(self):
+        return len(self._waiting)
+
+    @contextmanager
+    def admit(self, cost=1, cancel_event=None, wait_forever=False):
+        """
+        Hold an extraction slot for the with block. Raises Overloaded when
+        rejected, or ExtractionCancelled if cancel_event is set while queued.
+        With wait_forever the request queues without limit or timeout.
+        """
+        cost = self._clamp(cost)
+        self._acquire(cost, cancel_event, wait_forever)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(cost, time.perf_counter() - start)
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request should have drained"""
+        rounds = (self.queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(self.average_seconds * rounds))
+
+    def _clamp(self, cost):
+        # An extraction costing more than the whole budget still runs, alone
+        cost = max(int(cost), 1)
+        return min(cost, self.cost_budget) if self.cost_budget else cost
+
+    def _fits(self, cost):
+        if self.active >= self.max_concurrent:
+            return False
+        return not self.cost_budget or self.cost_in_use + cost <= self.cost_budget
+
+    def _acquire(self, cost, cancel_event, wait_forever):
+        with self._condition:
+            if not self._waiting and self._fits(cost):
+                self._take(cost)
+                return
+            if not wait_forever and self.queued >= self.max_queued:
+                self._reject(QUEUE_FULL)
+
+            ticket = object()
+            self._waiting.append(ticket)
+            deadline = None
+            if not wait_forever and self.queue_timeout is not None:
+                deadline = time.monotonic() + self.queue_timeout
+            wait_start = time.perf_counter()
+            try:
+                while not (self._waiting[0] is ticket and self._fits(cost)):
+                    raise_if_cancelled(cancel_event)
+                    timeout = CANCEL_POLL_INTERVAL
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject(QUEUE_TIMEOUT)
+                        timeout = min(timeout, remaining)
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                # The next in line may fit now, or may have been waiting on this one
+                self._condition.notify_all()
+                metrics.ADMISSION_WAIT.observe(time.perf_counter() - wait_start)
+            self._take(cost)
+
+    def _take(self, cost):
+        self.active += 1
+        self.cost_in_use += cost
+
+    def _release(self, cost, seconds):
+        with self._condition:
+            self.active -= 1
+            self.cost_in_use -= cost
+            self.average_seconds += DURATION_SMOOTHING * (seconds - self.average_seconds)
+            self._condition.notify_all()
+
+    def _reject(self, reason):
+        metrics.ADMISSION_REJECTIONS.inc(reason=reason)
+        raise Overloaded(reason, self.retry_after())
+
+
+def get_admission_controller():
+    """The process-wide controller for the current settings, or None when admission control is off"""
+    global _controller
+    config = (
+        getattr(settings, 'EXTRACTION_MAX_CONCURRENT', 4),
+        getattr(settings, 'EXTRACTION_MAX_QUEUED', 16),
+        getattr(settings, 'EXTRACTION_COST_BUDGET', 2000),
+        getattr(settings, 'EXTRACTION_QUEUE_TIMEOUT', 30),
+    )
+    if not config[0]:
+        return None
+    with _controller_lock:
+        # Settings only change under tests, so a new controller never
+        # replaces one that is in use
+        if _controller is None or _controller_config != config:
+            _set_controller(AdmissionController(*config), config)
+        return _controller
+
+
+@contextmanager
+def admit(cost=1, cancel_event=None):
+    """Hold a slot of the process-wide controller (see AdmissionController.admit)"""
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+    with controller.admit(cost, cancel_event, wait_forever=getattr(_local, 'background', False)):
+        yield
+
+
+@contextmanager
+def background():
+    """Extractions in the with block queue for as long as it takes instead of being rejected"""
+    previous = getattr(_local, 'background', False)
+    _local.background = True
+    try:
+        yield
+    finally:
+        _local.background = previous
+
+
+def extraction_cost(page_count, size=None):
+    """
+    Admission cost of parsing page_count pages. When the page count is
+    unknown it is estimated from the file size in bytes.
+    """
+    if page_count:
+        return page_count
+    if size:
+        return math.ceil(size / getattr(settings, 'EXTRACTION_BYTES_PER_PAGE', 100 * 1024))
+    return 1
+
+
+def current_state():
+    """(running, queued, cost in use) of the process-wide controller"""
+    controller = _controller
+    if controller is None:
+        return 0, 0, 0
+    return controller.active, controller.queued, controller.cost_in_use
+
+
+def _set_controller(controller, config):
+    global _controller, _controller_config
+    _controller = controller
+    _controller_config = config
+
+
+_controller = None
+_controller_config = None
+_controller_lock = threading.Lock()
+_local = threading.local()
@@ -0,0 +1,123 @@
+"""
+Persistent per-page text artifacts.
+
+Layout analysis is the expensive part of an extraction; matching the text
+is cheap. Every page an engine parses is kept on disk, gzipped, in one
+artifact per document and engine fingerprint (engine, library version and
+options, see TextEngine.fingerprint):
+
+    EXTRACTION_ARTIFACT_DIR/<hash[:2]>/<content hash>.<engine fingerprint>.json.gz
+
+Later extractions of the same document read the stored pages instead of
+parsing them again, and `manage.py reextract` re-runs the current matchers
+over every stored document after a pattern change. Pages accumulate: an
+artifact holds whichever pages have been parsed so far (the located
+statement pages, or the pages up to where extraction stopped). Pages are
+merged under an exclusive lock on <artifact>.lock, so concurrent
+extractions of the same document keep each other's pages.
+"""
+import fcntl
+import gzip
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIX = '.json.gz'
+
+
+def artifact_dir():
+    """The artifact directory, or None when artifacts are disabled"""
+    if not getattr(settings, 'EXTRACTION_ARTIFACTS', True):
+        return None
+    directory = getattr(settings, 'EXTRACTION_ARTIFACT_DIR', None)
+    return os.fspath(directory) if directory else None
+
+
+def artifact_path(content_hash, engine_key):
+    return os.path.join(artifact_dir(), content_hash[:2], f'{content_hash}.{engine_key}{ARTIFACT_SUFFIX}')
+
+
+def load_artifact(content_hash, engine_key):
+    """
+    The stored artifact for a document and engine fingerprint as
+    {'content_hash', 'engine', 'page_count', 'pages': {page number: text}},
+    or None
+    """
+    return read_artifact(artifact_path(content_hash, engine_key))
+
+
+def read_artifact(path):
+    """Read an artifact file, or None if it is missing or unreadable"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            artifact = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable text artifact {path}: {str(e)}")
+        return None
+    artifact['pages'] = {int(page): text for page, text in artifact['pages'].items()}
+    return artifact
+
+
+def save_pages(content_hash, engine_key, page_count, pages):
+    """
+    Add {page number: text} to the document's artifact. The file is replaced
+    atomically, so readers never see a partial artifact, and writers take
+    turns, so none drops the pages another added meanwhile.
+    """
+    path = artifact_path(content_hash, engine_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        _merge_pages(path, content_hash, engine_key, page_count, pages)
+
+
+def _merge_pages(path, content_hash, engine_key, page_count, pages):
+    artifact = read_artifact(path) or {
+        'content_hash': content_hash,
+        'engine': engine_key,
+        'page_count': page_count,
+        'pages': {},
+    }
+    artifact['pages'].update(pages)
+    artifact['pages'] = {str(page): artifact['pages'][page] for page in sorted(artifact['pages'], key=int)}
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+            json.dump(artifact, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def iter_artifacts(engine_key=None):
+    """Yield every stored artifact (only those of one engine fingerprint if given)"""
+    directory = artifact_dir()
+    if not directory or not os.path.isdir(directory):
+        return
+    for prefix in sorted(os.listdir(directory)):
+        prefix_dir = os.path.join(directory, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in sorted(os.listdir(prefix_dir)):
+            if not name.endswith(ARTIFACT_SUFFIX):
+                continue
+            if engine_key and not name.endswith(f'.{engine_key}{ARTIFACT_SUFFIX}'):
+                continue
+            artifact = read_artifact(os.path.join(prefix_dir, name))
+            if artifact is not None:
+                yield artifact
+
+
+def artifact_text(artifact):
+    """The stored pages' text joined in page order, as extract_text_from_pdf returns it"""
+    pages = artifact['pages']
+    return "".join(pages[page] + "\n" for page in sorted(pages) if pages[page])
@@ -0,0 +1,179 @@
+"""
+Bulk extraction of PDFs already on local disk (`manage.py extract_batch`).
+
+Backfills run the same extraction functions as the API, with no upload or
+HTTP overhead, in a pool of worker processes. Each file's result is
+written to a CSV or JSONL file as soon as it is done (JSONL records also
+carry the values of every period column). A later run with
+--resume skips files already in the output that did not fail.
+"""
+import csv
+import glob
+import json
+import logging
+import os
+import time
+
+FORMATS = ('csv', 'jsonl')
+# Columns before and after the field values in CSV output
+LEADING_COLUMNS = ('path', 'content_hash')
+TRAILING_COLUMNS = ('cache', 'seconds', 'error')
+
+
+def find_pdfs(sources, recursive=False):
+    """
+    Sorted, de-duplicated absolute paths of the PDFs in the given
+    directories, glob patterns and files
+    """
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            pattern = os.path.join(source, '**', '*') if recursive else os.path.join(source, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif glob.has_magic(source):
+            candidates = glob.glob(source, recursive=True)
+        else:
+            candidates = [source]
+        paths.update(
+            os.path.abspath(path) for path in candidates
+            if path.lower().endswith('.pdf') and os.path.isfile(path)
+        )
+    return sorted(paths)
+
+
+def output_format(path, requested=None):
+    """The output format: the requested one, or 'csv'/'jsonl' by file extension"""
+    if requested:
+        return requested
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def init_worker(quiet=True):
+    """Worker process initializer: set up Django (spawned workers start bare)"""
+    import django
+
+    django.setup()
+    if quiet:
+        # extract_financial_values logs every field of every filing
+        logging.getLogger('core').setLevel(logging.ERROR)
+
+
+def extract_file(path, fields=None, engine=None, mode='values'):
+    """
+    Worker task: extract one PDF on disk. Returns its output record; failures
+    are reported in 'error' rather than raised.
+    """
+    from .cache import hash_uploaded_file
+    from .history import record_extraction
+    from .views import run_extraction, run_statement_extraction
+
+    start = time.perf_counter()
+    record = {'path': path, 'content_hash': None, 'results': {}, 'periods': {}, 'cache': None, 'error': None}
+    try:
+        record['content_hash'] = hash_uploaded_file(path)
+        run = run_statement_extraction if mode == 'table' else run_extraction
+        extraction, record['cache'] = run(path, content_hash=record['content_hash'], fields=fields, engine=engine)
+        record['results'] = extraction['results']
+        record['periods'] = extraction['periods']
+    except Exception as e:
+        record['error'] = f'Error processing PDF: {str(e)}'
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    if not record['error']:
+        record_extraction(
+            record['content_hash'], record['results'], filename=os.path.basename(path), mode=mode,
+            engine=engine, fields=fields, cache_status=record['cache'], seconds=record['seconds']
+        )
+    return record
+
+
+def completed_paths(output, fmt):
+    """
+    Paths already extracted without error in an existing output file. A
+    partial last line left by an interrupted run is cut off so appending
+    starts on a fresh line.
+    """
+    if not os.path.exists(output):
+        return set()
+    _truncate_partial_line(output)
+    done = set()
+    with open(output, newline='') as f:
+        if fmt == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = (_parse_json_line(line) for line in f)
+        for record in records:
+            if record and record.get('path') and not record.get('error'):
+                done.add(record['path'])
+    return done
+
+
+class ResultWriter:
+    """Appends records to a CSV or JSONL file, flushing each one"""
+
+    def __init__(self, output, fmt, fields):
+        self.fmt = fmt
+        self.fields = list(fields)
+        columns = [*LEADING_COLUMNS, *self.fields, *TRAILING_COLUMNS]
+        write_header = False
+        if fmt == 'csv':
+            header = _csv_header(output)
+            if header is None:
+                write_header = True
+            elif header != columns:
+                raise ValueError(f'{output} has columns {",".join(header)}, expected {",".join(columns)}')
+        self._file = open(output, 'a', newline='')
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, columns)
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            row = {column: record.get(column) for column in (*LEADING_COLUMNS, *TRAILING_COLUMNS)}
+            row.update({field: record['results'].get(field, '') for field in self.fields})
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _csv_header(path):
+    """The header row of an existing CSV file, or None if it is missing or empty"""
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='') as f:
+        return next(csv.reader(f), None)
+
+
+def _parse_json_line(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _truncate_partial_line(path):
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # Find the end of the last complete line
+        position = size
+        while position > 0:
+            step = min(64 * 1024, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                f.truncate(position - step + newline + 1)
+                return
+            position -= step
+        f.truncate(0)
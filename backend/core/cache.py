@@ -0,0 +1,122 @@
+"""
+Content-addressed cache for extraction results.
+
+Results are keyed by the SHA-256 of the uploaded bytes plus the extractor
+version, so re-uploads of the same filing skip PDF parsing entirely. Two
+Django cache tiers are used (see CACHES in settings): a bounded in-process
+LRU (LocMemCache) in front of a persistent file based cache, both with TTL
+and entry-count eviction.
+"""
+import hashlib
+import inspect
+import logging
+
+from django.core.cache import caches
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MEMORY_CACHE_ALIAS = 'extraction_memory'
+DISK_CACHE_ALIAS = 'extraction_disk'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_uploaded_file(pdf_file):
+    """Return the SHA-256 hex digest of an uploaded file or a file path"""
+    with metrics.STAGE_DURATION.time(stage='upload'):
+        digest = hashlib.sha256()
+        size = 0
+        if isinstance(pdf_file, str):
+            with open(pdf_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    size += len(chunk)
+        else:
+            if hasattr(pdf_file, 'chunks'):
+                chunks = pdf_file.chunks(HASH_CHUNK_SIZE)
+            else:
+                pdf_file.seek(0)
+                chunks = iter(lambda: pdf_file.read(HASH_CHUNK_SIZE), b'')
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+            pdf_file.seek(0)
+    metrics.UPLOAD_BYTES.observe(size)
+    return digest.hexdigest()
+
+
+def code_fingerprint(*objects):
+    """
+    Fingerprint the bytecode and constants (including regex pattern strings)
+    of the given functions and of everything defined in the given modules,
+    and the repr of any other objects (such as pattern tables). Line numbers
+    and comments are ignored, so the fingerprint only changes when behaviour
+    can change.
+    """
+    digest = hashlib.sha256()
+
+    def update(code):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if hasattr(const, 'co_code'):
+                update(const)
+            else:
+                digest.update(repr(const).encode())
+
+    for obj in objects:
+        if inspect.ismodule(obj):
+            update(compile(inspect.getsource(obj), obj.__file__, 'exec'))
+        elif hasattr(obj, '__code__'):
+            update(obj.__code__)
+        else:
+            digest.update(repr(obj).encode())
+    return digest.hexdigest()[:12]
+
+
+def extraction_cache_key(content_hash, version, **options):
+    """Cache key for a document, extractor version and request options"""
+    option_parts = ','.join(f'{name}={options[name]}' for name in sorted(options))
+    options_digest = hashlib.sha256(option_parts.encode()).hexdigest()[:12]
+    return f'extraction:{version}:{content_hash}:{options_digest}'
+
+
+def get_cached_result(key):
+    """
+    Look up a cached result, returning (result, tier) where tier is 'memory',
+    'disk' or None on a miss. Disk hits are promoted to the memory tier.
+    """
+    result = caches[MEMORY_CACHE_ALIAS].get(key)
+    if result is not None:
+        metrics.CACHE_LOOKUPS.inc(result='memory')
+        return result, 'memory'
+
+    try:
+        result = caches[DISK_CACHE_ALIAS].get(key)
+    except Exception as e:
+        logger.warning(f"Extraction cache read failed: {str(e)}")
+        result = None
+    if result is not None:
+        caches[MEMORY_CACHE_ALIAS].set(key, result)
+        metrics.CACHE_LOOKUPS.inc(result='disk')
+        return result, 'disk'
+
+    metrics.CACHE_LOOKUPS.inc(result='miss')
+    return None, None
+
+
+def cache_result(key, result):
+    """Store a result in both cache tiers"""
+    caches[MEMORY_CACHE_ALIAS].set(key, result)
+    try:
+        caches[DISK_CACHE_ALIAS].set(key, result)
+    except Exception as e:
+        logger.warning(f"Extraction cache write failed: {str(e)}")
+
+
+def clear_cache():
+    """Drop every cached extraction result"""
+    caches[MEMORY_CACHE_ALIAS].clear()
+    caches[DISK_CACHE_ALIAS].clear()
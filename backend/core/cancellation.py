@@ -0,0 +1,16 @@
+"""
+Cooperative cancellation of in-flight extractions.
+
+Long-running callers (background jobs, async requests) pass a cancel event
+down the pipeline; the page loop checks it between pages and stops with
+ExtractionCancelled. Anything with an is_set() method works as an event.
+"""
+
+
+class ExtractionCancelled(Exception):
+    """The caller cancelled the extraction before it finished"""
+
+
+def raise_if_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExtractionCancelled()
@@ -0,0 +1,32 @@
+"""
+SQLite connection settings.
+
+In the default rollback-journal mode a write locks the whole database file,
+so extraction history writes from batch threads, job workers and
+extract_batch processes block the readers of GET /api/extractions/. WAL
+mode lets readers carry on during a write; synchronous=NORMAL is the
+durable-enough setting recommended with WAL (a power cut can lose the last
+commits, never corrupt the file). busy_timeout makes concurrent writers wait
+for each other instead of failing with "database is locked".
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 20000
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: switch new SQLite connections to WAL"""
+    if connection.vendor != 'sqlite' or not getattr(settings, 'EXTRACTION_SQLITE_WAL', True):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        cursor.execute('PRAGMA journal_mode = WAL')
+        journal_mode = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = NORMAL')
+    # In-memory databases (the test database) stay in 'memory' mode
+    if journal_mode not in ('wal', 'memory'):
+        logger.warning(f"SQLite database {connection.settings_dict['NAME']} is in {journal_mode} mode, not WAL")
@@ -0,0 +1,56 @@
+"""
+Client disconnect detection under ASGI.
+
+Django 4.2's ASGI handler reads the request body and then stops listening to
+the connection, so a view cannot tell that the client went away.
+DisconnectMiddleware wraps the ASGI application: once the body has been
+read, it keeps receiving in the background and sets an asyncio.Event in the
+request scope when the client disconnects. Async views get it with
+disconnect_event(request) and cancel their work.
+"""
+import asyncio
+
+DISCONNECT_SCOPE_KEY = 'extraction.disconnected'
+
+
+class DisconnectMiddleware:
+    """ASGI middleware that records client disconnects in the scope"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        disconnected = asyncio.Event()
+        watcher = None
+
+        async def watch():
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    disconnected.set()
+                    return
+
+        async def receive_body():
+            nonlocal watcher
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+            elif not message.get('more_body', False) and watcher is None:
+                # The body is complete: the app will not receive again
+                watcher = asyncio.ensure_future(watch())
+            return message
+
+        try:
+            await self.app({**scope, DISCONNECT_SCOPE_KEY: disconnected}, receive_body, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+
+def disconnect_event(request):
+    """The request's disconnect event, or None outside DisconnectMiddleware"""
+    scope = getattr(request, 'scope', None)
+    return scope.get(DISCONNECT_SCOPE_KEY) if scope else None
@@ -0,0 +1,157 @@
+"""
+Text extraction engines.
+
+Every engine yields the text of a document's pages in order:
+
+- pdfplumber: pdfminer layout analysis, pure Python. The most faithful
+  reading order on complex layouts, and by far the slowest.
+- pdfium: PDFium's text extraction, C speed. Tens of times faster on
+  text-native filings.
+- pypdf2: PyPDF2's content stream reader, a pure Python middle ground.
+
+The 'cascade' choice runs the engines in ENGINE_CASCADE order and keeps the
+first text whose fields match, so text-native filings take the fast path and
+anything pdfium cannot read falls back to pdfplumber.
+"""
+import hashlib
+
+import pdfplumber
+import pypdfium2 as pdfium
+
+from .cancellation import raise_if_cancelled
+from .pdfium_lock import PDFIUM_LOCK
+
+PDFPLUMBER = 'pdfplumber'
+PDFIUM = 'pdfium'
+PYPDF2 = 'pypdf2'
+CASCADE = 'cascade'
+
+ENGINE_CASCADE = (PDFIUM, PDFPLUMBER)
+ENGINE_CHOICES = (PDFPLUMBER, PDFIUM, PYPDF2, CASCADE)
+
+
+class TextEngine:
+    """Extracts the text of PDF pages"""
+    name = None
+    # Keyword arguments for the library's text extraction call
+    options = {}
+
+    def library_version(self):
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """
+        Engine name plus a digest of its library version and options: the
+        same fingerprint means the same text for the same document
+        """
+        settings_repr = f'{self.library_version()}:{sorted(self.options.items())}'
+        return f'{self.name}-{hashlib.sha256(settings_repr.encode()).hexdigest()[:8]}'
+
+    def iter_pages(self, pdf_file, pages=None, cancel_event=None, low_memory=False):
+        """
+        Yield the text of each of the given 1-based pages (all by default) of
+        a path or file-like PDF, in order. cancel_event is checked before
+        each page. With low_memory, whatever the library keeps of a page is
+        released once its text is taken.
+        """
+        raise NotImplementedError
+
+
+class PdfplumberEngine(TextEngine):
+    name = PDFPLUMBER
+
+    def library_version(self):
+        return pdfplumber.__version__
+
+    def iter_pages(self, pdf_file, pages=None, cancel_event=None, low_memory=False):
+        open_kwargs = {'pages': pages} if pages else {}
+        with pdfplumber.open(pdf_file, **open_kwargs) as pdf:
+            for page in pdf.pages:
+                raise_if_cancelled(cancel_event)
+                text = page.extract_text(**self.options) or ""
+                if low_memory:
+                    # Page objects keep their layout and character lists until
+                    # the document closes: hundreds of MB on a long filing
+                    page.close()
+                yield text
+
+
+class PdfiumEngine(TextEngine):
+    name = PDFIUM
+
+    def library_version(self):
+        return f'{pdfium.V_PYPDFIUM2}/{pdfium.V_LIBPDFIUM}'
+
+    def iter_pages(self, pdf_file, pages=None, cancel_event=None, low_memory=False):
+        # Pages are always closed after use, so low_memory changes nothing
+        with PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(pdf_file)
+        try:
+            with PDFIUM_LOCK:
+                page_count = len(pdf)
+            for index in _page_indexes(pages, page_count):
+                raise_if_cancelled(cancel_event)
+                # The lock is never held across a yield
+                with PDFIUM_LOCK:
+                    page = pdf[index]
+                    try:
+                        text_page = page.get_textpage()
+                        try:
+                            text = text_page.get_text_bounded(**self.options)
+                        finally:
+                            text_page.close()
+                    finally:
+                        page.close()
+                yield text.replace('\r\n', '\n')
+        finally:
+            with PDFIUM_LOCK:
+                pdf.close()
+
+
+class PyPDF2Engine(TextEngine):
+    name = PYPDF2
+
+    def library_version(self):
+        from PyPDF2 import __version__
+
+        return __version__
+
+    def iter_pages(self, pdf_file, pages=None, cancel_event=None, low_memory=False):
+        # PyPDF2 keeps little per page (its text is not laid out), so
+        # low_memory changes nothing.
+        # Imported on first use: PyPDF2 warns about its deprecation on import
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(pdf_file)
+        for index in _page_indexes(pages, len(reader.pages)):
+            raise_if_cancelled(cancel_event)
+            yield reader.pages[index].extract_text(**self.options) or ""
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (PdfplumberEngine(), PdfiumEngine(), PyPDF2Engine())
+}
+
+
+def get_engine(name):
+    """The TextEngine called name"""
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"unknown text engine {name}") from None
+
+
+def engine_sequence(name):
+    """The engines to try in order for an ENGINE_CHOICES value"""
+    if name == CASCADE:
+        return ENGINE_CASCADE
+    get_engine(name)
+    return (name,)
+
+
+def _page_indexes(pages, page_count):
+    """0-based indexes of the given 1-based pages that exist, in order"""
+    if not pages:
+        return range(page_count)
+    return [page - 1 for page in pages if 1 <= page <= page_count]
@@ -0,0 +1,140 @@
+"""
+Extraction history.
+
+Every successful extraction is stored as a core.models.Extraction row, so
+dashboards and re-asks can read past results by content hash, period or
+field without the PDF. Extracting the same document with the same options
+again updates its row; a cache hit only adds a row when there is none yet,
+so a stored time is the time of an actual parse.
+
+Storing is best effort: a database error is logged and the extraction
+result is still returned. GET /api/extractions/ (see views.list_extractions)
+queries the history with keyset pagination and ETags, and
+POST /api/extract/precheck/ answers from it when the extraction cache has
+no result for a content hash.
+"""
+import hashlib
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from .engines import PDFPLUMBER
+from .models import Extraction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def history_enabled():
+    return getattr(settings, 'EXTRACTION_HISTORY', True)
+
+
+def record_extraction(content_hash, results, filename='', period_end_date='', mode='values', engine=None,
+                      fields=None, pages=None, cache_status='miss', seconds=None):
+    """
+    Store an extraction result. Returns the Extraction row, or None when the
+    history is off or the row could not be written.
+    """
+    if not history_enabled():
+        return None
+    from .views import EXTRACTOR_VERSION
+
+    key = {
+        'content_hash': content_hash,
+        'period_end_date': datetime.strptime(period_end_date, '%Y-%m-%d').date() if period_end_date else None,
+        **_options(mode, engine, fields, pages, EXTRACTOR_VERSION),
+    }
+    values = {
+        'filename': (filename or '')[:255],
+        'results': results,
+        'cache': cache_status,
+        'seconds': round(seconds, 3) if seconds is not None else None,
+    }
+    try:
+        if cache_status == 'hit':
+            extraction, _ = Extraction.objects.get_or_create(**key, defaults=values)
+        else:
+            extraction, _ = Extraction.objects.update_or_create(**key, defaults=values)
+        return extraction
+    except Exception as e:
+        logger.error(f"Could not store extraction of {content_hash}: {str(e)}")
+        return None
+
+
+def find_result(content_hash, mode='values', engine=None, fields=None, pages=None, period_end_date=''):
+    """
+    The latest stored field values for the document, options and period
+    from this extractor version, or None. Results depend on the period,
+    which picks a statement column, so rows stored without one only answer
+    requests without one.
+    """
+    from .views import EXTRACTOR_VERSION
+
+    period = datetime.strptime(period_end_date, '%Y-%m-%d').date() if period_end_date else None
+    return (
+        Extraction.objects
+        .filter(content_hash=content_hash, period_end_date=period,
+                **_options(mode, engine, fields, pages, EXTRACTOR_VERSION))
+        .order_by('-updated_at')
+        .values_list('results', flat=True)
+        .first()
+    )
+
+
+def _options(mode, engine, fields, pages, extractor_version):
+    """The request option columns of a row"""
+    return {
+        'extractor_version': extractor_version,
+        'mode': mode,
+        'engine': engine or getattr(settings, 'EXTRACTION_ENGINE', PDFPLUMBER),
+        'fields': ','.join(fields) if fields else 'all',
+        'pages': ','.join(str(page) for page in pages) if pages else 'auto',
+    }
+
+
+def query_extractions(content_hash=None, period_from=None, period_to=None, has_fields=(), engine=None,
+                      mode=None):
+    """Extractions matching every given filter, newest first"""
+    queryset = Extraction.objects.all()
+    if content_hash:
+        queryset = queryset.filter(content_hash=content_hash)
+    if period_from:
+        queryset = queryset.filter(period_end_date__gte=period_from)
+    if period_to:
+        queryset = queryset.filter(period_end_date__lte=period_to)
+    for field in has_fields:
+        # Not found is stored as ''; requests for other fields lack the key
+        queryset = queryset.filter(Q(**{f'results__{field}__isnull': False})).exclude(
+            Q(**{f'results__{field}': ''}) | Q(**{f'results__{field}': None})
+        )
+    if engine:
+        queryset = queryset.filter(engine=engine)
+    if mode:
+        queryset = queryset.filter(mode=mode)
+    return queryset.order_by('-id')
+
+
+def page_of(queryset, limit, cursor=None):
+    """
+    One page of a query_extractions() result, continuing below the id in
+    cursor. Returns (page_keys, next_cursor) where page_keys are the
+    (id, updated_at) pairs of the page's rows, enough to compute its ETag
+    without loading the results.
+    """
+    if cursor:
+        queryset = queryset.filter(id__lt=cursor)
+    keys = list(queryset.values_list('id', 'updated_at')[:limit + 1])
+    next_cursor = keys[limit - 1][0] if len(keys) > limit else None
+    return keys[:limit], next_cursor
+
+
+def page_etag(page_keys, query):
+    """Strong ETag of a page: changes when any of its rows is added, updated or removed"""
+    digest = hashlib.sha256(query.encode())
+    for row_id, updated_at in page_keys:
+        digest.update(f'{row_id}:{updated_at.isoformat()};'.encode())
+    return f'"{digest.hexdigest()[:32]}"'
@@ -0,0 +1,226 @@
+"""
+Process isolation for PDF parsing.
+
+Some malformed or adversarial PDFs send pdfminer into loops that run for
+minutes, or into multi-gigabyte allocations, inside pdfplumber.open or
+extract_text. In the request thread that pins a worker until the proxy
+gives up. With settings.EXTRACTION_ISOLATION on, the parsing step of an
+extraction runs in a child process instead (see views.run_parse_step):
+
+- the child lowers RLIMIT_AS to EXTRACTION_ISOLATION_MEMORY_MB, so a runaway
+  allocation fails with MemoryError, and RLIMIT_CPU to just past the
+  deadline as a backstop
+- the parent waits at most EXTRACTION_ISOLATION_DEADLINE seconds of wall
+  clock for the result, then kills the child
+
+A breach raises ExtractionAborted with the reason (timeout, memory or
+crashed) and quarantines the document's content hash in the disk cache for
+EXTRACTION_QUARANTINE_TTL seconds, so retries fail with DocumentQuarantined
+before anything is parsed. Other errors in the child are raised in the
+parent as they were.
+
+Children are forked from a forkserver that has already set up Django and
+warmed the parsing stack (core.isolation_server), so starting one takes
+milliseconds. A child keeps its own metrics, so the stage timings and page
+counts of isolated parses are not exported at /metrics.
+"""
+import importlib
+import logging
+import math
+import multiprocessing
+import resource
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+from .cache import DISK_CACHE_ALIAS
+from .cancellation import ExtractionCancelled
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 'timeout'
+MEMORY = 'memory'
+CRASHED = 'crashed'
+
+# How often the parent checks the cancel event while it waits
+POLL_INTERVAL = 0.1
+
+_context = None
+_context_lock = threading.Lock()
+
+
+class ExtractionAborted(Exception):
+    """An isolated extraction broke its deadline or memory limit, or its process died"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class DocumentQuarantined(ExtractionAborted):
+    """The document broke an isolation limit before, so it is refused without parsing"""
+
+    def __init__(self, reason):
+        super().__init__('quarantined', f'Document is quarantined after an extraction of it failed ({reason})')
+        self.original_reason = reason
+
+
+def isolation_enabled():
+    return getattr(settings, 'EXTRACTION_ISOLATION', False)
+
+
+def run_isolated(func_path, args=(), kwargs=None, cancel_event=None, content_hash=None, deadline=None,
+                 memory_mb=None):
+    """
+    Call the function at dotted path func_path with args and kwargs in a
+    child process and return its result. Raises ExtractionAborted when the
+    child runs past deadline seconds, allocates more than memory_mb or
+    dies, after quarantining content_hash; ExtractionCancelled when
+    cancel_event is set first.
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'EXTRACTION_ISOLATION_DEADLINE', 60)
+    if memory_mb is None:
+        memory_mb = getattr(settings, 'EXTRACTION_ISOLATION_MEMORY_MB', 2048)
+    try:
+        return _run_child(func_path, args, kwargs or {}, cancel_event, deadline, memory_mb)
+    except ExtractionAborted as e:
+        metrics.ISOLATION_ABORTS.inc(reason=e.reason)
+        logger.warning(f"Isolated extraction of {content_hash or func_path} aborted: {str(e)}")
+        if content_hash:
+            quarantine(content_hash, e.reason)
+        raise
+
+
+def _run_child(func_path, args, kwargs, cancel_event, deadline, memory_mb):
+    context = get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_child_main,
+        args=(sender, func_path, args, kwargs, _settings_overrides(), deadline, memory_mb),
+        daemon=True,
+    )
+    process.start()
+    sender.close()
+    expires = time.monotonic() + deadline
+    try:
+        while True:
+            remaining = expires - time.monotonic()
+            if receiver.poll(max(0, min(POLL_INTERVAL, remaining))):
+                try:
+                    outcome, value = receiver.recv()
+                except EOFError:
+                    break
+                if outcome == 'ok':
+                    return value
+                if outcome == MEMORY:
+                    raise ExtractionAborted(MEMORY, f'Extraction needed more than {memory_mb}MB of memory')
+                raise value
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExtractionCancelled()
+            if remaining <= 0:
+                raise ExtractionAborted(TIMEOUT, f'Extraction did not finish within {deadline:g}s')
+            if not process.is_alive() and not receiver.poll():
+                break
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+
+    # The child died without sending a result
+    if process.exitcode == -signal.SIGXCPU:
+        raise ExtractionAborted(TIMEOUT, f'Extraction used more than {deadline:g}s of CPU time')
+    if process.exitcode == -signal.SIGKILL:
+        raise ExtractionAborted(MEMORY, 'Extraction process was killed, most likely out of memory')
+    raise ExtractionAborted(CRASHED, f'Extraction process died with exit code {process.exitcode}')
+
+
+def get_context():
+    """The multiprocessing context children start from (settings.EXTRACTION_ISOLATION_START_METHOD)"""
+    global _context
+    with _context_lock:
+        if _context is None:
+            method = getattr(settings, 'EXTRACTION_ISOLATION_START_METHOD', 'forkserver')
+            _context = multiprocessing.get_context(method)
+            if method == 'forkserver':
+                _context.set_forkserver_preload(['core.isolation_server'])
+        return _context
+
+
+def _settings_overrides():
+    """The parent's extraction settings, which may differ from the settings module's"""
+    overrides = {name: getattr(settings, name) for name in dir(settings) if name.startswith('EXTRACTION_')}
+    # The child is the parallelism; no page pool under its limits
+    overrides['EXTRACTION_PARALLEL'] = False
+    return overrides
+
+
+def _child_main(conn, func_path, args, kwargs, overrides, deadline, memory_mb):
+    """Child process: apply the limits and the parent's settings, run the function and send the outcome"""
+    try:
+        _lower_limit(resource.RLIMIT_AS, memory_mb * 1024 * 1024 if memory_mb else None)
+        _lower_limit(resource.RLIMIT_CPU, math.ceil(deadline) + 1 if deadline else None)
+        import django
+        django.setup()
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        module_name, func_name = func_path.rsplit('.', 1)
+        func = getattr(importlib.import_module(module_name), func_name)
+        outcome = ('ok', func(*args, **kwargs))
+    except MemoryError:
+        outcome = (MEMORY, None)
+    except Exception as e:
+        outcome = ('error', e)
+    try:
+        conn.send(outcome)
+    except Exception:
+        # An exception that cannot be pickled still gets its message across
+        conn.send(('error', RuntimeError(str(outcome[1]))))
+    finally:
+        conn.close()
+
+
+def _lower_limit(limit, value):
+    """Lower a resource's soft limit to value, within its hard limit"""
+    if value is None:
+        return
+    _, hard = resource.getrlimit(limit)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(limit, (value, hard))
+
+
+def quarantine(content_hash, reason):
+    """Refuse the document for settings.EXTRACTION_QUARANTINE_TTL seconds"""
+    ttl = getattr(settings, 'EXTRACTION_QUARANTINE_TTL', 24 * 60 * 60)
+    if not ttl:
+        return
+    try:
+        caches[DISK_CACHE_ALIAS].set(_quarantine_key(content_hash), {'reason': reason, 'at': time.time()}, ttl)
+    except Exception as e:
+        logger.warning(f"Could not quarantine {content_hash}: {str(e)}")
+
+
+def raise_if_quarantined(content_hash):
+    try:
+        entry = caches[DISK_CACHE_ALIAS].get(_quarantine_key(content_hash))
+    except Exception as e:
+        logger.warning(f"Quarantine lookup failed: {str(e)}")
+        entry = None
+    if entry is not None:
+        metrics.ISOLATION_ABORTS.inc(reason='quarantined')
+        raise DocumentQuarantined(entry['reason'])
+
+
+def release(content_hash):
+    """Lift a document's quarantine"""
+    caches[DISK_CACHE_ALIAS].delete(_quarantine_key(content_hash))
+
+
+def _quarantine_key(content_hash):
+    return f'quarantine:{content_hash}'
@@ -0,0 +1,25 @@
+"""
+Preloaded by the isolation forkserver (see core.isolation).
+
+Sets Django up and warms the parsing stack once, so every isolated
+extraction forks from a process that already has it imported. Nothing here
+may raise: an exception other than ImportError would take the forkserver
+down, and a child sets Django up itself if it has to.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+
+    from core.warmup import warm_up
+
+    if getattr(settings, 'EXTRACTION_WARMUP', True):
+        warm_up()
+except Exception as e:
+    logger.error(f"Isolation forkserver warm-up failed: {str(e)}")
@@ -0,0 +1,269 @@
+"""
+Background extraction jobs.
+
+Large filings outlive proxy timeouts, so the job API accepts an upload,
+spools it to disk and returns a job id straight away while a bounded thread
+pool runs the extraction. A job is a file in settings.EXTRACTION_JOB_DIR,
+<id>.json with its state, so any worker process can answer status polls,
+and <id>.cancel once another process has asked to cancel it. Cancelling a
+queued job drops it; a running job stops at the next page. Jobs are only
+removed once untouched for EXTRACTION_JOB_TTL (a cache would evict running
+jobs under a burst), at most every EXTRACTION_JOB_SWEEP_INTERVAL seconds
+when a job is submitted.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .cancellation import ExtractionCancelled
+from .uploads import iter_stream, spool_upload
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+# How often a running job checks for a cancel request made by another worker
+# process
+CANCEL_POLL_INTERVAL = 1.0
+
+
+class JobCancelEvent:
+    """
+    Cancel event for a running job: set locally, or by a cancel request
+    recorded in the job directory by any worker process.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._event = threading.Event()
+        self._last_poll = 0.0
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self):
+        if self._event.is_set():
+            return True
+        now = time.monotonic()
+        if now - self._last_poll >= CANCEL_POLL_INTERVAL:
+            self._last_poll = now
+            if os.path.exists(_job_path(self.job_id, '.cancel')):
+                self._event.set()
+        return self._event.is_set()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_futures = {}
+_cancel_events = {}
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def submit_job(task, pdf_file, period_end_date='', **options):
+    """
+    Spool the upload to disk and queue
+    task(path, content_hash=..., cancel_event=..., **options) in the
+    background. Returns the new job's state.
+    """
+    sweep_if_due()
+    job_id = uuid.uuid4().hex
+    chunks = pdf_file.chunks() if hasattr(pdf_file, 'chunks') else iter_stream(pdf_file)
+    path, content_hash, _ = spool_upload(chunks)
+    job = {
+        'job_id': job_id,
+        'status': QUEUED,
+        'filename': getattr(pdf_file, 'name', os.path.basename(str(pdf_file))),
+        'period_end_date': period_end_date,
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+    }
+    _save_job(job)
+
+    cancel_event = JobCancelEvent(job_id)
+    _cancel_events[job_id] = cancel_event
+    future = _get_executor().submit(
+        _run_job, job_id, task, path, cancel_event, {'content_hash': content_hash, **options}
+    )
+    _futures[job_id] = future
+    # Registered after the assignment: a job that is already done runs the
+    # callback right here, so no entry outlives its future
+    future.add_done_callback(lambda future: _forget(job_id, path, future))
+    logger.info(f"Queued extraction job {job_id} for {job['filename']}")
+    return job
+
+
+def get_job(job_id):
+    """Current state of a job, or None if it is unknown or expired"""
+    if not JOB_ID.fullmatch(job_id):
+        return None
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def cancel_job(job_id):
+    """
+    Request cancellation. Returns the job's state afterwards, or None if the
+    job is unknown. Finished jobs are returned unchanged.
+    """
+    job = get_job(job_id)
+    if job is None or job['status'] in FINISHED_STATUSES:
+        return job
+
+    future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        # Never started
+        return _finish_job(job_id, CANCELLED)
+
+    _write_atomic(_job_path(job_id, '.cancel'), '')
+    cancel_event = _cancel_events.get(job_id)
+    if cancel_event is not None:
+        cancel_event.set()
+    job['cancel_requested'] = True
+    return job
+
+
+def _run_job(job_id, task, path, cancel_event, options):
+    try:
+        status, fields = _execute_job(job_id, task, path, cancel_event, options)
+    finally:
+        _remove_spooled(path)
+    # Only report the job finished once its spooled copy is gone
+    _finish_job(job_id, status, **fields)
+
+
+def _forget(job_id, path, future):
+    _futures.pop(job_id, None)
+    _cancel_events.pop(job_id, None)
+    if future.cancelled():
+        # Cancelled before it ran, so _run_job never removes the spooled copy
+        _remove_spooled(path)
+
+
+def _remove_spooled(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _execute_job(job_id, task, path, cancel_event, options):
+    """Run the task, returning the job's final status and extra fields"""
+    if cancel_event.is_set():
+        return CANCELLED, {}
+    try:
+        _update_job(job_id, status=RUNNING, started_at=time.time())
+        return SUCCEEDED, task(path, cancel_event=cancel_event, **options)
+    except ExtractionCancelled:
+        logger.info(f"Extraction job {job_id} cancelled")
+        return CANCELLED, {}
+    except Exception as e:
+        logger.error(f"Extraction job {job_id} failed: {str(e)}")
+        return FAILED, {'error': f'Error processing PDF: {str(e)}'}
+
+
+def _finish_job(job_id, status, **fields):
+    return _update_job(job_id, status=status, finished_at=time.time(), **fields)
+
+
+def _update_job(job_id, **fields):
+    job = get_job(job_id) or {'job_id': job_id}
+    job.update(fields)
+    _save_job(job)
+    return job
+
+
+def _save_job(job):
+    _write_atomic(_job_path(job['job_id']), json.dumps(job))
+
+
+def sweep_jobs(max_idle=None):
+    """Remove jobs untouched for longer than max_idle seconds (the TTL by default). Returns how many."""
+    max_idle = getattr(settings, 'EXTRACTION_JOB_TTL', 24 * 60 * 60) if max_idle is None else max_idle
+    directory = job_dir()
+    now = time.time()
+    removed = 0
+    for name in os.listdir(directory):
+        job_id, _, suffix = name.partition('.')
+        if not JOB_ID.fullmatch(job_id) or suffix != 'json' or job_id in _futures:
+            continue
+        try:
+            if now - os.stat(_job_path(job_id)).st_mtime <= max_idle:
+                continue
+        except FileNotFoundError:
+            continue
+        for path in (_job_path(job_id), _job_path(job_id, '.cancel')):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        removed += 1
+    if removed:
+        logger.info(f"Removed {removed} expired extraction jobs")
+    return removed
+
+
+def sweep_if_due():
+    """Sweep at most every EXTRACTION_JOB_SWEEP_INTERVAL seconds per process"""
+    global _last_sweep
+    interval = getattr(settings, 'EXTRACTION_JOB_SWEEP_INTERVAL', 600)
+    with _sweep_lock:
+        now = time.monotonic()
+        if _last_sweep and now - _last_sweep < interval:
+            return
+        _last_sweep = now
+    try:
+        sweep_jobs()
+    except OSError as e:
+        logger.warning(f"Job sweep failed: {str(e)}")
+
+
+def job_dir():
+    directory = os.fspath(getattr(settings, 'EXTRACTION_JOB_DIR'))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _job_path(job_id, suffix='.json'):
+    return os.path.join(job_dir(), f'{job_id}{suffix}')
+
+
+def _write_atomic(path, content):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXTRACTION_JOB_WORKERS', 2),
+                thread_name_prefix='extraction-job',
+            )
+        return _executor
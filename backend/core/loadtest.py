@@ -0,0 +1,485 @@
+"""
+Load generator for the extraction API (`manage.py load_test`).
+
+Starts the app on a free local port under the chosen server (Django's
+runserver, gunicorn or uvicorn), with optional settings overrides, and
+replays a mix of synthetic filings (core.synthetic) at it:
+
+- closed loop (no rate): `concurrency` clients each send their next request
+  as soon as the last one returns
+- open loop (rate): requests arrive as a Poisson process at `rate` per
+  second, at most `concurrency` in flight. A request's latency counts from
+  its scheduled arrival, so time spent waiting for a free client is
+  included rather than hidden (coordinated omission).
+
+The report has throughput, latency percentiles, responses by status and
+the resident memory of the server and all its child processes (workers,
+isolation children) sampled over the run.
+"""
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .synthetic import synthetic_filing
+
+SERVER_MODES = ('runserver', 'gunicorn', 'uvicorn')
+# Seconds a started server has to answer /metrics
+READY_TIMEOUT = 60
+PERCENTILES = (50, 95, 99)
+# Statuses admission control answers with when it sheds load
+REJECTED_STATUSES = (429, 503)
+# Status recorded for requests that got no HTTP response
+CONNECTION_ERROR = 0
+
+
+class ServerError(Exception):
+    """The local server could not be started, or it exited during the run"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, port, workers=1):
+    """Command line that serves the app on 127.0.0.1:port"""
+    bind = f'127.0.0.1:{port}'
+    if mode == 'runserver':
+        return [sys.executable, 'manage.py', 'runserver', bind, '--noreload', '--skip-checks']
+    if mode == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '--preload', '--workers', str(workers), '--bind', bind,
+                '--timeout', '600', 'dealmover_case.wsgi:application']
+    if mode == 'uvicorn':
+        return [sys.executable, '-m', 'uvicorn', 'dealmover_case.asgi:application', '--host', '127.0.0.1',
+                '--port', str(port), '--workers', str(workers), '--no-access-log']
+    raise ValueError(f'server mode must be one of {", ".join(SERVER_MODES)}')
+
+
+def write_settings_module(directory, overrides):
+    """
+    Write a settings module to directory that imports the current settings
+    module and then sets overrides ({name: value}, values with a literal repr).
+    Returns its module name.
+    """
+    base = os.environ.get('DJANGO_SETTINGS_MODULE', 'dealmover_case.settings')
+    lines = [f'from {base} import *  # noqa: F401,F403']
+    lines += [f'{name} = {value!r}' for name, value in overrides.items()]
+    with open(os.path.join(directory, 'load_test_settings.py'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return 'load_test_settings'
+
+
+class LocalServer:
+    """The app served by a child process for the duration of a with block"""
+
+    def __init__(self, mode='runserver', workers=1, overrides=None, log_path=None):
+        self.mode = mode
+        self.workers = workers
+        self.overrides = overrides or {}
+        self.log_path = log_path
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.process = None
+        self._directory = None
+        self._log = None
+        self._log_path = None
+        self._log_start = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        command = server_command(self.mode, self.port, self.workers)
+        if self.mode != 'runserver':
+            module = 'gunicorn' if self.mode == 'gunicorn' else 'uvicorn'
+            try:
+                __import__(module)
+            except ImportError:
+                raise ServerError(f'{module} is not installed')
+
+        self._directory = tempfile.TemporaryDirectory(prefix='load-test-')
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = write_settings_module(self._directory.name, self.overrides)
+        env['PYTHONPATH'] = os.pathsep.join(
+            path for path in (self._directory.name, str(settings.BASE_DIR), env.get('PYTHONPATH')) if path
+        )
+        log_path = self.log_path or os.path.join(self._directory.name, 'server.log')
+        self._log = open(log_path, 'ab')
+        self._log_start = self._log.tell()
+        self._log_path = log_path
+        self.process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        self.wait_until_ready()
+
+    def wait_until_ready(self, timeout=READY_TIMEOUT):
+        expires = time.monotonic() + timeout
+        while time.monotonic() < expires:
+            if self.process.poll() is not None:
+                raise self._exited('before it was ready')
+            try:
+                with urllib.request.urlopen(f'{self.url}/metrics', timeout=1):
+                    return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.1)
+        tail = self.log_tail()
+        self.stop()
+        raise ServerError(f'{self.mode} did not answer within {timeout}s{tail}')
+
+    def check_running(self):
+        """Raise ServerError, with the end of the server log, if the server has exited"""
+        if self.process.poll() is not None:
+            raise self._exited('during the run')
+
+    def _exited(self, when):
+        tail = self.log_tail()
+        self.stop()
+        code = self.process.returncode
+        how = f'was killed by {signal.Signals(-code).name}' if code < 0 else f'exited with code {code}'
+        return ServerError(f'{self.mode} {how} {when}{tail}')
+
+    def log_tail(self, lines=20):
+        """The last lines the server wrote in this run, as a block to append to a message"""
+        if not self._log_path:
+            return ''
+        try:
+            self._log.flush()
+            with open(self._log_path, 'rb') as f:
+                f.seek(self._log_start)
+                output = f.read().decode(errors='replace').splitlines()[-lines:]
+        except (OSError, ValueError):
+            return ''
+        return ':\n' + '\n'.join(output) if output else ''
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
+
+    def rss_bytes(self):
+        return process_tree_rss(self.process.pid)
+
+
+def process_tree_rss(pid):
+    """
+    Resident set size in bytes of pid and all its descendants, or None
+    without procfs or when pid is gone
+    """
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return None
+    children = {}
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces: the fields resume after its ')'
+        parent = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        rss = _process_rss(current)
+        if rss is None:
+            if current == pid:
+                return None
+            continue
+        total += rss
+        pending.extend(children.get(current, ()))
+    return total
+
+
+def _process_rss(pid):
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def build_workload(page_counts, variants=1):
+    """
+    [(pages, PDF bytes)]: `variants` distinct synthetic filings of each page
+    count. Variants differ in their narrative (seed) and content hash, so
+    repeats of a variant can hit the extraction cache and others cannot.
+    """
+    return [
+        (pages, synthetic_filing(pages, seed=seed))
+        for pages in page_counts
+        for seed in range(variants)
+    ]
+
+
+def encode_multipart(content, fields=None, filename='filing.pdf'):
+    """(body, content type) of a multipart form with the PDF as pdf_file"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="pdf_file"; filename="{filename}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode()
+    )
+    parts.append(content)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def send_request(url, body, content_type, timeout):
+    """POST body and return its status code, CONNECTION_ERROR without a response"""
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return CONNECTION_ERROR
+
+
+class LoadGenerator:
+    """
+    Sends a workload at url, closed loop or at a Poisson arrival rate, and
+    records (sent at, latency, status, pages) for every request
+    """
+
+    def __init__(self, url, workload, concurrency=4, rate=None, duration=30, max_requests=None, fields=None,
+                 timeout=120, seed=0):
+        self.url = url
+        self.requests = [(pages, *encode_multipart(content, fields)) for pages, content in workload]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.samples = []
+        self._lock = threading.Lock()
+        self._sent = 0
+        self.start = None
+
+    def run(self):
+        """Send requests until the duration or request limit is reached; returns the elapsed seconds"""
+        self.start = time.perf_counter()
+        if self.rate:
+            self._run_open_loop()
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for _ in range(self.concurrency):
+                    executor.submit(self._client)
+        return time.perf_counter() - self.start
+
+    @property
+    def completed(self):
+        return len(self.samples)
+
+    def _client(self):
+        while self._claim():
+            self._send(time.perf_counter())
+
+    def _run_open_loop(self):
+        end = self.start + self.duration
+        arrival = self.start
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                with self._lock:
+                    arrival += self.rng.expovariate(self.rate)
+                if arrival >= end or not self._claim(check_time=False):
+                    break
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._send, arrival)
+
+    def _claim(self, check_time=True):
+        """Reserve the next request, or False once the run is over"""
+        with self._lock:
+            if check_time and time.perf_counter() - self.start >= self.duration:
+                return False
+            if self.max_requests is not None and self._sent >= self.max_requests:
+                return False
+            self._sent += 1
+            return True
+
+    def _send(self, scheduled):
+        with self._lock:
+            pages, body, content_type = self.rng.choice(self.requests)
+        status = send_request(self.url, body, content_type, self.timeout)
+        finished = time.perf_counter()
+        with self._lock:
+            self.samples.append({
+                'at': scheduled - self.start,
+                'latency': finished - scheduled,
+                'status': status,
+                'pages': pages,
+            })
+
+
+class RssSampler:
+    """Samples a server's resident memory on a background thread"""
+
+    def __init__(self, server, generator, interval=1.0):
+        self.server = server
+        self.generator = generator
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self):
+        while True:
+            self._sample()
+            if self._stop.wait(self.interval):
+                return
+
+    def _sample(self):
+        rss = self.server.rss_bytes()
+        if rss is not None:
+            self.samples.append({
+                'at': round(time.perf_counter() - self._start, 3),
+                'rss_bytes': rss,
+                'completed': self.generator.completed,
+            })
+
+
+def percentile(values, q):
+    """Nearest-rank q-th percentile of values, None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples, elapsed, rss_samples=None):
+    """The load test report for the recorded requests"""
+    latencies = [sample['latency'] for sample in samples]
+    ok = [sample['latency'] for sample in samples if sample['status'] == 200]
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample['status'])] = statuses.get(str(sample['status']), 0) + 1
+    failed = sum(1 for sample in samples if sample['status'] != 200)
+    rejected = sum(1 for sample in samples if sample['status'] in REJECTED_STATUSES)
+
+    def latency_summary(values):
+        summary = {f'p{q}': _round(percentile(values, q)) for q in PERCENTILES}
+        summary['mean'] = _round(sum(values) / len(values)) if values else None
+        summary['max'] = _round(max(values)) if values else None
+        return summary
+
+    rss_samples = rss_samples or []
+    return {
+        'requests': len(samples),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        'pages_per_second': round(
+            sum(sample['pages'] for sample in samples if sample['status'] == 200) / elapsed, 3
+        ) if elapsed else 0.0,
+        'latency': latency_summary(latencies),
+        'ok_latency': latency_summary(ok),
+        'statuses': dict(sorted(statuses.items())),
+        'error_rate': round(failed / len(samples), 4) if samples else 0.0,
+        'rejected_rate': round(rejected / len(samples), 4) if samples else 0.0,
+        'peak_rss_bytes': max((sample['rss_bytes'] for sample in rss_samples), default=None),
+        'rss': rss_samples,
+    }
+
+
+def run_load_test(mode='runserver', url=None, workers=1, overrides=None, page_counts=(5, 30, 120), variants=5,
+                  concurrency=4, rate=None, duration=30, max_requests=None, endpoint='/api/extract/',
+                  fields=None, timeout=120, sample_interval=1.0, seed=0, log_path=None):
+    """
+    Run a load test and return its report (see summarize). With url, the
+    load goes to that running server instead and no memory is sampled.
+    """
+    workload = build_workload(page_counts, variants)
+    if url:
+        generator = LoadGenerator(url.rstrip('/') + endpoint, workload, concurrency, rate, duration,
+                                  max_requests, fields, timeout, seed)
+        elapsed = generator.run()
+        report = summarize(generator.samples, elapsed)
+    else:
+        with LocalServer(mode, workers, overrides, log_path) as server:
+            generator = LoadGenerator(server.url + endpoint, workload, concurrency, rate, duration,
+                                      max_requests, fields, timeout, seed)
+            with RssSampler(server, generator, sample_interval) as sampler:
+                elapsed = generator.run()
+            # Requests to a dead server only show up as connection errors
+            server.check_running()
+            report = summarize(generator.samples, elapsed, sampler.samples)
+
+    report['config'] = {
+        'server': 'external' if url else mode,
+        'workers': None if url else workers,
+        'settings': {name: _jsonable(value) for name, value in (overrides or {}).items()},
+        'endpoint': endpoint,
+        'pages': list(page_counts),
+        'variants': variants,
+        'concurrency': concurrency,
+        'rate': rate,
+        'duration': duration,
+        'max_requests': max_requests,
+    }
+    return report
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except TypeError:
+        return repr(value)
@@ -0,0 +1,191 @@
+"""
+Statement-page locator.
+
+pdfplumber's layout analysis is by far the most expensive part of a request,
+and on a 10-K only one or two pages actually hold the income statement. This
+module runs a cheap pre-scan over the raw page text (pdfium, C speed), scores
+each page for income-statement likelihood and returns the handful of pages
+worth sending through full extraction.
+"""
+import logging
+import re
+
+import pypdfium2 as pdfium
+from django.conf import settings
+
+from .pdfium_lock import PDFIUM_LOCK
+
+logger = logging.getLogger(__name__)
+
+# Label keywords and how strongly they suggest an income statement page
+STATEMENT_KEYWORDS = {
+    'statements of operations': 6,
+    'statements of income': 6,
+    'income statements': 6,
+    'statements of earnings': 6,
+    'total revenues': 3,
+    'total revenue': 3,
+    'net sales': 3,
+    'cost of revenues': 3,
+    'cost of revenue': 3,
+    'cost of sales': 3,
+    'cost of goods sold': 3,
+    'income from operations': 3,
+    'operating income': 3,
+    'costs and expenses': 2,
+    'research and development': 1,
+    'net income': 1,
+    'per share': 1,
+}
+
+KEYWORD_PATTERN = re.compile(
+    '|'.join(re.escape(keyword).replace(r'\ ', r'\s+') for keyword in STATEMENT_KEYWORDS),
+    re.IGNORECASE,
+)
+NUMBER_PATTERN = re.compile(r'\(?\$?\d[\d,]*(?:\.\d+)?\)?')
+
+# Outline entries that point at the financial statements section
+OUTLINE_TITLE_PATTERN = re.compile(r'item\s*8\b|financial\s+statements', re.IGNORECASE)
+
+# Pages with fewer numbers than this are headings or TOC entries, not tables
+MIN_NUMBERS_PER_PAGE = 6
+MAX_PAGE_RANGE_SIZE = 10000
+
+
+def score_page_text(text):
+    """
+    Score a page's raw text for how likely it is to be the income statement.
+
+    Keyword hits are weighted by STATEMENT_KEYWORDS (each keyword counts once),
+    and pages dense with numbers score higher than prose pages that merely
+    mention the same labels.
+    """
+    if not text:
+        return 0.0
+
+    found = {
+        ' '.join(match.group(0).lower().split())
+        for match in KEYWORD_PATTERN.finditer(text)
+    }
+    keyword_score = sum(STATEMENT_KEYWORDS.get(keyword, 0) for keyword in found)
+    if not keyword_score:
+        return 0.0
+
+    tokens = len(text.split())
+    numbers = len(NUMBER_PATTERN.findall(text))
+    if numbers < MIN_NUMBERS_PER_PAGE:
+        return keyword_score * 0.25
+
+    digit_density = numbers / tokens if tokens else 0.0
+    return keyword_score + 10 * digit_density
+
+
+def parse_page_range(value):
+    """
+    Parse a client supplied page selection such as "45-47,50" into a sorted
+    list of 1-based page numbers.
+    """
+    page_numbers = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        try:
+            start = int(start)
+            end = int(end) if end else start
+        except ValueError:
+            raise ValueError(f'Invalid page range: {part}')
+        if start < 1 or end < start:
+            raise ValueError(f'Invalid page range: {part}')
+        page_numbers.update(range(start, end + 1))
+        if len(page_numbers) > MAX_PAGE_RANGE_SIZE:
+            raise ValueError('Page range is too large')
+
+    if not page_numbers:
+        raise ValueError('Page range is empty')
+    return sorted(page_numbers)
+
+
+def locate_statement_pages(pdf_file, max_pages=None, min_score=None):
+    """
+    Return the sorted 1-based page numbers most likely to contain the income
+    statement, or None when no page scores well enough (callers should then
+    fall back to the full document).
+    """
+    if max_pages is None:
+        max_pages = getattr(settings, 'EXTRACTION_LOCATOR_MAX_PAGES', 3)
+    if min_score is None:
+        min_score = getattr(settings, 'EXTRACTION_LOCATOR_MIN_SCORE', 8)
+
+    try:
+        scores = score_pages(pdf_file)
+    except Exception as e:
+        logger.warning(f"Statement page pre-scan failed, using full document: {str(e)}")
+        return None
+    finally:
+        if hasattr(pdf_file, 'seek'):
+            pdf_file.seek(0)
+
+    ranked = sorted(
+        (page_number for page_number, score in scores.items() if score >= min_score),
+        key=lambda page_number: scores[page_number],
+        reverse=True,
+    )
+    if not ranked:
+        logger.info("No income statement candidate pages found")
+        return None
+
+    # Keep only pages that are competitive with the best candidate
+    best_score = scores[ranked[0]]
+    candidates = [
+        page_number for page_number in ranked[:max_pages]
+        if scores[page_number] >= best_score / 2
+    ]
+    logger.info(f"Income statement candidate pages: {sorted(candidates)}")
+    return sorted(candidates)
+
+
+def score_pages(pdf_file):
+    """Return {page_number: score} for every page in the document"""
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_file)
+    try:
+        with PDFIUM_LOCK:
+            outline_pages = _outline_statement_pages(pdf)
+            page_count = len(pdf)
+        scores = {}
+        for index in range(page_count):
+            with PDFIUM_LOCK:
+                page = pdf[index]
+                try:
+                    textpage = page.get_textpage()
+                    try:
+                        text = textpage.get_text_bounded()
+                    finally:
+                        textpage.close()
+                finally:
+                    page.close()
+            score = score_page_text(text)
+            if index + 1 in outline_pages and score:
+                score += 2
+            scores[index + 1] = score
+        return scores
+    finally:
+        with PDFIUM_LOCK:
+            pdf.close()
+
+
+def _outline_statement_pages(pdf, window=None):
+    """Pages following an "Item 8" / financial statements outline entry"""
+    if window is None:
+        window = getattr(settings, 'EXTRACTION_LOCATOR_OUTLINE_WINDOW', 10)
+
+    pages = set()
+    try:
+        for item in pdf.get_toc():
+            if item.page_index is not None and OUTLINE_TITLE_PATTERN.search(item.title or ''):
+                pages.update(range(item.page_index + 1, item.page_index + 1 + window))
+    except Exception as e:
+        logger.debug(f"Could not read PDF outline: {str(e)}")
+    return pages
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import (
+    FORMATS, ResultWriter, completed_paths, extract_file, find_pdfs, init_worker, output_format,
+)
+from core.engines import ENGINE_CHOICES
+from core.views import EXTRACTION_MODES, FIELD_PATTERNS, parse_field_list
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract every PDF in the given directories or glob patterns with a "
+        "pool of worker processes, appending one CSV row or JSON line per file "
+        "to the output as it finishes. With --resume, files already in the "
+        "output without an error are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='+', help='directories, glob patterns or PDF files')
+        parser.add_argument('--output', required=True, help='results file (.csv or .jsonl)')
+        parser.add_argument('--format', choices=FORMATS, help='output format (default: from the file extension)')
+        parser.add_argument('--resume', action='store_true',
+                            help='append to the output, skipping files it already has')
+        parser.add_argument('--recursive', action='store_true', help='also search subdirectories')
+        parser.add_argument('--workers', type=int,
+                            help='worker processes (default: settings.EXTRACTION_POOL_WORKERS or the CPU '
+                                 'count); 0 extracts in this process')
+        parser.add_argument('--fields', help='comma-separated fields to extract (default: all)')
+        parser.add_argument('--engine', choices=ENGINE_CHOICES, help='text engine (default: settings.EXTRACTION_ENGINE)')
+        parser.add_argument('--mode', choices=EXTRACTION_MODES, default='values')
+
+    def handle(self, *args, **options):
+        fields = None
+        if options['fields']:
+            try:
+                fields = parse_field_list(options['fields'])
+            except ValueError as e:
+                raise CommandError(f'--fields must be a comma-separated list of {", ".join(FIELD_PATTERNS)}: {str(e)}')
+
+        output = options['output']
+        fmt = output_format(output, options['format'])
+        if os.path.exists(output) and os.path.getsize(output) and not options['resume']:
+            raise CommandError(f'{output} already exists: pass --resume to continue it, or choose another file')
+
+        paths = find_pdfs(options['sources'], options['recursive'])
+        done = completed_paths(output, fmt) if options['resume'] else set()
+        pending = [path for path in paths if path not in done]
+        skipped = len(paths) - len(pending)
+        self.stderr.write(f'{len(paths)} PDFs found, {skipped} already in {output}, {len(pending)} to extract\n')
+        if not pending:
+            return
+
+        try:
+            writer = ResultWriter(output, fmt, fields or FIELD_PATTERNS)
+        except ValueError as e:
+            raise CommandError(str(e))
+        workers = options['workers']
+        if workers is None:
+            workers = getattr(settings, 'EXTRACTION_POOL_WORKERS', None) or os.cpu_count() or 1
+        progress = Progress(len(pending), self.stderr)
+        try:
+            if workers:
+                self.run_pool(pending, workers, writer, progress, options, fields)
+            else:
+                for path in pending:
+                    record = extract_file(path, fields, options['engine'], options['mode'])
+                    writer.write(record)
+                    progress.update(record)
+        except KeyboardInterrupt:
+            self.stderr.write('\nInterrupted: finished files are saved, run again with --resume to continue\n')
+            sys.exit(130)
+        finally:
+            writer.close()
+            progress.summary()
+
+    def run_pool(self, paths, workers, writer, progress, options, fields):
+        """Keep a window of files in flight and write each result as it finishes"""
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(paths)),
+            mp_context=multiprocessing.get_context(getattr(settings, 'EXTRACTION_POOL_START_METHOD', 'spawn')),
+            initializer=init_worker,
+            initargs=(options['verbosity'] < 2,),
+        )
+        queue = deque(paths)
+        in_flight = set()
+        try:
+            while queue or in_flight:
+                while queue and len(in_flight) < 2 * workers:
+                    path = queue.popleft()
+                    in_flight.add(executor.submit(extract_file, path, fields, options['engine'], options['mode']))
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    writer.write(record)
+                    progress.update(record)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Progress:
+    """Periodic progress and throughput lines for a bulk extraction"""
+
+    def __init__(self, total, stream):
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+        self._last_report = self.start
+
+    def update(self, record):
+        self.done += 1
+        self.failed += bool(record['error'])
+        try:
+            self.bytes += os.path.getsize(record['path'])
+        except OSError:
+            pass
+        now = time.perf_counter()
+        if now - self._last_report >= PROGRESS_INTERVAL or self.done == self.total:
+            self._last_report = now
+            self.stream.write(self.line(now) + '\n')
+
+    def line(self, now=None):
+        elapsed = max((now or time.perf_counter()) - self.start, 1e-9)
+        rate = self.done / elapsed
+        remaining = (self.total - self.done) / rate if rate else float('inf')
+        return (
+            f'[{self.done}/{self.total}] {rate:.2f} files/s, {self.bytes / elapsed / 1024 / 1024:.2f} MB/s, '
+            f'{self.failed} failed, {elapsed:.0f}s elapsed, ~{remaining:.0f}s left'
+        )
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        self.stream.write(f'Extracted {self.done} files ({self.failed} failed) in {elapsed:.1f}s\n')
@@ -0,0 +1,136 @@
+import ast
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import SERVER_MODES, ServerError, run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app locally and replay a mix of synthetic filings at it, "
+        "closed loop at --concurrency or at a Poisson --rate, then report "
+        "throughput, latency percentiles, responses by status and the "
+        "server's resident memory over the run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=SERVER_MODES, default='runserver',
+                            help='how to serve the app (gunicorn and uvicorn must be installed)')
+        parser.add_argument('--url', help='load an already running server at this base URL instead')
+        parser.add_argument('--workers', type=int, default=1, help='gunicorn or uvicorn worker processes')
+        parser.add_argument('--setting', action='append', default=[], metavar='NAME=VALUE',
+                            help='settings override for the server, e.g. EXTRACTION_MAX_CONCURRENT=8 '
+                                 '(Python literals; repeatable)')
+        parser.add_argument('--endpoint', default='/api/extract/', help='path the filings are posted to')
+        parser.add_argument('--form', action='append', default=[], metavar='NAME=VALUE',
+                            help='extra form field sent with every filing, e.g. mode=table (repeatable)')
+        parser.add_argument('--pages', default='5,30,120',
+                            help='comma-separated page counts of the synthetic filings in the mix')
+        parser.add_argument('--variants', type=int, default=5,
+                            help='distinct filings per page count (repeats can be cache hits)')
+        parser.add_argument('--concurrency', type=int, default=4, help='requests in flight at most')
+        parser.add_argument('--rate', type=float,
+                            help='arrivals per second (Poisson); without it each client sends back to back')
+        parser.add_argument('--duration', type=float, default=30, help='seconds to send requests for')
+        parser.add_argument('--requests', type=int, help='stop after this many requests')
+        parser.add_argument('--timeout', type=float, default=120, help='seconds per request')
+        parser.add_argument('--sample-interval', type=float, default=1.0, help='seconds between memory samples')
+        parser.add_argument('--seed', type=int, default=0, help='seed for the request mix and arrivals')
+        parser.add_argument('--server-log', help='append the server output to this file')
+        parser.add_argument('--json', action='store_true', help='print the report as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            page_counts = [int(pages) for pages in options['pages'].split(',') if pages.strip()]
+        except ValueError:
+            raise CommandError('--pages must be a comma-separated list of page counts')
+        if not page_counts or min(page_counts) < 1:
+            raise CommandError('--pages needs at least one page count of 1 or more')
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        if options['rate'] is not None and options['rate'] <= 0:
+            raise CommandError('--rate must be positive')
+
+        overrides = {name: _literal(value) for name, value in _pairs(options['setting'], '--setting')}
+        fields = dict(_pairs(options['form'], '--form'))
+
+        if options['url'] and overrides:
+            raise CommandError('--setting only applies to a server this command starts, not --url')
+        if not options['url']:
+            self.stderr.write(f'Starting {options["server"]}...\n')
+        try:
+            report = run_load_test(
+                mode=options['server'],
+                url=options['url'],
+                workers=options['workers'],
+                overrides=overrides,
+                page_counts=page_counts,
+                variants=options['variants'],
+                concurrency=options['concurrency'],
+                rate=options['rate'],
+                duration=options['duration'],
+                max_requests=options['requests'],
+                endpoint=options['endpoint'],
+                fields=fields,
+                timeout=options['timeout'],
+                sample_interval=options['sample_interval'],
+                seed=options['seed'],
+                log_path=options['server_log'],
+            )
+        except ServerError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+    def write_report(self, report):
+        config = report['config']
+        load = f'{config["rate"]:g} req/s' if config['rate'] else 'closed loop'
+        self.stdout.write(
+            f'{report["requests"]} requests in {report["seconds"]:.1f}s against {config["server"]} '
+            f'({load}, concurrency {config["concurrency"]})'
+        )
+        self.stdout.write(f'throughput  {report["throughput"]:.2f} req/s, {report["pages_per_second"]:.1f} pages/s')
+        for name in ('latency', 'ok_latency'):
+            summary = report[name]
+            values = ', '.join(
+                f'{key} {_ms(value)}' for key, value in summary.items()
+            )
+            self.stdout.write(f'{name:<11} {values}')
+        statuses = ', '.join(f'{status}: {count}' for status, count in report['statuses'].items())
+        self.stdout.write(f'statuses    {statuses or "none"}')
+        self.stdout.write(
+            f'errors      {report["error_rate"]:.1%} (rejected by admission control {report["rejected_rate"]:.1%})'
+        )
+        if report['rss']:
+            self.stdout.write(f'peak RSS    {report["peak_rss_bytes"] / 1024 / 1024:.1f} MB')
+            for sample in report['rss']:
+                self.stdout.write(
+                    f'  {sample["at"]:7.1f}s  {sample["rss_bytes"] / 1024 / 1024:8.1f} MB  '
+                    f'{sample["completed"]} done'
+                )
+
+
+def _pairs(values, option):
+    pairs = []
+    for value in values:
+        name, sep, rest = value.partition('=')
+        if not sep or not name:
+            raise CommandError(f'{option} takes NAME=VALUE, got {value!r}')
+        pairs.append((name, rest))
+    return pairs
+
+
+def _literal(value):
+    """A Python literal, or the string itself"""
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def _ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.0f}ms'
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "List the stored request profiles, or print the merged report of the "
+        "given profile ids (--all for every stored profile, --last N for the "
+        "newest N). --output also writes the merged stats as a pstats file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile_ids', nargs='*', help='profile ids to merge (default: list the profiles)')
+        parser.add_argument('--all', action='store_true', help='merge every stored profile')
+        parser.add_argument('--last', type=int, help='merge the newest N profiles')
+        parser.add_argument('--endpoint', help='only profiles of this request path, e.g. /api/extract/')
+        parser.add_argument('--sort', choices=profiling.SORT_KEYS, default='cumulative')
+        parser.add_argument('--limit', type=int, default=40, help='functions in the report')
+        parser.add_argument('--output', help='write the merged stats to this pstats file')
+
+    def handle(self, *args, **options):
+        summaries = profiling.list_profiles()
+        if options['endpoint']:
+            summaries = [summary for summary in summaries if summary.get('endpoint') == options['endpoint']]
+
+        profile_ids = options['profile_ids']
+        if options['all']:
+            profile_ids = [summary['id'] for summary in summaries]
+        elif options['last'] is not None:
+            profile_ids = [summary['id'] for summary in summaries[:options['last']]]
+        elif not profile_ids:
+            for summary in summaries:
+                self.stdout.write(
+                    f'{summary["id"]}  {summary["created"]}  {summary.get("method", "")} '
+                    f'{summary.get("endpoint", "")}  {summary.get("status", "")}  '
+                    f'{summary.get("seconds", 0):.3f}s  {summary.get("reason", "")}'
+                )
+            self.stderr.write(f'{len(summaries)} profiles\n')
+            return
+
+        if not profile_ids:
+            raise CommandError('No stored profiles to merge')
+        try:
+            stats = profiling.load_stats(profile_ids)
+        except KeyError as e:
+            raise CommandError(f'No stored profile {e.args[0]}')
+
+        self.stderr.write(f'Merged {len(profile_ids)} profiles\n')
+        self.stdout.write(profiling.format_stats(stats, options['sort'], options['limit']))
+        if options['output']:
+            stats.dump_stats(options['output'])
+            self.stderr.write(f'Wrote {options["output"]}\n')
@@ -0,0 +1,63 @@
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.artifacts import artifact_dir, artifact_text, iter_artifacts
+from core.engines import ENGINES
+from core.views import FIELD_PATTERNS, extract_financial_values, parse_field_list
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run the current field matchers over every document in the text "
+        "artifact store, without parsing any PDFs. Writes one JSON line per "
+        "document and engine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engine', choices=sorted(ENGINES),
+                            help='only documents extracted with this engine')
+        parser.add_argument('--fields', help='comma-separated fields to extract (default: all)')
+        parser.add_argument('--output', help='write the JSON lines to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if not artifact_dir():
+            raise CommandError('Text artifacts are disabled (EXTRACTION_ARTIFACTS / EXTRACTION_ARTIFACT_DIR)')
+
+        fields = None
+        if options['fields']:
+            try:
+                fields = parse_field_list(options['fields'])
+            except ValueError as e:
+                raise CommandError(f'--fields must be a comma-separated list of {", ".join(FIELD_PATTERNS)}: {str(e)}')
+
+        if options['verbosity'] < 2:
+            # extract_financial_values logs every field of every document
+            logging.getLogger('core.views').setLevel(logging.ERROR)
+
+        engine_key = ENGINES[options['engine']].fingerprint() if options['engine'] else None
+        output = open(options['output'], 'w') if options['output'] else self.stdout
+        start = time.perf_counter()
+        documents = 0
+        hits = dict.fromkeys(fields or FIELD_PATTERNS, 0)
+        try:
+            for artifact in iter_artifacts(engine_key):
+                results = extract_financial_values(artifact_text(artifact), fields)
+                for field, value in results.items():
+                    hits[field] += bool(value)
+                documents += 1
+                output.write(json.dumps({
+                    'content_hash': artifact['content_hash'],
+                    'engine': artifact['engine'],
+                    'pages': sorted(artifact['pages']),
+                    'results': results,
+                }) + '\n')
+        finally:
+            if options['output']:
+                output.close()
+
+        elapsed = time.perf_counter() - start
+        found = ', '.join(f'{field} {count}/{documents}' for field, count in hits.items())
+        self.stderr.write(f'Re-extracted {documents} documents in {elapsed:.1f}s ({found})\n')
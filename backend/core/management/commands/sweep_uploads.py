@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.upload_sessions import session_ttl, sweep_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove resumable upload sessions that have received nothing for "
+        "EXTRACTION_UPLOAD_SESSION_TTL seconds. Workers also sweep as sessions "
+        "are created; run this from cron when uploads are rare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-idle', type=float,
+                            help='seconds without a chunk before a session is removed (default: the TTL)')
+
+    def handle(self, *args, **options):
+        max_idle = options['max_idle'] if options['max_idle'] is not None else session_ttl()
+        removed = sweep_sessions(max_idle)
+        self.stdout.write(f'Removed {removed} upload sessions idle for more than {max_idle:.0f}s\n')
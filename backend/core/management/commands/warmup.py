@@ -0,0 +1,41 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm up the extraction pipeline the way a starting worker does and "
+        "report the time of each import and phase. Fails when the total is "
+        "over the cold-start budget."
+    )
+    # System checks import the URLconf, and with it everything to be timed
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float,
+                            help='seconds allowed (default: settings.EXTRACTION_COLD_START_BUDGET)')
+        parser.add_argument('--json', action='store_true', help='print the report as JSON')
+
+    def handle(self, *args, **options):
+        budget = options['budget']
+        if budget is None:
+            budget = getattr(settings, 'EXTRACTION_COLD_START_BUDGET', 5.0)
+
+        # Freezing only matters to the workers that would fork from here
+        report = warm_up(freeze_gc=False)
+
+        if options['json']:
+            self.stdout.write(json.dumps({**report, 'budget': budget}, indent=2))
+        else:
+            for module, seconds in report['imports'].items():
+                self.stdout.write(f'import {module:<30} {seconds:8.3f}s')
+            for phase, seconds in report['phases'].items():
+                self.stdout.write(f'phase  {phase:<30} {seconds:8.3f}s')
+            self.stdout.write(f'total  {"":<30} {report["total"]:8.3f}s (budget {budget:.1f}s)')
+
+        if report['total'] > budget:
+            raise CommandError(f'Warm-up took {report["total"]:.3f}s, over the {budget:.1f}s cold-start budget')
@@ -0,0 +1,304 @@
+"""
+In-process extraction metrics, served in Prometheus text format at /metrics.
+
+Counters and histograms are plain dictionaries behind a lock, updated once
+per request or pipeline stage (never per page or per regex match), so
+recording costs well under a microsecond next to PDF parsing and nothing
+outside the process is needed. Each worker process keeps its own values;
+with several workers, scrape each one or run a single worker.
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from .resources import current_rss_bytes
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100, 200, 500)
+BYTE_BUCKETS = tuple(2 ** power * 1024 for power in range(4, 19, 2))  # 16KB to 256MB
+
+_registry = []
+
+
+class Metric:
+    """A named metric with optional labels"""
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, **extra):
+        return list(zip(self.labelnames, key)) + list(extra.items())
+
+    def samples(self):
+        """(name suffix, label pairs, value) for every recorded series"""
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A value that only goes up"""
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield '', self._labels(key), value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum"""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = {}
+        self._sums = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield '_bucket', self._labels(key, le=bound), cumulative
+            yield '_sum', self._labels(key), total
+            yield '_count', self._labels(key), cumulative
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class Gauge(Metric):
+    """A value read from a function at scrape time"""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, function):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def samples(self):
+        yield '', [], self.function()
+
+    def reset(self):
+        pass
+
+
+REQUESTS = Counter(
+    'extraction_requests_total', 'Extraction API requests by endpoint and status code',
+    ('endpoint', 'status'),
+)
+REQUEST_DURATION = Histogram(
+    'extraction_request_duration_seconds', 'Extraction API request latency by endpoint',
+    LATENCY_BUCKETS, ('endpoint',),
+)
+STAGE_DURATION = Histogram(
+    'extraction_stage_duration_seconds',
+    'Time per pipeline stage: upload (spooling/hashing), text_extraction, layout, matching',
+    LATENCY_BUCKETS, ('stage',),
+)
+PAGES_PARSED = Histogram(
+    'extraction_pages_parsed', 'PDF pages parsed per text or layout extraction',
+    PAGE_BUCKETS,
+)
+UPLOAD_BYTES = Histogram(
+    'extraction_upload_bytes', 'Size of uploaded PDFs in bytes',
+    BYTE_BUCKETS,
+)
+FIELD_RESULTS = Counter(
+    'extraction_field_results_total', 'Extracted fields found (hit) or not found (miss)',
+    ('field', 'result'),
+)
+CACHE_LOOKUPS = Counter(
+    'extraction_cache_lookups_total', 'Extraction cache lookups by tier that answered (memory, disk or miss)',
+    ('result',),
+)
+ARTIFACT_PAGES = Counter(
+    'extraction_artifact_pages_total', 'Pages read from the text artifact store (hit) or parsed (miss)',
+    ('result',),
+)
+PRECHECKS = Counter(
+    'extraction_precheck_total',
+    'Hash prechecks answered with a stored result (known, upload skipped) or not (unknown)',
+    ('result',),
+)
+ISOLATION_ABORTS = Counter(
+    'extraction_isolation_aborts_total',
+    'Isolated extractions stopped by a limit (timeout, memory, crashed) or refused as quarantined',
+    ('reason',),
+)
+PROFILES = Counter(
+    'extraction_profiles_total', 'Requests profiled on request (requested) or by sampling (sampled)',
+    ('reason',),
+)
+ADMISSION_WAIT = Histogram(
+    'extraction_admission_wait_seconds', 'Time extractions spent queued for admission',
+    LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    'extraction_admission_rejections_total',
+    'Extractions turned away by admission control: queue_full (429) or queue_timeout (503)',
+    ('reason',),
+)
+EXTRACTIONS_RUNNING = Gauge(
+    'extraction_admission_running', 'Extractions admitted and running in this worker process',
+    lambda: _admission_state()[0],
+)
+EXTRACTIONS_QUEUED = Gauge(
+    'extraction_admission_queued', 'Extractions waiting for admission in this worker process',
+    lambda: _admission_state()[1],
+)
+EXTRACTION_COST_IN_USE = Gauge(
+    'extraction_admission_cost_in_use', 'Admission cost (pages) held by running extractions',
+    lambda: _admission_state()[2],
+)
+WARMUP_SECONDS = Counter(
+    'extraction_warmup_seconds_total', 'Time spent warming this worker up at startup, by phase',
+    ('phase',),
+)
+RESIDENT_MEMORY = Gauge(
+    'process_resident_memory_bytes', 'Resident set size of this worker process',
+    current_rss_bytes,
+)
+
+
+def record_field_results(financial_data):
+    """Count each field of a freshly extracted result as a hit or a miss"""
+    for field, value in financial_data.items():
+        FIELD_RESULTS.inc(field=field, result='hit' if value else 'miss')
+
+
+def track_requests(endpoint):
+    """View decorator (sync or async) counting requests by status code and timing them"""
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                start = time.perf_counter()
+                status_code = 500
+                try:
+                    response = await view(request, *args, **kwargs)
+                    status_code = response.status_code
+                    return response
+                finally:
+                    REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint)
+                    REQUESTS.inc(endpoint=endpoint, status=status_code)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            start = time.perf_counter()
+            status_code = 500
+            try:
+                response = view(request, *args, **kwargs)
+                status_code = response.status_code
+                return response
+            finally:
+                REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint)
+                REQUESTS.inc(endpoint=endpoint, status=status_code)
+        return wrapper
+    return decorator
+
+
+def _admission_state():
+    # Imported here: the admission module records into this one
+    from .admission import current_state
+
+    return current_state()
+
+
+def render():
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for suffix, labels, value in metric.samples():
+            lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    """Zero every metric (for tests)"""
+    for metric in _registry:
+        metric.reset()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(_format_value(value))}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if isinstance(value, str):
+        return value
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
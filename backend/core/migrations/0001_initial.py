@@ -0,0 +1,40 @@
+# Generated by Django 4.2.24 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Extraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('period_end_date', models.DateField(blank=True, null=True)),
+                ('mode', models.CharField(default='values', max_length=10)),
+                ('engine', models.CharField(max_length=20)),
+                ('fields', models.CharField(default='all', max_length=100)),
+                ('pages', models.TextField(default='auto')),
+                ('extractor_version', models.CharField(max_length=64)),
+                ('results', models.JSONField(default=dict)),
+                ('cache', models.CharField(default='miss', max_length=4)),
+                ('seconds', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_hash', 'period_end_date'], name='extraction_hash_period'), models.Index(fields=['period_end_date'], name='extraction_period')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='extraction',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'period_end_date', 'extractor_version', 'mode', 'engine', 'fields', 'pages'), name='unique_extraction'),
+        ),
+    ]
@@ -1,3 +1,63 @@
 from django.db import models
 
-# Create your models here.
+
+class Extraction(models.Model):
+    """
+    A stored extraction result (see core.history), so results can be read
+    back without the PDF
+
+    One row per document, period, extractor version and request options;
+    extracting the same document the same way again updates it.
+    """
+    content_hash = models.CharField(max_length=64)
+    filename = models.CharField(max_length=255, blank=True)
+    period_end_date = models.DateField(null=True, blank=True)
+    mode = models.CharField(max_length=10, default='values')
+    engine = models.CharField(max_length=20)
+    # 'all' or a comma-separated field list, and 'auto' or a page list (up to
+    # the 10000 pages parse_page_range accepts, so not length-limited)
+    fields = models.CharField(max_length=100, default='all')
+    pages = models.TextField(default='auto')
+    extractor_version = models.CharField(max_length=64)
+    # {field: value}, '' for fields that were not found
+    results = models.JSONField(default=dict)
+    # Whether the extraction that stored the row parsed the PDF ('miss') or
+    # came from the extraction cache ('hit'), and how long it took
+    cache = models.CharField(max_length=4, default='miss')
+    seconds = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_hash', 'period_end_date'], name='extraction_hash_period'),
+            models.Index(fields=['period_end_date'], name='extraction_period'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_hash', 'period_end_date', 'extractor_version', 'mode', 'engine', 'fields',
+                        'pages'],
+                name='unique_extraction',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.filename or self.content_hash[:12]} ({self.period_end_date or "no period"})'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content_hash': self.content_hash,
+            'filename': self.filename,
+            'period_end_date': self.period_end_date.isoformat() if self.period_end_date else None,
+            'mode': self.mode,
+            'engine': self.engine,
+            'fields': self.fields,
+            'pages': self.pages,
+            'extractor_version': self.extractor_version,
+            'results': self.results,
+            'cache': self.cache,
+            'seconds': self.seconds,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
@@ -0,0 +1,170 @@
+"""
+Page-parallel text extraction.
+
+pdfminer's layout analysis is pure Python and CPU bound, so a single large
+filing keeps one core busy while the others idle. PagePool splits a
+document's pages into chunks, extracts them in a pool of worker processes
+(each opens the PDF from disk itself) and reassembles the text in page order.
+
+Worker processes are recycled after a fixed number of tasks, and the whole
+pool is replaced once a worker reports resident memory above a watermark,
+because pdfminer worker memory creeps up under sustained load.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import pdfplumber
+import pypdfium2 as pdfium
+from django.conf import settings
+
+from .pdfium_lock import PDFIUM_LOCK
+from .resources import current_rss_bytes, parse_gc
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_pages(page_numbers, chunk_size, workers=1):
+    """
+    Split page numbers into ordered chunks of at most chunk_size pages, using
+    smaller chunks when that is needed to give every worker something to do
+    """
+    page_numbers = list(page_numbers)
+    if not page_numbers:
+        return []
+    size = max(1, min(chunk_size, math.ceil(len(page_numbers) / max(workers, 1))))
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def count_pages(path):
+    """Number of pages in the PDF at path"""
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def extract_page_chunk(path, page_numbers, low_memory=False):
+    """
+    Worker task: extract the text of the given 1-based pages of the PDF at
+    path. Returns (page_texts, worker_rss_bytes). With low_memory, each
+    page's layout is released once its text is taken.
+    """
+    page_texts = []
+    with parse_gc() if low_memory else nullcontext(), pdfplumber.open(path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            page_texts.append(page.extract_text() or '')
+            if low_memory:
+                page.close()
+    return page_texts, current_rss_bytes()
+
+
+class PagePool:
+    """Process pool that extracts page ranges of one document in parallel"""
+
+    def __init__(self, max_workers=None, chunk_size=8, max_tasks_per_worker=None,
+                 rss_limit_mb=None, start_method='spawn'):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.rss_limit_bytes = rss_limit_mb * 1024 * 1024 if rss_limit_mb else None
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def extract(self, path, page_numbers):
+        """Return the text of each requested page, in page order"""
+        return list(self.iter_extract(path, page_numbers))
+
+    def iter_extract(self, path, page_numbers, low_memory=False):
+        """
+        Yield the text of each requested page in page order. Only a window of
+        chunks is in flight at a time, so a caller that stops early leaves
+        little work behind; queued chunks are cancelled when it does.
+        """
+        chunks = iter(chunk_pages(page_numbers, self.chunk_size, self.max_workers))
+        executor = self._get_executor()
+        in_flight = deque()
+
+        def submit_next():
+            chunk = next(chunks, None)
+            if chunk is not None:
+                in_flight.append(executor.submit(extract_page_chunk, path, chunk, low_memory))
+
+        for _ in range(2 * self.max_workers):
+            submit_next()
+
+        recycle = False
+        try:
+            while in_flight:
+                chunk_texts, worker_rss = in_flight.popleft().result()
+                submit_next()
+                if self.rss_limit_bytes and worker_rss > self.rss_limit_bytes:
+                    recycle = True
+                yield from chunk_texts
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if recycle:
+                logger.info("Page pool worker memory above watermark, recycling workers")
+                self.recycle(executor)
+
+    def recycle(self, executor=None):
+        """
+        Replace the worker processes. Work already submitted to the old pool
+        still completes; its processes exit once it is done.
+        """
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return  # Already replaced by another request
+            old_executor, self._executor = self._executor, None
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _create_executor(self):
+        options = {}
+        if self.max_tasks_per_worker:
+            options['max_tasks_per_child'] = self.max_tasks_per_worker
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            **options,
+        )
+
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+
+def get_page_pool():
+    """The process-wide PagePool, configured from settings"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = PagePool(
+                max_workers=getattr(settings, 'EXTRACTION_POOL_WORKERS', None),
+                chunk_size=getattr(settings, 'EXTRACTION_POOL_CHUNK_SIZE', 8),
+                max_tasks_per_worker=getattr(settings, 'EXTRACTION_POOL_MAX_TASKS_PER_WORKER', None),
+                rss_limit_mb=getattr(settings, 'EXTRACTION_POOL_WORKER_RSS_LIMIT_MB', None),
+                start_method=getattr(settings, 'EXTRACTION_POOL_START_METHOD', 'spawn'),
+            )
+        return _page_pool
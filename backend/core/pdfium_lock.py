@@ -0,0 +1,14 @@
+"""
+Serialized access to PDFium.
+
+PDFium keeps global state and is not thread-safe, even across separate
+documents: two request threads calling into it at once can crash the
+worker process. Every pypdfium2 call (opening, reading pages and their
+text, closing) holds PDFIUM_LOCK. Work is locked one call or one page at a
+time, so a long document does not hold other threads off for its whole
+scan. Processes (the page pool, isolated children) have their own PDFium
+and need no lock between them.
+"""
+import threading
+
+PDFIUM_LOCK = threading.Lock()
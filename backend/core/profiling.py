@@ -0,0 +1,250 @@
+"""
+Sampled per-request profiling.
+
+A request to a view wrapped in profile_requests runs under cProfile when
+
+- it carries settings.EXTRACTION_PROFILE_TOKEN in the X-Extraction-Profile
+  header or the 'profile' query parameter (an authorized caller asking for
+  it), or
+- it is drawn by the sampling rate, settings.EXTRACTION_PROFILE_SAMPLE_RATE
+  (0.0 to 1.0)
+
+The profile is stored in pstats format, with a JSON summary next to it:
+
+    EXTRACTION_PROFILE_DIR/<profile id>.prof
+    EXTRACTION_PROFILE_DIR/<profile id>.json
+
+and the response carries the id in X-Profile-Id. Profiles are read back at
+GET /api/profiles/<id>/ or with `manage.py profiles`, which also merges
+them. Only the oldest profiles past EXTRACTION_PROFILE_MAX_FILES are removed.
+
+With no token and a zero rate the wrapper only reads those two settings.
+cProfile sees the request thread: pages parsed in the page pool or an
+isolated child show up as time spent waiting for them.
+"""
+import cProfile
+import functools
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Extraction-Profile'
+PROFILE_PARAM = 'profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+# The caller's own request id, kept in the summary for correlating logs
+REQUEST_ID_HEADER = 'X-Request-ID'
+PROFILE_SUFFIX = '.prof'
+SUMMARY_SUFFIX = '.json'
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+SORT_KEYS = ('cumulative', 'tottime', 'calls', 'ncalls', 'name', 'filename')
+
+
+def profile_requests(view):
+    """View decorator: profile the requests profile_reason picks"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        reason = profile_reason(request)
+        if reason is None:
+            return view(request, *args, **kwargs)
+        return _profiled(view, reason, request, args, kwargs)
+    return wrapper
+
+
+def profile_reason(request):
+    """'requested' for an authorized profile flag, 'sampled' when drawn, otherwise None"""
+    token = getattr(settings, 'EXTRACTION_PROFILE_TOKEN', None)
+    rate = getattr(settings, 'EXTRACTION_PROFILE_SAMPLE_RATE', 0.0)
+    if not token and not rate:
+        return None
+    if token and is_authorized(request):
+        return 'requested'
+    if rate and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+def is_authorized(request):
+    """Whether the request carries EXTRACTION_PROFILE_TOKEN in the header or query"""
+    token = getattr(settings, 'EXTRACTION_PROFILE_TOKEN', None)
+    supplied = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    if not token or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _profiled(view, reason, request, args, kwargs):
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler per process
+        logger.info(f"Not profiling {request.path}: another profile is running")
+        return view(request, *args, **kwargs)
+
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = view(request, *args, **kwargs)
+        status_code = response.status_code
+    finally:
+        profiler.disable()
+        profile_id = save_profile(profiler, {
+            'endpoint': request.path,
+            'method': request.method,
+            'reason': reason,
+            'status': status_code,
+            'seconds': round(time.perf_counter() - start, 6),
+            'request_id': request.headers.get(REQUEST_ID_HEADER, ''),
+        })
+    if profile_id:
+        response[PROFILE_ID_HEADER] = profile_id
+    return response
+
+
+def profile_dir():
+    directory = getattr(settings, 'EXTRACTION_PROFILE_DIR', None)
+    return os.fspath(directory) if directory else None
+
+
+def profile_path(profile_id, suffix=PROFILE_SUFFIX):
+    return os.path.join(profile_dir(), f'{profile_id}{suffix}')
+
+
+def save_profile(profiler, summary):
+    """
+    Store a finished profiler's stats and summary under a new profile id
+    and return the id, or None if they could not be written
+    """
+    directory = profile_dir()
+    if not directory:
+        return None
+    profile_id = uuid.uuid4().hex
+    summary = {
+        'id': profile_id,
+        'created': datetime.now(timezone.utc).isoformat(),
+        **summary,
+    }
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(profile_path(profile_id), profiler.dump_stats)
+        _write_atomic(
+            profile_path(profile_id, SUMMARY_SUFFIX),
+            lambda path: _write_json(path, summary),
+        )
+    except Exception as e:
+        logger.warning(f"Could not store profile of {summary.get('endpoint')}: {str(e)}")
+        return None
+    metrics.PROFILES.inc(reason=summary.get('reason', ''))
+    logger.info(f"Stored {summary.get('reason')} profile {profile_id} of {summary.get('endpoint')}")
+    prune_profiles()
+    return profile_id
+
+
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def list_profiles():
+    """Summaries of the stored profiles, newest first"""
+    directory = profile_dir()
+    if not directory or not os.path.isdir(directory):
+        return []
+    summaries = []
+    for name in os.listdir(directory):
+        if name.endswith(SUMMARY_SUFFIX):
+            summary = load_summary(name[:-len(SUMMARY_SUFFIX)])
+            if summary is not None:
+                summaries.append(summary)
+    return sorted(summaries, key=lambda summary: summary['created'], reverse=True)
+
+
+def load_summary(profile_id):
+    """A stored profile's summary, or None if there is no such profile"""
+    if not PROFILE_ID_PATTERN.match(profile_id) or not profile_dir():
+        return None
+    if not os.path.exists(profile_path(profile_id)):
+        return None
+    try:
+        with open(profile_path(profile_id, SUMMARY_SUFFIX)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable profile summary {profile_id}: {str(e)}")
+        return None
+
+
+def load_stats(profile_ids):
+    """
+    The merged pstats.Stats of the given stored profiles. Raises KeyError
+    naming the first id with no stored profile.
+    """
+    paths = []
+    for profile_id in profile_ids:
+        if load_summary(profile_id) is None:
+            raise KeyError(profile_id)
+        paths.append(profile_path(profile_id))
+    if not paths:
+        raise ValueError('no profiles to load')
+    stats = pstats.Stats(paths[0], stream=io.StringIO())
+    if paths[1:]:
+        stats.add(*paths[1:])
+    return stats
+
+
+def format_stats(stats, sort='cumulative', limit=40):
+    """The text report of stats, sorted by sort and cut to limit functions"""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def prune_profiles():
+    """Remove the oldest profiles past settings.EXTRACTION_PROFILE_MAX_FILES"""
+    limit = getattr(settings, 'EXTRACTION_PROFILE_MAX_FILES', 1000)
+    directory = profile_dir()
+    if not limit or not directory:
+        return
+    try:
+        paths = [
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX)
+        ]
+        if len(paths) <= limit:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - limit]:
+            for stale in (path, path[:-len(PROFILE_SUFFIX)] + SUMMARY_SUFFIX):
+                try:
+                    os.unlink(stale)
+                except FileNotFoundError:
+                    pass
+    except OSError as e:
+        logger.warning(f"Could not prune profiles: {str(e)}")
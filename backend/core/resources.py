@@ -0,0 +1,53 @@
+"""
+Process resource helpers.
+"""
+import gc
+import os
+import resource
+import threading
+from contextlib import contextmanager
+
+# Young-generation collection threshold while pages are parsed (CPython's
+# default is 700 allocations)
+PARSE_GC_THRESHOLD = 100000
+
+
+def current_rss_bytes():
+    """Resident set size of the current process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): fall back to the peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def parse_gc(threshold=PARSE_GC_THRESHOLD):
+    """
+    Collect the young generation less often in the with block.
+
+    Layout analysis allocates millions of short-lived objects that reference
+    counting frees on its own, so the default threshold only spends time
+    scanning them. GC settings are process-wide: overlapping blocks share
+    one setting, restored when the last of them exits.
+    """
+    global _parse_gc_users, _saved_threshold
+    with _parse_gc_lock:
+        if _parse_gc_users == 0:
+            _saved_threshold = gc.get_threshold()
+            gc.set_threshold(max(threshold, _saved_threshold[0]), *_saved_threshold[1:])
+        _parse_gc_users += 1
+    try:
+        yield
+    finally:
+        with _parse_gc_lock:
+            _parse_gc_users -= 1
+            if _parse_gc_users == 0:
+                gc.set_threshold(*_saved_threshold)
+
+
+_parse_gc_users = 0
+_saved_threshold = None
+_parse_gc_lock = threading.Lock()
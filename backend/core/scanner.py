@@ -0,0 +1,235 @@
+"""
+Single-pass multi-field pattern scanner.
+
+Each field has a list of regex patterns in priority order; the value of a
+field is the first match of its highest-priority pattern that cleans to a
+usable number. Rather than running re.findall over the whole document once
+per pattern, FieldScanner compiles every pattern into one alternation, walks
+the text once with it, and only runs the individual patterns at the few
+positions where one of them matches. Scanning stops as soon as every
+requested field is resolved, and a new field only adds alternatives to the
+existing pass instead of more full-text scans.
+
+Text can also be fed in pieces (FieldScanner.start), so a caller producing
+it page by page can stop as soon as the scan reports that every field is
+resolved.
+"""
+import re
+
+# Characters that case-insensitive matching treats as ASCII letters but
+# str.lower() leaves alone (long s, dotless i)
+FOLD_REPLACEMENTS = (('ſ', 's'), ('ı', 'i'))
+
+UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+
+# Backreferences would point at the wrong group once patterns are combined
+BACKREFERENCE_PATTERN = re.compile(r'\\[1-9]|\(\?P=')
+
+# Characters of text that must follow a position before an incremental scan
+# examines it, so matches are not cut short where one piece ends. Matches
+# longer than this are not supported in incremental scans.
+DEFAULT_MARGIN = 1024
+
+
+class FieldScanner:
+    """Find the highest-priority match for several fields in one pass"""
+
+    def __init__(self, field_patterns, clean=None, flags=re.IGNORECASE, margin=DEFAULT_MARGIN):
+        self.field_patterns = {field: list(patterns) for field, patterns in field_patterns.items()}
+        self.fields = list(self.field_patterns)
+        self.clean = clean or (lambda value: value)
+        self.margin = margin
+        self._compiled = {
+            field: [re.compile(pattern, flags) for pattern in patterns]
+            for field, patterns in self.field_patterns.items()
+        }
+
+        # "^" anchored patterns can only match at the very start; they are
+        # searched for directly and kept out of the alternation, where they
+        # would stop the regex engine skipping ahead to candidate characters
+        self._searched_directly = []
+        # Patterns that can only match at position 0 (anchored, with no
+        # alternation that could escape the anchor)
+        self._start_only = set()
+        alternatives = []
+        for field, patterns in self.field_patterns.items():
+            for index, pattern in enumerate(patterns):
+                start_anchored = pattern.startswith('^') and not flags & re.MULTILINE
+                if start_anchored and '|' not in pattern:
+                    self._start_only.add((field, index))
+                if start_anchored or BACKREFERENCE_PATTERN.search(pattern):
+                    self._searched_directly.append((field, index))
+                else:
+                    alternatives.append((field, index))
+
+        trigger = '|'.join(
+            f'(?:{pattern})' if '|' in pattern else pattern
+            for pattern in (self.field_patterns[field][index] for field, index in alternatives)
+        )
+        try:
+            self._trigger = re.compile(trigger, flags) if alternatives else None
+        except re.error:
+            # e.g. two patterns defining the same group name
+            self._searched_directly.extend(alternatives)
+            self._trigger = alternatives = None
+
+        # IGNORECASE searches are several times slower than case-sensitive
+        # ones. Lowercasing the text once and searching it case-sensitively
+        # finds the same positions, provided no pattern spells out uppercase
+        # letters (including escapes such as \S or \W).
+        self._folded_trigger = None
+        if alternatives and flags & re.IGNORECASE and not UPPERCASE_PATTERN.search(trigger):
+            self._folded_trigger = re.compile(trigger, flags & ~re.IGNORECASE)
+
+    def scan(self, text, fields=None):
+        """
+        Return {field: cleaned value} for the requested fields (all fields by
+        default), with "" for fields that were not found.
+        """
+        return self.start(fields).feed(text, final=True).result()
+
+    def start(self, fields=None):
+        """Begin an IncrementalScan for the requested fields (all by default)"""
+        return IncrementalScan(self, self.fields if fields is None else list(fields))
+
+    def _iter_candidates(self, text, start=0, end=None):
+        """Yield every position in [start, end) where at least one pattern matches"""
+        trigger, haystack = self._trigger, text
+        if self._folded_trigger is not None:
+            # Positions only line up when lowercasing keeps the length
+            folded = text.lower()
+            if len(folded) == len(text):
+                for char, replacement in FOLD_REPLACEMENTS:
+                    if char in folded:
+                        folded = folded.replace(char, replacement)
+                trigger, haystack = self._folded_trigger, folded
+        if end is None:
+            end = len(text) + 1
+
+        # Resume right after each hit's start rather than its end: one
+        # field's label can sit inside another's ("cost of revenues $ 5"
+        # holds "revenues $ 5")
+        search = trigger.search
+        hit = search(haystack, start)
+        while hit is not None and hit.start() < end:
+            yield hit.start()
+            hit = search(haystack, hit.start() + 1)
+
+
+class IncrementalScan:
+    """
+    A FieldScanner pass over text that arrives in pieces. The result is the
+    same as scanning the concatenated pieces; `done` turns true once no
+    further text can change it.
+    """
+
+    def __init__(self, scanner, fields):
+        self.scanner = scanner
+        self.fields = fields
+        self.found = {field: [None] * len(scanner._compiled[field]) for field in fields}
+        # Fields without patterns can only ever be ""
+        self.pending = {field for field in fields if scanner._compiled[field]}
+        self._text = ''     # Text received from absolute position _offset on
+        self._offset = 0
+        self._position = 0  # Next absolute position to examine
+        self._finished = False
+
+    @property
+    def done(self):
+        return not self.pending
+
+    def feed(self, text, final=False):
+        """
+        Add the next piece of text and examine every position that is now
+        followed by at least `margin` characters (all of them when final)
+        """
+        if self._finished:
+            raise ValueError('scan already finished')
+        self._text += text
+        self._finished = final
+        if self.pending:
+            self._scan(final)
+        return self
+
+    def finish(self):
+        """Mark the end of the text and return the result"""
+        if not self._finished:
+            self.feed('', final=True)
+        return self.result()
+
+    def result(self):
+        return {field: _best_value(self.found[field]) for field in self.fields}
+
+    def _scan(self, final):
+        scanner, text, found, pending = self.scanner, self._text, self.found, self.pending
+        if final:
+            end = len(text) + 1
+        else:
+            end = len(text) - scanner.margin
+        start = self._position - self._offset
+        if end <= start:
+            return
+
+        for field, index in scanner._searched_directly:
+            if field in pending and found[field][index] is None:
+                match = scanner._compiled[field][index].search(text, start)
+                if match and match.start() < end:
+                    found[field][index] = scanner.clean(_match_value(match))
+                elif final or (field, index) in scanner._start_only:
+                    # Position 0 is always in the first region examined
+                    found[field][index] = ''
+                if _is_resolved(found[field]):
+                    pending.discard(field)
+
+        if pending and scanner._trigger is not None:
+            for position in scanner._iter_candidates(text, start, end):
+                for field in list(pending):
+                    values = found[field]
+                    for index, pattern in enumerate(scanner._compiled[field]):
+                        if values[index] is None:
+                            match = pattern.match(text, position)
+                            if match:
+                                values[index] = scanner.clean(_match_value(match))
+                    if _is_resolved(values):
+                        pending.discard(field)
+                if not pending:
+                    break
+
+        self._position = self._offset + end
+        # Drop examined text, keeping `margin` characters of context for
+        # lookbehinds and word boundaries
+        drop = end - scanner.margin
+        if drop > 0 and not final:
+            self._text = text[drop:]
+            self._offset += drop
+
+
+def _match_value(match):
+    """The value re.findall would report for this match"""
+    groups = match.groups(default='')
+    if not groups:
+        return match.group(0)
+    # Multiple groups - take the last one (usually the number)
+    return groups[-1]
+
+
+def _is_resolved(values):
+    """
+    A field is resolved once a pattern has produced a usable value and every
+    higher-priority pattern has already had its first match (which cleaned to
+    nothing) or can never match. Later text can no longer change the result.
+    """
+    for value in values:
+        if value is None:
+            return False
+        if value:
+            return True
+    return True
+
+
+def _best_value(values):
+    """First usable value in pattern priority order"""
+    for value in values:
+        if value:
+            return value
+    return ""
@@ -0,0 +1,246 @@
+"""
+Structured row index of financial statement pages.
+
+Rather than one regex per line item over flattened text, the statement
+pages are laid out once from pdfplumber's word coordinates: words are grouped
+into lines by their vertical position, each line's trailing run of numbers
+becomes its values, and the value columns are found by merging the
+horizontal extents of those numbers (NumPy, one sort per page). Each line
+then becomes a label -> [value per column] row, and any line item is a
+dictionary lookup on the normalized label.
+
+Statements show a column per reporting period, headed by its year.
+period_values reads every field from every year column, from the layout or,
+for text engines without word positions, from the plain text lines
+(build_text_statements).
+"""
+import re
+
+import numpy as np
+
+# Words within this many points of each other vertically share a line
+LINE_TOLERANCE = 3
+# Number extents closer than this horizontally belong to the same column
+COLUMN_GAP = 4
+# A column needs numbers on at least this many lines
+MIN_COLUMN_ROWS = 2
+
+NUMBER_PATTERN = re.compile(r'^\(?-?\$?\(?[0-9](?:[0-9,]*[0-9])?(?:\.[0-9]+)?\)?%?$')
+# Footnote markers such as "(1)" belong to the label
+FOOTNOTE_MARKER_PATTERN = re.compile(r'^\([0-9]\)$')
+# Dashes stand for zero / not applicable in statement columns
+DASH_PATTERN = re.compile(r'^[—–-]+$')
+YEAR_PATTERN = re.compile(r'^(?:19|20)[0-9]{2}$')
+FOOTNOTE_PATTERN = re.compile(r'\s*\(\d\)$')
+
+# Statement labels for each field, most specific first
+FIELD_LABELS = {
+    'revenue': (
+        'total revenues', 'total revenue', 'total net revenues', 'total net sales',
+        'revenues', 'revenue', 'net revenues', 'net revenue', 'net sales',
+        'consolidated revenues',
+    ),
+    'cos': (
+        'cost of revenues', 'cost of revenue', 'total cost of revenues', 'cost of sales',
+        'cost of goods sold', 'cost of services',
+    ),
+    'operating_income': (
+        'income from operations', 'operating income', 'income (loss) from operations',
+        'operating income (loss)', 'operating earnings',
+    ),
+    'net_income': ('net income', 'net income (loss)', 'net earnings'),
+    'eps_basic': (
+        'basic net income per share', 'basic earnings per share', 'net income per share basic',
+        'basic',
+    ),
+    'eps_diluted': (
+        'diluted net income per share', 'diluted earnings per share',
+        'net income per share diluted', 'diluted',
+    ),
+}
+
+
+def normalize_label(label):
+    """Lowercase, drop '$', colons and footnote markers, collapse whitespace"""
+    label = label.replace('$', ' ').replace(':', ' ').replace(',', ' ')
+    label = ' '.join(label.lower().split())
+    return FOOTNOTE_PATTERN.sub('', label)
+
+
+def group_lines(words):
+    """Group pdfplumber words into lines, top to bottom, each left to right"""
+    if not words:
+        return []
+    tops = np.array([word['top'] for word in words], dtype=float)
+    order = np.argsort(tops, kind='stable')
+    breaks = np.flatnonzero(np.diff(tops[order]) > LINE_TOLERANCE) + 1
+    return [
+        sorted((words[i] for i in line), key=lambda word: word['x0'])
+        for line in np.split(order, breaks)
+    ]
+
+
+def split_line(line):
+    """
+    Split a line into (label words, value words): the values are the trailing
+    run of numbers, dashes and '$' signs
+    """
+    start = len(line)
+    while start > 0 and _is_value_word(line[start - 1]['text']):
+        start -= 1
+    values = [word for word in line[start:] if word['text'] != '$']
+    return line[:start], values
+
+
+def find_columns(value_words):
+    """
+    Merge the horizontal extents of the value words into column spans.
+    Returns an array of (x0, x1) rows, left to right.
+    """
+    if not value_words:
+        return np.empty((0, 2))
+    x0 = np.array([word['x0'] for word in value_words], dtype=float)
+    x1 = np.array([word['x1'] for word in value_words], dtype=float)
+    order = np.argsort(x0)
+    x0, x1 = x0[order], x1[order]
+    reach = np.maximum.accumulate(x1)
+    starts = np.concatenate(([0], np.flatnonzero(x0[1:] > reach[:-1] + COLUMN_GAP) + 1))
+    ends = np.concatenate((starts[1:], [len(x0)]))
+    counts = ends - starts
+    keep = counts >= MIN_COLUMN_ROWS
+    return np.column_stack((x0[starts][keep], reach[ends - 1][keep]))
+
+
+def assign_columns(value_words, columns):
+    """Index of the column each value word falls in, or -1"""
+    if not value_words or not len(columns):
+        return np.full(len(value_words), -1)
+    centers = np.array([(word['x0'] + word['x1']) / 2 for word in value_words])
+    index = np.searchsorted(columns[:, 0], centers, side='right') - 1
+    inside = (index >= 0) & (centers <= columns[np.clip(index, 0, None), 1] + COLUMN_GAP)
+    return np.where(inside, index, -1)
+
+
+def build_page_statement(words, clean=None):
+    """
+    Build {'columns': [header per column], 'rows': [{'label', 'values'}],
+    'lines': [line text]} from one page's pdfplumber words. Header rows are
+    the lines made only of years; their years label the columns.
+    """
+    clean = clean or (lambda value: value)
+    lines = [split_line(line) for line in group_lines(words)]
+    columns = find_columns([word for _, values in lines for word in values])
+
+    headers = [None] * len(columns)
+    rows = []
+    for label_words, value_words in lines:
+        label = ' '.join(word['text'] for word in label_words)
+        texts = [word['text'] for word in value_words]
+        if not label and texts and all(YEAR_PATTERN.match(text) for text in texts):
+            for column, text in zip(assign_columns(value_words, columns), texts):
+                if column >= 0 and headers[column] is None:
+                    headers[column] = text
+            continue
+        if not label:
+            continue
+        values = [''] * len(columns)
+        for column, text in zip(assign_columns(value_words, columns), texts):
+            if column >= 0 and not values[column]:
+                values[column] = '' if DASH_PATTERN.match(text) else clean(text)
+        rows.append({'label': label, 'values': values})
+
+    return {
+        'columns': headers,
+        'rows': rows,
+        'lines': [' '.join(word['text'] for word in label_words + value_words)
+                  for label_words, value_words in lines],
+    }
+
+
+def build_text_statements(text, clean=None):
+    """
+    Statement tables, shaped like build_page_statement's pages, from plain
+    text lines. Each line made only of years starts a table whose columns
+    they head. Without word positions a row's trailing numbers are only
+    trusted when there is one per column, so other rows are left out.
+    """
+    clean = clean or (lambda value: value)
+    tables = []
+    table = None
+    for line in text.splitlines():
+        words = line.split()
+        start = len(words)
+        while start > 0 and _is_value_word(words[start - 1]):
+            start -= 1
+        label, texts = words[:start], [word for word in words[start:] if word != '$']
+        if not label and texts and all(YEAR_PATTERN.match(text) for text in texts):
+            table = {'columns': texts, 'rows': []}
+            tables.append(table)
+        elif table is not None and label and len(texts) == len(table['columns']):
+            values = ['' if DASH_PATTERN.match(text) else clean(text) for text in texts]
+            table['rows'].append({'label': ' '.join(label), 'values': values})
+    return tables
+
+
+def period_values(pages, fields):
+    """
+    {column header: {field: value}} for every year column of the statement
+    pages, in the order the columns first appear. A field takes its value
+    from the first page that has one in that column. Columns where no field
+    has a value are left out.
+    """
+    periods = {}
+    for page in pages:
+        index = StatementIndex([page])
+        for column, header in enumerate(page['columns']):
+            if header is None:
+                continue
+            values = periods.setdefault(header, dict.fromkeys(fields, ''))
+            for field in fields:
+                if not values[field]:
+                    values[field] = index.lookup(field, column)
+    return {header: values for header, values in periods.items() if any(values.values())}
+
+
+class StatementIndex:
+    """Label lookup over the rows of one or more statement pages"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self._rows = {}
+        for page in pages:
+            for row in page['rows']:
+                if any(row['values']):
+                    self._rows.setdefault(normalize_label(row['label']), (page, row))
+
+    def row(self, label):
+        """The first row with this label that has values, or None"""
+        found = self._rows.get(normalize_label(label))
+        return found[1] if found else None
+
+    def lookup(self, field, column=0):
+        """
+        Value of a known field (see FIELD_LABELS) or of any row label in the
+        given column, or "" when it is not on the statement
+        """
+        for label in FIELD_LABELS.get(field, (field,)):
+            row = self.row(label)
+            if row is not None and column < len(row['values']) and row['values'][column]:
+                return row['values'][column]
+        return ""
+
+    def to_dict(self):
+        return {
+            'pages': [
+                {'page': page['page'], 'columns': page['columns'], 'rows': page['rows']}
+                for page in self.pages
+            ],
+        }
+
+
+def _is_value_word(text):
+    if text == '$':
+        return True
+    if FOOTNOTE_MARKER_PATTERN.match(text):
+        return False
+    return bool(NUMBER_PATTERN.match(text) or DASH_PATTERN.match(text))
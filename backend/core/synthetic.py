@@ -0,0 +1,140 @@
+"""
+Deterministic synthetic 10-K style filings.
+
+Builds small, valid PDFs offline (no PDF library needed) with pages of
+narrative text and one consolidated statement of operations at a chosen
+page, for benchmarks and load tests. The same arguments always produce the
+same bytes.
+"""
+import random
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 10
+# Approximate Helvetica digit width at FONT_SIZE, used to right-align numbers
+DIGIT_WIDTH = 5.6
+
+NARRATIVE_WORDS = (
+    'revenue', 'recognition', 'customers', 'performance', 'obligations', 'contracts',
+    'risk', 'factors', 'operating', 'results', 'liquidity', 'capital', 'resources',
+    'fiscal', 'year', 'compared', 'increase', 'decrease', 'primarily', 'due', 'to',
+    'the', 'our', 'and', 'of', 'in', 'for', 'as', 'a', 'were', 'was', 'net', 'costs',
+)
+
+# (label, prior year, current year)
+STATEMENT_ROWS = (
+    ('Revenues', '$ 282,836', '$ 307,394'),
+    ('Total revenues', '$ 307,394', '$ 350,018'),
+    ('Costs and expenses:', None, None),
+    ('Cost of revenues', '133,332', '146,306'),
+    ('Research and development', '45,427', '49,326'),
+    ('Sales and marketing', '27,917', '27,808'),
+    ('General and administrative', '16,425', '14,188'),
+    ('Total costs and expenses', '223,101', '237,142'),
+    ('Income from operations', '84,293', '112,390'),
+    ('Other income (expense), net', '(1,424)', '7,425'),
+    ('Net income', '73,795', '100,118'),
+    ('Diluted net income per share', '$ 5.80', '$ 8.04'),
+)
+STATEMENT_YEARS = ('2023', '2024')
+STATEMENT_COLUMNS = (380, 480)  # Right edges of the value columns
+
+
+def synthetic_filing(pages=30, statement_page='middle', seed=0, lines_per_page=40):
+    """
+    PDF bytes of a filing with `pages` pages (5 to 500 are typical). The
+    income statement goes on statement_page: a 1-based page number, or
+    'start', 'middle' or 'end'.
+    """
+    if pages < 1:
+        raise ValueError('a filing needs at least one page')
+    statement_page = _resolve_statement_page(statement_page, pages)
+    rng = random.Random(seed)
+
+    page_items = []
+    for number in range(1, pages + 1):
+        if number == statement_page:
+            page_items.append(_statement_items())
+        else:
+            page_items.append(_narrative_items(rng, number, lines_per_page))
+    return build_pdf(page_items)
+
+
+def build_pdf(pages):
+    """
+    PDF bytes with one page per entry of pages, each a list of (x, y, text)
+    items drawn in Helvetica
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font_id = 3 + 2 * len(pages)
+
+    for i, items in enumerate(pages):
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        ).encode())
+        operations = [f"BT /F1 {FONT_SIZE} Tf"]
+        for x, y, text in items:
+            text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            operations.append(f"1 0 0 1 {x:.1f} {y:.1f} Tm ({text}) Tj")
+        operations.append("ET")
+        stream = "\n".join(operations).encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _resolve_statement_page(statement_page, pages):
+    if statement_page == 'start':
+        return 1
+    if statement_page == 'middle':
+        return (pages + 1) // 2
+    if statement_page == 'end':
+        return pages
+    if not 1 <= statement_page <= pages:
+        raise ValueError(f'statement_page must be between 1 and {pages}')
+    return statement_page
+
+
+def _statement_items():
+    items = [(72, 740, 'CONSOLIDATED STATEMENTS OF OPERATIONS'), (72, 722, 'Year Ended December 31,')]
+    items += [(_right_align(year, right), 704, year) for year, right in zip(STATEMENT_YEARS, STATEMENT_COLUMNS)]
+    y = 686
+    for label, *values in STATEMENT_ROWS:
+        items.append((72, y, label))
+        for value, right in zip(values, STATEMENT_COLUMNS):
+            if value is None:
+                continue
+            if value.startswith('$ '):
+                items.append((right - 70, y, '$'))
+                value = value[2:]
+            items.append((_right_align(value, right), y, value))
+        y -= 18
+    return items
+
+
+def _narrative_items(rng, number, lines_per_page):
+    items = [(72, 750, f'Page {number}')]
+    y = 730
+    for _ in range(lines_per_page):
+        words = [rng.choice(NARRATIVE_WORDS) for _ in range(rng.randint(8, 14))]
+        items.append((72, y, ' '.join(words).capitalize() + '.'))
+        y -= 17
+    return items
+
+
+def _right_align(text, right):
+    return right - DIGIT_WIDTH * len(text)
@@ -0,0 +1,234 @@
+"""
+Resumable chunked uploads.
+
+A dropped connection late in a single-shot upload of a large filing means
+sending it all again. An upload session instead receives the file as byte
+ranges, each with its own SHA-256, appended to a file on disk as they
+stream in. After a failure the client asks for the received offset and
+carries on from there. Finalizing checks the whole file and runs the
+extraction (see views.finalize_upload_session).
+
+A session is two files in settings.EXTRACTION_UPLOAD_SESSION_DIR: <id>.json
+with the declared size, filename and extraction options, and <id>.part
+with the bytes received so far. Any worker process can serve any request,
+and a chunk is appended under an exclusive lock on the .part file.
+Sessions idle for longer than EXTRACTION_UPLOAD_SESSION_TTL are swept
+away, at most every EXTRACTION_UPLOAD_SWEEP_INTERVAL seconds when a session
+is created (and by `manage.py sweep_uploads`).
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from . import metrics
+from .uploads import PDF_HEADER, PDF_HEADER_WINDOW, SPOOL_CHUNK_SIZE, UploadTooLarge
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ID = re.compile(r'[0-9a-f]{32}')
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+class UnknownSession(Exception):
+    """No such upload session, or it has expired"""
+
+
+class OffsetMismatch(Exception):
+    """A chunk does not start where the received bytes end"""
+
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+
+class ChecksumMismatch(Exception):
+    """A chunk or the finished file does not match its SHA-256"""
+
+
+class IncompleteUpload(Exception):
+    """The session has not received every byte yet"""
+
+    def __init__(self, offset, size):
+        super().__init__(f'Received {offset} of {size} bytes')
+        self.offset = offset
+
+
+def session_dir():
+    directory = os.fspath(getattr(settings, 'EXTRACTION_UPLOAD_SESSION_DIR'))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def session_ttl():
+    return getattr(settings, 'EXTRACTION_UPLOAD_SESSION_TTL', 24 * 60 * 60)
+
+
+def create_session(size, filename='', options=None, content_hash=None):
+    """
+    Start a session for a file of size bytes. options are the extraction
+    request fields to use when it is finalized, and content_hash the
+    expected SHA-256 of the whole file, if the client knows it.
+    """
+    sweep_if_due()
+    upload_id = uuid.uuid4().hex
+    session = {
+        'upload_id': upload_id,
+        'size': size,
+        'filename': filename,
+        'options': options or {},
+        'content_hash': content_hash,
+        'created_at': time.time(),
+    }
+    meta_path, part_path = _paths(upload_id)
+    open(part_path, 'xb').close()
+    _write_json(meta_path, session)
+    return {**session, 'offset': 0, 'expires_at': session['created_at'] + session_ttl()}
+
+
+def get_session(upload_id):
+    """The session with its received 'offset' and 'expires_at'. Raises UnknownSession."""
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            session = json.load(f)
+        stat = os.stat(part_path)
+    except (OSError, ValueError):
+        raise UnknownSession()
+    # Every chunk written updates the .part file's mtime
+    if time.time() - stat.st_mtime > session_ttl():
+        delete_session(upload_id)
+        raise UnknownSession()
+    return {**session, 'offset': stat.st_size, 'expires_at': stat.st_mtime + session_ttl()}
+
+
+def append_chunk(upload_id, start, length, chunks, sha256):
+    """
+    Append the byte chunks, which must hold length bytes starting at
+    offset start and hash to sha256 (raw digest bytes). Returns the new
+    offset. Memory use is one chunk; on any failure the file is cut back
+    to where it was, so a retry starts from a clean offset.
+    """
+    session = get_session(upload_id)
+    if start + length > session['size']:
+        raise UploadTooLarge()
+    _, part_path = _paths(upload_id)
+    with open(part_path, 'r+b') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        offset = f.seek(0, os.SEEK_END)
+        if start != offset:
+            raise OffsetMismatch(offset)
+        digest = hashlib.sha256()
+        received = 0
+        try:
+            with metrics.STAGE_DURATION.time(stage='upload'):
+                for chunk in chunks:
+                    received += len(chunk)
+                    if received > length:
+                        raise ChecksumMismatch('Chunk is longer than its Content-Range')
+                    digest.update(chunk)
+                    f.write(chunk)
+            if received != length:
+                raise ChecksumMismatch(f'Received {received} of {length} chunk bytes')
+            if digest.digest() != sha256:
+                raise ChecksumMismatch('Chunk does not match its SHA-256')
+            f.flush()
+        except BaseException:
+            f.truncate(offset)
+            raise
+    return offset + received
+
+
+def complete_session(upload_id):
+    """
+    Check a fully received session: a PDF header, and the declared
+    content_hash if there was one. Returns (session, path, content_hash).
+    Raises IncompleteUpload, or ChecksumMismatch when the file is not the
+    declared one.
+    """
+    session = get_session(upload_id)
+    if session['offset'] != session['size']:
+        raise IncompleteUpload(session['offset'], session['size'])
+    _, part_path = _paths(upload_id)
+    digest = hashlib.sha256()
+    with open(part_path, 'rb') as f:
+        head = f.read(PDF_HEADER_WINDOW)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(SPOOL_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+    if PDF_HEADER not in head:
+        raise ChecksumMismatch('File must be a PDF')
+    if session['content_hash'] and session['content_hash'] != content_hash:
+        raise ChecksumMismatch('File does not match its content_hash')
+    metrics.UPLOAD_BYTES.observe(session['size'])
+    return session, part_path, content_hash
+
+
+def delete_session(upload_id):
+    """Remove a session's files; unknown sessions are ignored"""
+    for path in _paths(upload_id):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def sweep_sessions(max_idle=None):
+    """Remove sessions idle for longer than max_idle seconds (the TTL by default). Returns how many."""
+    max_idle = session_ttl() if max_idle is None else max_idle
+    directory = session_dir()
+    now = time.time()
+    removed = 0
+    upload_ids = {name.split('.')[0] for name in os.listdir(directory) if UPLOAD_ID.fullmatch(name.split('.')[0])}
+    for upload_id in upload_ids:
+        mtimes = []
+        for path in _paths(upload_id):
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except FileNotFoundError:
+                pass
+        if mtimes and now - max(mtimes) > max_idle:
+            delete_session(upload_id)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} abandoned upload sessions")
+    return removed
+
+
+def sweep_if_due():
+    """Sweep at most every EXTRACTION_UPLOAD_SWEEP_INTERVAL seconds per process"""
+    global _last_sweep
+    interval = getattr(settings, 'EXTRACTION_UPLOAD_SWEEP_INTERVAL', 600)
+    with _sweep_lock:
+        now = time.monotonic()
+        if _last_sweep and now - _last_sweep < interval:
+            return
+        _last_sweep = now
+    try:
+        sweep_sessions()
+    except OSError as e:
+        logger.warning(f"Upload session sweep failed: {str(e)}")
+
+
+def _paths(upload_id):
+    if not UPLOAD_ID.fullmatch(upload_id):
+        raise UnknownSession()
+    base = os.path.join(session_dir(), upload_id)
+    return f'{base}.json', f'{base}.part'
+
+
+def _write_json(path, data):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
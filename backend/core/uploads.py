@@ -0,0 +1,95 @@
+"""
+Upload handling helpers.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from . import metrics
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# A PDF's header has to appear within its first 1024 bytes
+PDF_HEADER = b'%PDF-'
+PDF_HEADER_WINDOW = 1024
+
+
+class UploadTooLarge(Exception):
+    """The upload is bigger than the configured limit"""
+
+
+class NotAPdf(Exception):
+    """The upload does not start with a PDF header"""
+
+
+def spool_upload(chunks, max_size=None, require_pdf_header=False):
+    """
+    Write an iterable of byte chunks to a temporary file in
+    settings.EXTRACTION_SPOOL_DIR, computing its SHA-256 in the same pass.
+    
+    Returns (path, content_hash, size). Memory use is one chunk regardless
+    of the upload size. Raises UploadTooLarge once more than max_size bytes
+    have arrived, or NotAPdf when require_pdf_header is set and the first
+    bytes have no PDF header; the partial file is removed either way.
+    """
+    spool_dir = getattr(settings, 'EXTRACTION_SPOOL_DIR', None)
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix='.pdf', dir=spool_dir)
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    try:
+        with metrics.STAGE_DURATION.time(stage='upload'), os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if require_pdf_header and len(head) < PDF_HEADER_WINDOW:
+                    head += chunk[:PDF_HEADER_WINDOW - len(head)]
+                    if len(head) == PDF_HEADER_WINDOW and PDF_HEADER not in head:
+                        raise NotAPdf()
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                f.write(chunk)
+        if require_pdf_header and PDF_HEADER not in head:
+            raise NotAPdf()
+    except BaseException:
+        os.unlink(path)
+        raise
+    metrics.UPLOAD_BYTES.observe(size)
+    return path, digest.hexdigest(), size
+
+
+def iter_stream(stream, chunk_size=SPOOL_CHUNK_SIZE):
+    """Read a file-like object in chunks"""
+    return iter(lambda: stream.read(chunk_size), b'')
+
+
+@contextmanager
+def local_pdf_path(pdf_file):
+    """
+    Yield a filesystem path for an uploaded PDF, for consumers that open the
+    document themselves (e.g. worker processes). In-memory uploads are copied
+    to a temporary file that is removed afterwards.
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        yield os.fspath(pdf_file)
+        return
+
+    if hasattr(pdf_file, 'temporary_file_path'):
+        yield pdf_file.temporary_file_path()
+        return
+
+    pdf_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        shutil.copyfileobj(pdf_file, f)
+        path = f.name
+    pdf_file.seek(0)
+    try:
+        yield path
+    finally:
+        os.unlink(path)
@@ -3,4 +3,16 @@ from . import views
 
 urlpatterns = [
     path('extract/', views.extract_financial_data, name='extract_financial_data'),
+    path('extract/precheck/', views.precheck_extraction, name='precheck_extraction'),
+    path('extract/async/', views.extract_financial_data_async, name='extract_financial_data_async'),
+    path('extract/raw/', views.extract_financial_data_raw, name='extract_financial_data_raw'),
+    path('extract/uploads/', views.create_upload_session, name='create_upload_session'),
+    path('extract/uploads/<str:upload_id>/', views.upload_session, name='upload_session'),
+    path('extract/uploads/<str:upload_id>/finalize/', views.finalize_upload_session, name='finalize_upload_session'),
+    path('extract/batch/', views.extract_financial_data_batch, name='extract_financial_data_batch'),
+    path('extract/jobs/', views.submit_extraction_job, name='submit_extraction_job'),
+    path('extract/jobs/<str:job_id>/', views.extraction_job, name='extraction_job'),
+    path('extractions/', views.list_extractions, name='list_extractions'),
+    path('profiles/', views.list_profiles, name='list_profiles'),
+    path('profiles/<str:profile_id>/', views.profile_detail, name='profile_detail'),
 ]
@@ -1,91 +1,1473 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 import pdfplumber
 import re
-from datetime import datetime
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import lru_cache
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .cache import (
+    cache_result,
+    code_fingerprint,
+    extraction_cache_key,
+    get_cached_result,
+    hash_uploaded_file,
+)
+from . import admission, artifacts, history, isolation, metrics, profiling, upload_sessions
+from .admission import Overloaded
+from .cancellation import ExtractionCancelled, raise_if_cancelled
+from .disconnect import disconnect_event
+from .engines import ENGINE_CHOICES, PDFPLUMBER, engine_sequence, get_engine
+from .isolation import ExtractionAborted
+from .jobs import FAILED, SUCCEEDED, cancel_job, get_job, submit_job
+from .locator import locate_statement_pages, parse_page_range
+from .models import Extraction
+from .parallel import count_pages, get_page_pool
+from .resources import parse_gc
+from . import scanner, statement
+from .scanner import FieldScanner
+from .statement import FIELD_LABELS, StatementIndex, build_page_statement, build_text_statements, period_values
+from .upload_sessions import ChecksumMismatch, IncompleteUpload, OffsetMismatch, UnknownSession
+from .uploads import NotAPdf, UploadTooLarge, iter_stream, local_pdf_path, spool_upload
+
 logger = logging.getLogger(__name__)
 
+@metrics.track_requests('extract_financial_data')
+@profiling.profile_requests
 @api_view(['POST'])
 def extract_financial_data(request):
     """
     Extract Revenue, Cost of Sales, and Operating Income from uploaded PDF
     """
     try:
-        # Check if PDF file is provided
-        if 'pdf_file' not in request.FILES:
-            return Response(
-                {'error': 'No PDF file provided'}, 
+        params, error_response = parse_extraction_request(request)
+        if error_response:
+            return error_response
+        
+        response_data = run_requested_extraction(params)
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+        
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ExtractionAborted as e:
+        return aborted_response(e)
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}")
+        return Response(
+            {'error': f'Error processing PDF: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@metrics.track_requests('precheck_extraction')
+@api_view(['POST'])
+def precheck_extraction(request):
+    """
+    Look up the result for a PDF by its SHA-256 before uploading it
+    
+    Send content_hash (hex SHA-256 of the file), plus any of the extraction
+    options (period_end_date, pages, fields, mode, engine) and filename. A
+    known document gets {'known': true, ...} with the same payload as
+    /api/extract/; otherwise {'known': false, 'upload_url': ...} says to
+    upload it there.
+    """
+    content_hash = str(request.data.get('content_hash', '')).strip().lower()
+    if not SHA256_HEX.fullmatch(content_hash):
+        return Response(
+            {'error': 'content_hash must be the hex SHA-256 of the PDF'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    params, error = parse_extraction_options(request.data)
+    if error:
+        return Response(
+            {'error': error}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        known = find_known_result(
+            content_hash, params['page_numbers'], params['fields'], params['mode'], params['engine'],
+            params['period_end_date']
+        )
+    except Exception as e:
+        # The client can always fall back to uploading
+        logger.error(f"Error looking up {content_hash}: {str(e)}")
+        known = None
+    
+    if known is None:
+        metrics.PRECHECKS.inc(result='unknown')
+        return Response(
+            {'known': False, 'upload_url': request.build_absolute_uri(reverse('extract_financial_data'))}, 
+            status=status.HTTP_200_OK
+        )
+    
+    metrics.PRECHECKS.inc(result='known')
+    history.record_extraction(
+        content_hash, known['results'], filename=str(request.data.get('filename', '')),
+        period_end_date=params['period_end_date'], mode=params['mode'], engine=params['engine'],
+        fields=params['fields'], pages=params['page_numbers'], cache_status='hit'
+    )
+    response_data = {
+        'known': True,
+        'period_end_date': params['period_end_date'] or '2024-12-31',  # Default if not provided
+        **known,
+        'cache': 'hit',
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+# A lowercase hex SHA-256 digest, as returned by hash_uploaded_file
+SHA256_HEX = re.compile(r'[0-9a-f]{64}')
+
+@metrics.track_requests('extract_financial_data_async')
+async def extract_financial_data_async(request):
+    """
+    Async variant of extract_financial_data for ASGI deployments
+    
+    The request body is received on the event loop, so slow uploads do not
+    hold a thread, and the extraction runs on a bounded thread pool
+    (settings.EXTRACTION_ASYNC_WORKERS). If the client disconnects before
+    the result is ready, the extraction is cancelled at its next page.
+    """
+    if request.method != 'POST':
+        return JsonResponse(
+            {'detail': f'Method "{request.method}" not allowed.'}, 
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+    
+    try:
+        # Multipart parsing reads the spooled body: keep it off the event loop
+        params, error = await sync_to_async(parse_async_request, thread_sensitive=False)(request)
+        if error:
+            return JsonResponse(
+                {'error': error}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        pdf_file = request.FILES['pdf_file']
-        period_end_date = request.data.get('period_end_date', '')
+        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        extraction = loop.run_in_executor(
+            get_async_executor(), run_requested_extraction, params, cancel_event
+        )
         
-        # Validate file type
-        if not pdf_file.name.lower().endswith('.pdf'):
-            return Response(
-                {'error': 'File must be a PDF'}, 
-                status=status.HTTP_400_BAD_REQUEST
+        disconnected = disconnect_event(request)
+        if disconnected is not None:
+            disconnect_wait = asyncio.ensure_future(disconnected.wait())
+            await asyncio.wait({extraction, disconnect_wait}, return_when=asyncio.FIRST_COMPLETED)
+            disconnect_wait.cancel()
+            if not extraction.done():
+                cancel_event.set()
+                extraction.cancel()
+                logger.info("Client disconnected, cancelling extraction")
+                return HttpResponse(status=CLIENT_CLOSED_REQUEST)
+        
+        response_data = await extraction
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
+        
+    except Overloaded as e:
+        response = JsonResponse({'error': str(e), 'retry_after': e.retry_after}, status=e.status_code)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except ExtractionAborted as e:
+        return JsonResponse(
+            {'error': str(e), 'reason': e.reason}, 
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}")
+        return JsonResponse(
+            {'error': f'Error processing PDF: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+# An API endpoint like the DRF views, which are CSRF exempt (Django 4.2's
+# csrf_exempt decorator only wraps sync views)
+extract_financial_data_async.csrf_exempt = True
+
+def parse_async_request(request):
+    """Validate an extraction request outside DRF (see parse_extraction_params)"""
+    return parse_extraction_params(request.FILES, request.POST)
+
+def get_async_executor():
+    """The thread pool that runs extractions for extract_financial_data_async"""
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXTRACTION_ASYNC_WORKERS', 4),
+                thread_name_prefix='extraction-async',
             )
+        return _async_executor
+
+# Response status for a request whose client went away (nginx's convention)
+CLIENT_CLOSED_REQUEST = 499
+
+_async_executor = None
+_async_executor_lock = threading.Lock()
+
+@metrics.track_requests('submit_extraction_job')
+@api_view(['POST'])
+def submit_extraction_job(request):
+    """
+    Queue an extraction in the background and return its job id immediately
+    """
+    try:
+        params, error_response = parse_extraction_request(request)
+        if error_response:
+            return error_response
         
-        # Extract text from PDF
-        text = extract_text_from_pdf(pdf_file)
+        job = submit_job(
+            run_extraction_job,
+            params['pdf_file'],
+            period_end_date=params['period_end_date'],
+            page_numbers=params['page_numbers'],
+            fields=params['fields'],
+            mode=params['mode'],
+            engine=params['engine'],
+            filename=params['pdf_file'].name,
+            period=params['period_end_date'],
+        )
+        
+        response_data = {
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'status_url': request.build_absolute_uri(
+                reverse('extraction_job', args=[job['job_id']])
+            ),
+        }
         
-        # Extract financial data
-        financial_data = extract_financial_values(text)
+        return Response(response_data, status=status.HTTP_202_ACCEPTED)
         
-        # Validate period_end_date format if provided
-        if period_end_date:
+    except Exception as e:
+        logger.error(f"Error queueing PDF extraction: {str(e)}")
+        return Response(
+            {'error': f'Error processing PDF: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@metrics.track_requests('extraction_job')
+@api_view(['GET', 'DELETE'])
+def extraction_job(request, job_id):
+    """
+    GET: job status, plus results once it has succeeded
+    DELETE: cancel the job
+    """
+    if request.method == 'DELETE':
+        job = cancel_job(job_id)
+    else:
+        job = get_job(job_id)
+    
+    if job is None:
+        return Response(
+            {'error': 'Job not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if request.method == 'DELETE' and job['status'] in (SUCCEEDED, FAILED):
+        return Response(
+            {'error': f'Job already {job["status"]}', **job}, 
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    return Response(job, status=status.HTTP_200_OK)
+
+@metrics.track_requests('list_extractions')
+@api_view(['GET'])
+def list_extractions(request):
+    """
+    Stored extraction results (see core.history), newest first
+    
+    Filters: content_hash, period_from and period_to (YYYY-MM-DD, inclusive),
+    has (comma-separated fields that must have a value), engine and mode.
+    Each page holds up to 'limit' results; 'next' links to the one after.
+    Responses carry an ETag, and a matching If-None-Match gets a 304 before
+    any results are loaded.
+    """
+    query = request.query_params
+    period_from = query.get('period_from', '')
+    period_to = query.get('period_to', '')
+    has = query.get('has', '')
+    engine = query.get('engine', '')
+    mode = query.get('mode', '')
+    
+    for name, value in (('period_from', period_from), ('period_to', period_to)):
+        if value:
             try:
-                datetime.strptime(period_end_date, '%Y-%m-%d')
+                datetime.strptime(value, '%Y-%m-%d')
             except ValueError:
                 return Response(
-                    {'error': 'period_end_date must be in YYYY-MM-DD format'}, 
+                    {'error': f'{name} must be in YYYY-MM-DD format'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
+    
+    has_fields = []
+    if has:
+        try:
+            has_fields = parse_field_list(has, FIELD_LABELS)
+        except ValueError as e:
+            return Response(
+                {'error': f'has must be a comma-separated list of {", ".join(FIELD_LABELS)}: {str(e)}'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    if engine and engine not in ENGINE_CHOICES:
+        return Response(
+            {'error': f'engine must be one of {", ".join(ENGINE_CHOICES)}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if mode and mode not in EXTRACTION_MODES:
+        return Response(
+            {'error': f'mode must be one of {", ".join(EXTRACTION_MODES)}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        limit = int(query.get('limit') or history.DEFAULT_PAGE_SIZE)
+        cursor = int(query.get('cursor') or 0)
+    except ValueError:
+        return Response(
+            {'error': 'limit and cursor must be integers'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 1 <= limit <= history.MAX_PAGE_SIZE:
+        return Response(
+            {'error': f'limit must be between 1 and {history.MAX_PAGE_SIZE}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    queryset = history.query_extractions(
+        query.get('content_hash', ''), period_from, period_to, has_fields, engine, mode
+    )
+    page_keys, next_cursor = history.page_of(queryset, limit, cursor)
+    etag = history.page_etag(
+        page_keys, f'{request.get_full_path()}|{request.accepted_renderer.format}|{next_cursor}'
+    )
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+    
+    rows = Extraction.objects.in_bulk([row_id for row_id, _ in page_keys])
+    next_url = None
+    if next_cursor:
+        next_query = query.copy()
+        next_query['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{next_query.urlencode()}')
+    
+    response_data = {
+        'results': [rows[row_id].to_dict() for row_id, _ in page_keys if row_id in rows],
+        'next': next_url,
+    }
+    response = Response(response_data, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    # Clients may keep a copy but must revalidate it
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@metrics.track_requests('list_profiles')
+@api_view(['GET'])
+def list_profiles(request):
+    """
+    Summaries of the stored request profiles (see core.profiling), newest first
+    
+    Needs EXTRACTION_PROFILE_TOKEN in the X-Extraction-Profile header or the
+    profile query parameter. Returns at most 'limit' summaries (default 100).
+    """
+    if not profiling.is_authorized(request):
+        return profile_forbidden_response()
+    
+    try:
+        limit = int(request.query_params.get('limit') or 100)
+    except ValueError:
+        return Response(
+            {'error': 'limit must be an integer'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response({'profiles': profiling.list_profiles()[:max(limit, 0)]}, status=status.HTTP_200_OK)
+
+@metrics.track_requests('profile_detail')
+@api_view(['GET'])
+def profile_detail(request, profile_id):
+    """
+    One stored request profile, as a text report sorted by 'sort' (default
+    cumulative) and cut to 'limit' functions (default 40), or with
+    output=pstats as the pstats file
+    
+    Needs EXTRACTION_PROFILE_TOKEN like list_profiles.
+    """
+    if not profiling.is_authorized(request):
+        return profile_forbidden_response()
+    
+    query = request.query_params
+    output = query.get('output', 'text')
+    sort = query.get('sort', 'cumulative')
+    if output not in ('text', 'pstats'):
+        return Response(
+            {'error': 'output must be text or pstats'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if sort not in profiling.SORT_KEYS:
+        return Response(
+            {'error': f'sort must be one of {", ".join(profiling.SORT_KEYS)}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = int(query.get('limit') or 40)
+    except ValueError:
+        return Response(
+            {'error': 'limit must be an integer'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    summary = profiling.load_summary(profile_id)
+    if summary is None:
+        return Response(
+            {'error': 'Profile not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if output == 'pstats':
+        with open(profiling.profile_path(profile_id), 'rb') as f:
+            response = HttpResponse(f.read(), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{profile_id}{profiling.PROFILE_SUFFIX}"'
+        return response
+    
+    report = profiling.format_stats(profiling.load_stats([profile_id]), sort, limit)
+    header = ' '.join(f'{key}={value}' for key, value in summary.items())
+    return HttpResponse(f'{header}\n\n{report}', content_type='text/plain; charset=utf-8')
+
+def profile_forbidden_response():
+    """403 response for a profile request without EXTRACTION_PROFILE_TOKEN"""
+    return Response(
+        {'error': f'Profiles need EXTRACTION_PROFILE_TOKEN in the {profiling.PROFILE_HEADER} header '
+                  f'or the {profiling.PROFILE_PARAM} query parameter'}, 
+        status=status.HTTP_403_FORBIDDEN
+    )
+
+@metrics.track_requests('extract_financial_data_batch')
+@api_view(['POST'])
+def extract_financial_data_batch(request):
+    """
+    Extract many PDFs in one request, streaming one JSON line per filing
+    (application/x-ndjson) in completion order
+    
+    Send each PDF as a 'pdf_file' part. 'period_end_date' may be sent once for
+    every file or once per file, in the same order. A filing that fails gets an
+    'error' line; the rest of the batch carries on.
+    """
+    try:
+        pdf_files = request.FILES.getlist('pdf_file')
+        period_end_dates = request.data.getlist('period_end_date') if hasattr(request.data, 'getlist') else []
         
-        response_data = {
-            'period_end_date': period_end_date or '2024-12-31',  # Default if not provided
-            'results': financial_data
-        }
+        if not pdf_files:
+            return Response(
+                {'error': 'No PDF file provided'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_files = getattr(settings, 'EXTRACTION_BATCH_MAX_FILES', 100)
+        if len(pdf_files) > max_files:
+            return Response(
+                {'error': f'A batch may contain at most {max_files} files'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        # Options shared by every file; each file's period is checked with it
+        options = {name: request.data.get(name, '') for name in EXTRACTION_OPTIONS if name != 'period_end_date'}
+        _, error = parse_extraction_options(options)
+        if error:
+            return Response(
+                {'error': error}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(period_end_dates) == 1:
+            period_end_dates = period_end_dates * len(pdf_files)
+        elif not period_end_dates:
+            period_end_dates = [''] * len(pdf_files)
+        elif len(period_end_dates) != len(pdf_files):
+            return Response(
+                {'error': 'Send one period_end_date for the batch or one per pdf_file'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            stream_batch_results(list(zip(pdf_files, period_end_dates)), options),
+            content_type='application/x-ndjson'
+        )
+        # Let each line through reverse proxies as soon as it is written
+        response['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error processing PDF batch: {str(e)}")
+        return Response(
+            {'error': f'Error processing PDF: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@require_GET
+def extraction_metrics(request):
+    """
+    Extraction metrics of this worker process in Prometheus text format
+    """
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def overloaded_response(error):
+    """429/503 response with Retry-After for an extraction admission control turned away"""
+    return Response(
+        {'error': str(error), 'retry_after': error.retry_after}, 
+        status=error.status_code,
+        headers={'Retry-After': str(error.retry_after)}
+    )
+
+def aborted_response(error):
+    """422 response for an extraction process isolation stopped or refused (see core.isolation)"""
+    return Response(
+        {'error': str(error), 'reason': error.reason}, 
+        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+def stream_batch_results(items, options):
+    """
+    Run the (pdf_file, period_end_date) items with the other extraction
+    options (see parse_extraction_options) on a bounded thread pool and
+    yield an NDJSON line for each as it finishes. Items not yet started are
+    dropped if the client goes away.
+    """
+    max_workers = min(getattr(settings, 'EXTRACTION_BATCH_WORKERS', 4), len(items))
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='extraction-batch')
+    try:
+        futures = [
+            executor.submit(run_batch_item, index, pdf_file, period_end_date, options)
+            for index, (pdf_file, period_end_date) in enumerate(items)
+        ]
+        for future in as_completed(futures):
+            yield json.dumps(future.result()) + "\n"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def run_batch_item(index, pdf_file, period_end_date, options):
+    """Extract one filing of a batch, reporting failures in the result line"""
+    item = {
+        'index': index,
+        'filename': pdf_file.name,
+        'period_end_date': period_end_date or '2024-12-31',
+    }
+    try:
+        params, error = parse_extraction_params(
+            {'pdf_file': pdf_file}, {**options, 'period_end_date': period_end_date}
+        )
+        if error:
+            return {**item, 'error': error}
+        return {**item, **run_requested_extraction(params)}
+    except Overloaded as e:
+        return {**item, 'error': str(e), 'retry_after': e.retry_after}
+    except ExtractionAborted as e:
+        return {**item, 'error': str(e), 'reason': e.reason}
+    except Exception as e:
+        logger.error(f"Error processing {pdf_file.name} in batch: {str(e)}")
+        return {**item, 'error': f'Error processing PDF: {str(e)}'}
+
+@metrics.track_requests('extract_financial_data_raw')
+@api_view(['POST'])
+def extract_financial_data_raw(request):
+    """
+    Extract from a PDF sent as the raw request body (Content-Type: application/pdf)
+    
+    The body is streamed to a temporary file and hashed in the same pass, and
+    the parser reads the PDF from disk, so memory stays flat for large
+    filings. The extraction options (period_end_date, pages, fields, mode,
+    engine) go in the query string.
+    """
+    content_type = request.content_type.split(';')[0].strip().lower()
+    if content_type != 'application/pdf':
+        return Response(
+            {'error': 'Content-Type must be application/pdf'}, 
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+    
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length <= 0:
+        return Response(
+            {'error': 'Content-Length is required'}, 
+            status=status.HTTP_411_LENGTH_REQUIRED
+        )
+    
+    max_size = getattr(settings, 'EXTRACTION_RAW_UPLOAD_MAX_SIZE', 250 * 1024 * 1024)
+    if content_length > max_size:
+        return Response(
+            {'error': f'PDF is larger than the {max_size // (1024 * 1024)}MB limit'}, 
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    params, error = parse_extraction_options(request.query_params)
+    if error:
+        return Response(
+            {'error': error}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        path, content_hash, _ = spool_upload(
+            iter_stream(request.stream), max_size=max_size, require_pdf_header=True
+        )
+    except NotAPdf:
+        return Response(
+            {'error': 'File must be a PDF'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except UploadTooLarge:
+        return Response(
+            {'error': f'PDF is larger than the {max_size // (1024 * 1024)}MB limit'}, 
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    try:
+        params = {**params, 'pdf_file': path, 'filename': request.query_params.get('filename', '')}
+        response_data = run_requested_extraction(params, content_hash=content_hash)
         return Response(response_data, status=status.HTTP_200_OK)
         
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ExtractionAborted as e:
+        return aborted_response(e)
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}")
         return Response(
             {'error': f'Error processing PDF: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    finally:
+        os.unlink(path)
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file"""
-    text = ""
+@metrics.track_requests('create_upload_session')
+@api_view(['POST'])
+def create_upload_session(request):
+    """
+    Start a resumable chunked upload (see core.upload_sessions)
+    
+    Send size (bytes) and filename, optionally content_hash (hex SHA-256 of
+    the whole file), plus the extraction options. Then PUT the file to
+    upload_url in chunks and POST to finalize_url to extract it.
+    """
     try:
-        with pdfplumber.open(pdf_file) as pdf:
+        size = int(request.data.get('size', ''))
+    except (TypeError, ValueError):
+        size = 0
+    if size <= 0:
+        return Response(
+            {'error': 'size must be the file size in bytes'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_size = getattr(settings, 'EXTRACTION_CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+    if size > max_size:
+        return Response(
+            {'error': f'PDF is larger than the {max_size // (1024 * 1024)}MB limit'}, 
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    filename = str(request.data.get('filename', ''))
+    if filename and not filename.lower().endswith('.pdf'):
+        return Response(
+            {'error': 'File must be a PDF'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    content_hash = str(request.data.get('content_hash', '')).strip().lower() or None
+    if content_hash and not SHA256_HEX.fullmatch(content_hash):
+        return Response(
+            {'error': 'content_hash must be the hex SHA-256 of the PDF'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    _, error = parse_extraction_options(request.data)
+    if error:
+        return Response(
+            {'error': error}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    options = {name: str(request.data.get(name, '')) for name in EXTRACTION_OPTIONS}
+    session = upload_sessions.create_session(size, filename, options, content_hash)
+    response_data = upload_session_data(request, session)
+    return Response(
+        response_data, 
+        status=status.HTTP_201_CREATED,
+        headers={'Location': response_data['upload_url']}
+    )
+
+@metrics.track_requests('upload_session')
+@api_view(['GET', 'PUT', 'DELETE'])
+def upload_session(request, upload_id):
+    """
+    GET: the session and how many bytes it has received ('offset', also in
+    the Upload-Offset header)
+    PUT: append the next chunk, sent with
+        Content-Range: bytes <start>-<end>/<size>
+        Content-Digest: sha-256=:<base64 SHA-256 of the chunk>:
+    DELETE: abandon the upload
+    """
+    try:
+        if request.method == 'PUT':
+            return append_upload_chunk(request, upload_id)
+        
+        session = upload_sessions.get_session(upload_id)
+        if request.method == 'DELETE':
+            upload_sessions.delete_session(upload_id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        return Response(
+            upload_session_data(request, session), 
+            status=status.HTTP_200_OK,
+            headers={'Upload-Offset': str(session['offset'])}
+        )
+        
+    except UnknownSession:
+        return Response(
+            {'error': 'Upload session not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+@metrics.track_requests('finalize_upload_session')
+@api_view(['POST'])
+def finalize_upload_session(request, upload_id):
+    """
+    Check a fully received upload and extract it with the options the
+    session was created with. Returns the same payload as /api/extract/.
+    The session is removed once the extraction succeeds or is stopped by
+    process isolation, and kept for a retry when it was turned away by
+    admission control.
+    """
+    try:
+        session, path, content_hash = upload_sessions.complete_session(upload_id)
+    except UnknownSession:
+        return Response(
+            {'error': 'Upload session not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except IncompleteUpload as e:
+        return Response(
+            {'error': str(e), 'offset': e.offset}, 
+            status=status.HTTP_409_CONFLICT,
+            headers={'Upload-Offset': str(e.offset)}
+        )
+    except ChecksumMismatch as e:
+        upload_sessions.delete_session(upload_id)
+        return Response(
+            {'error': str(e)}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        params, error = parse_extraction_options(session['options'])
+        if error:
+            raise ValueError(error)
+        params.update(pdf_file=path, filename=session['filename'])
+        
+        response_data = run_requested_extraction(params, content_hash=content_hash)
+        
+        upload_sessions.delete_session(upload_id)
+        return Response(response_data, status=status.HTTP_200_OK)
+        
+    except Overloaded as e:
+        return overloaded_response(e)
+    except ExtractionAborted as e:
+        # The document is quarantined, a retry would fail the same way
+        upload_sessions.delete_session(upload_id)
+        return aborted_response(e)
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}")
+        return Response(
+            {'error': f'Error processing PDF: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+def append_upload_chunk(request, upload_id):
+    """PUT handler of upload_session: validate the chunk headers and append its body"""
+    session = upload_sessions.get_session(upload_id)
+    
+    content_range = CONTENT_RANGE.fullmatch(request.META.get('HTTP_CONTENT_RANGE', '').strip())
+    if not content_range:
+        return Response(
+            {'error': 'Content-Range must look like "bytes 0-8388607/62914560"'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    start, end, total = (int(value) for value in content_range.groups())
+    if end < start or total != session['size']:
+        return Response(
+            {'error': f'Content-Range must lie within the {session["size"]} byte upload'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    length = end - start + 1
+    max_chunk = getattr(settings, 'EXTRACTION_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024)
+    if length > max_chunk:
+        return Response(
+            {'error': f'Chunks may be at most {max_chunk // (1024 * 1024)}MB'}, 
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length != length:
+        return Response(
+            {'error': 'Content-Length must match Content-Range'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    sha256 = parse_content_digest(request.META.get('HTTP_CONTENT_DIGEST', ''))
+    if sha256 is None:
+        return Response(
+            {'error': 'Content-Digest must carry the chunk\'s SHA-256 ("sha-256=:<base64>:")'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        offset = upload_sessions.append_chunk(upload_id, start, length, iter_stream(request.stream), sha256)
+    except OffsetMismatch as e:
+        return Response(
+            {'error': str(e), 'offset': e.offset}, 
+            status=status.HTTP_409_CONFLICT,
+            headers={'Upload-Offset': str(e.offset)}
+        )
+    except ChecksumMismatch as e:
+        return Response(
+            {'error': str(e), 'offset': start}, 
+            status=status.HTTP_400_BAD_REQUEST,
+            headers={'Upload-Offset': str(start)}
+        )
+    except UploadTooLarge:
+        return Response(
+            {'error': 'Chunk runs past the end of the upload'}, 
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    response_data = {
+        'upload_id': upload_id,
+        'offset': offset,
+        'size': session['size'],
+        'complete': offset == session['size'],
+    }
+    return Response(response_data, status=status.HTTP_200_OK, headers={'Upload-Offset': str(offset)})
+
+def upload_session_data(request, session):
+    """Response data describing an upload session"""
+    return {
+        'upload_id': session['upload_id'],
+        'filename': session['filename'],
+        'size': session['size'],
+        'offset': session['offset'],
+        'chunk_size': getattr(settings, 'EXTRACTION_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+        'expires_at': datetime.fromtimestamp(session['expires_at'], timezone.utc).isoformat(),
+        'upload_url': request.build_absolute_uri(reverse('upload_session', args=[session['upload_id']])),
+        'finalize_url': request.build_absolute_uri(
+            reverse('finalize_upload_session', args=[session['upload_id']])
+        ),
+    }
+
+def parse_content_digest(value):
+    """The raw SHA-256 digest in a Content-Digest header (RFC 9530), or None"""
+    match = SHA256_DIGEST.search(value)
+    if not match:
+        return None
+    try:
+        digest = base64.b64decode(match.group(1), validate=True)
+    except ValueError:
+        return None
+    return digest if len(digest) == 32 else None
+
+CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+SHA256_DIGEST = re.compile(r'(?:^|,)\s*sha-256=:([A-Za-z0-9+/]+=*):', re.IGNORECASE)
+
+def run_requested_extraction(params, cancel_event=None, content_hash=None):
+    """
+    Run a validated extraction request (see parse_extraction_params) and
+    return the response data. pdf_file may also be a path, with the
+    upload's name in params['filename'].
+    """
+    response_data = {
+        'period_end_date': params['period_end_date'] or '2024-12-31',  # Default if not provided
+    }
+    start = time.perf_counter()
+    if content_hash is None:
+        content_hash = hash_uploaded_file(params['pdf_file'])
+    
+    # Extract financial data (or reuse a cached result for the same content)
+    run = run_statement_extraction if params['mode'] == 'table' else run_extraction
+    extraction, cache_status = run(
+        params['pdf_file'], params['page_numbers'], cancel_event, content_hash=content_hash,
+        fields=params['fields'], engine=params['engine'], period_end_date=params['period_end_date']
+    )
+    response_data.update(extraction)
+    response_data['cache'] = cache_status
+    
+    history.record_extraction(
+        content_hash, response_data['results'],
+        filename=params.get('filename') or getattr(params['pdf_file'], 'name', ''),
+        period_end_date=params['period_end_date'], mode=params['mode'], engine=params['engine'],
+        fields=params['fields'], pages=params['page_numbers'], cache_status=cache_status,
+        seconds=time.perf_counter() - start
+    )
+    return response_data
+
+def parse_extraction_request(request):
+    """
+    Validate the fields shared by the extraction endpoints.
+    
+    Returns (params, None) on success and (None, error_response) otherwise.
+    """
+    params, error = parse_extraction_params(request.FILES, request.data)
+    if error:
+        return None, Response(
+            {'error': error}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return params, None
+
+def parse_extraction_params(files, data):
+    """
+    Validate uploaded files and form data for an extraction.
+    
+    Returns (params, None) on success and (None, error message) otherwise.
+    """
+    # Check if PDF file is provided
+    if 'pdf_file' not in files:
+        return None, 'No PDF file provided'
+    
+    pdf_file = files['pdf_file']
+    
+    # Validate file type
+    if not pdf_file.name.lower().endswith('.pdf'):
+        return None, 'File must be a PDF'
+    
+    params, error = parse_extraction_options(data)
+    if error:
+        return None, error
+    return {'pdf_file': pdf_file, **params}, None
+
+# Request fields read by parse_extraction_options
+EXTRACTION_OPTIONS = ('period_end_date', 'pages', 'fields', 'mode', 'engine')
+
+def parse_extraction_options(data):
+    """
+    Validate the extraction options in form or JSON data: period_end_date,
+    pages, fields, mode and engine.
+    
+    Returns (params, None) on success and (None, error message) otherwise.
+    """
+    period_end_date = data.get('period_end_date', '')
+    pages = data.get('pages', '')
+    fields = data.get('fields', '')
+    mode = data.get('mode', '') or 'values'
+    engine = data.get('engine', '') or None
+    
+    # Restrict extraction to the requested pages, if any
+    page_numbers = None
+    if pages:
+        try:
+            page_numbers = parse_page_range(pages)
+        except ValueError as e:
+            return None, f'pages must look like "45-47,50": {str(e)}'
+    
+    if mode not in EXTRACTION_MODES:
+        return None, f'mode must be one of {", ".join(EXTRACTION_MODES)}'
+    
+    # Only extract the requested fields, if any
+    field_names = None
+    if fields:
+        try:
+            field_names = parse_field_list(fields, known_fields(mode))
+        except ValueError as e:
+            return None, f'fields must be a comma-separated list of {", ".join(known_fields(mode))}: {str(e)}'
+    
+    if engine and engine not in ENGINE_CHOICES:
+        return None, f'engine must be one of {", ".join(ENGINE_CHOICES)}'
+    
+    # Validate period_end_date format if provided
+    if period_end_date:
+        try:
+            datetime.strptime(period_end_date, '%Y-%m-%d')
+        except ValueError:
+            return None, 'period_end_date must be in YYYY-MM-DD format'
+    
+    params = {
+        'period_end_date': period_end_date,
+        'page_numbers': page_numbers,
+        'fields': field_names,
+        'mode': mode,
+        'engine': engine,
+    }
+    return params, None
+
+def run_extraction(pdf_file, page_numbers=None, cancel_event=None, content_hash=None, fields=None,
+                   engine=None, period_end_date=''):
+    """
+    Run the extraction pipeline for one document.
+    
+    Returns (extraction, cache_status) where cache_status is 'hit' when the
+    result came from the extraction cache and 'miss' when the PDF was parsed.
+    extraction holds the 'results', the values of every period column of
+    the statement in 'periods', and the 'period_column' that period_end_date
+    picked (see select_period). Only the given fields are extracted (all by
+    default), and parsing stops once they are resolved. engine is one of core.engines.ENGINE_CHOICES
+    (settings.EXTRACTION_ENGINE by default). Setting cancel_event stops the
+    extraction with ExtractionCancelled. Pass content_hash when the caller
+    already hashed the bytes while receiving them. Quarantined documents
+    raise DocumentQuarantined (see core.isolation).
+    """
+    engine = engine or getattr(settings, 'EXTRACTION_ENGINE', PDFPLUMBER)
+    if content_hash is None:
+        content_hash = hash_uploaded_file(pdf_file)
+    cache_key = result_cache_key(content_hash, page_numbers, fields, engine)
+    extraction, tier = get_cached_result(cache_key)
+    if extraction is not None:
+        logger.info(f"Extraction cache hit ({tier}) for {content_hash}")
+        return select_period(extraction, period_end_date), 'hit'
+    
+    isolation.raise_if_quarantined(content_hash)
+    with admission.admit(requested_cost(pdf_file, page_numbers), cancel_event):
+        extraction = run_parse_step(
+            parse_financial_values, pdf_file, content_hash, cancel_event,
+            page_numbers=page_numbers, fields=fields, engine=engine, content_hash=content_hash
+        )
+    
+    metrics.record_field_results(extraction['results'])
+    cache_result(cache_key, extraction)
+    return select_period(extraction, period_end_date), 'miss'
+
+def parse_financial_values(pdf_file, page_numbers=None, fields=None, engine=PDFPLUMBER, cancel_event=None,
+                           content_hash=None):
+    """
+    The parsing step of run_extraction: locate the statement pages and
+    extract the fields. Returns {'results': ..., 'periods': ...}.
+    """
+    located = False
+    if page_numbers is None and getattr(settings, 'EXTRACTION_LOCATE_STATEMENT_PAGES', True):
+        page_numbers = locate_statement_pages(pdf_file)
+        located = page_numbers is not None
+    
+    stop_after_fields = None
+    if getattr(settings, 'EXTRACTION_STOP_WHEN_RESOLVED', True):
+        stop_after_fields = fields or list(FIELD_PATTERNS)
+    
+    # Extract text from PDF
+    extraction = extract_with_engines(
+        pdf_file, engine, page_numbers, fields, cancel_event, stop_after_fields, content_hash
+    )
+    
+    # Located pages missed everything, retry over the whole document
+    if located and not any(extraction['results'].values()):
+        logger.info("No values on candidate pages, falling back to full document")
+        extraction = extract_with_engines(
+            pdf_file, engine, None, fields, cancel_event, stop_after_fields, content_hash
+        )
+    return extraction
+
+def run_parse_step(func, pdf_file, document_hash, cancel_event=None, **kwargs):
+    """
+    Call func(pdf_file, cancel_event=cancel_event, **kwargs), a parsing step
+    of an extraction, in this process, or in a child process with
+    settings.EXTRACTION_ISOLATION on. A child that breaks its deadline or
+    memory limit raises ExtractionAborted and quarantines document_hash.
+    """
+    if not isolation.isolation_enabled():
+        return func(pdf_file, cancel_event=cancel_event, **kwargs)
+    with local_pdf_path(pdf_file) as path:
+        return isolation.run_isolated(
+            f'{func.__module__}.{func.__name__}', (path,), kwargs, cancel_event, document_hash
+        )
+
+def select_period(extraction, period_end_date=''):
+    """
+    The extraction for a period. When the year of period_end_date heads one
+    of the statement's period columns, 'results' are that column's values
+    and 'period_column' names it. A field with no value in that column (on a
+    row the table parser skips, such as one ending in a footnote marker) is
+    "" in 'results', and the first value found for it, which may belong to
+    another period, is listed in 'fallback_fields' instead. Otherwise
+    'results' are the first value found for each field and 'period_column'
+    is None.
+    """
+    periods = extraction.get('periods') or {}
+    column = period_end_date[:4] if period_end_date else None
+    if column not in periods:
+        return {**extraction, 'period_column': None}
+    results = {field: periods[column].get(field, '') for field in extraction['results']}
+    fallback_fields = {
+        field: value for field, value in extraction['results'].items() if value and not results[field]
+    }
+    return {**extraction, 'results': results, 'period_column': column, 'fallback_fields': fallback_fields}
+
+def result_cache_key(content_hash, page_numbers=None, fields=None, engine=PDFPLUMBER, mode='values'):
+    """Extraction cache key of a document's result for the given request options"""
+    options = {'pages': page_numbers or 'auto', 'fields': fields or 'all', 'engine': engine}
+    if mode == 'table':
+        options['mode'] = 'table'
+    return extraction_cache_key(content_hash, EXTRACTOR_VERSION, **options)
+
+def find_known_result(content_hash, page_numbers=None, fields=None, mode='values', engine=None,
+                      period_end_date=''):
+    """
+    A stored result for the content hash, request options and period, from
+    the extraction cache or the extraction history, without the PDF. Returns
+    the response data ({'results': ...}, plus 'periods' and 'statement' when
+    it came from the cache) or None.
+    """
+    engine = engine or getattr(settings, 'EXTRACTION_ENGINE', PDFPLUMBER)
+    cache_key = result_cache_key(content_hash, page_numbers, fields, engine, mode)
+    result, tier = get_cached_result(cache_key)
+    if result is not None:
+        logger.info(f"Precheck found {content_hash} in the extraction cache ({tier})")
+        return select_period(result, period_end_date)
+    
+    # The history has no statement layout, so only values can come from it.
+    # Its rows hold one period's values, so they cannot fill the cache.
+    if mode == 'table' or not history.history_enabled():
+        return None
+    financial_data = history.find_result(content_hash, mode, engine, fields, page_numbers, period_end_date)
+    if financial_data is None:
+        return None
+    logger.info(f"Precheck found {content_hash} in the extraction history")
+    return {'results': financial_data}
+
+def extract_with_engines(pdf_file, engine, page_numbers=None, fields=None, cancel_event=None,
+                         stop_after_fields=None, content_hash=None):
+    """
+    Extract the fields with each engine of the engine choice in turn (see
+    core.engines), keeping the first result that matched any field.
+    Returns {'results': {field: value}, 'periods': {year: {field: value}}},
+    the periods read from the year columns of the same text.
+    """
+    engines = engine_sequence(engine)
+    for name in engines:
+        text = extract_text_from_pdf(
+            pdf_file, pages=page_numbers, cancel_event=cancel_event,
+            stop_after_fields=stop_after_fields, engine=name, content_hash=content_hash
+        )
+        financial_data = extract_financial_values(text, fields)
+        if any(financial_data.values()):
+            break
+        if name != engines[-1]:
+            logger.info(f"No values in {name} text, trying the next engine")
+    tables = build_text_statements(text, clean_financial_value)
+    return {'results': financial_data, 'periods': period_values(tables, fields or list(FIELD_PATTERNS))}
+
+def run_extraction_job(path, page_numbers=None, fields=None, mode='values', engine=None,
+                       cancel_event=None, content_hash=None, filename='', period=''):
+    """
+    Background job task: extract the spooled PDF at path, queueing for
+    admission for as long as it takes. filename and period (the upload's
+    name and period_end_date) are stored with the result in the history.
+    """
+    if content_hash is None:
+        content_hash = hash_uploaded_file(path)
+    start = time.perf_counter()
+    with admission.background():
+        run = run_statement_extraction if mode == 'table' else run_extraction
+        extraction, cache_status = run(path, page_numbers, cancel_event, content_hash, fields, engine, period)
+        job_result = {**extraction, 'cache': cache_status}
+    history.record_extraction(
+        content_hash, job_result['results'], filename=filename, period_end_date=period, mode=mode,
+        engine=engine, fields=fields, pages=page_numbers, cache_status=cache_status,
+        seconds=time.perf_counter() - start
+    )
+    return job_result
+
+def run_statement_extraction(pdf_file, page_numbers=None, cancel_event=None, content_hash=None, fields=None,
+                             engine=None, period_end_date=''):
+    """
+    Table mode: lay out the statement pages (the given pages, or the located
+    ones) into a row index and read the fields from it.
+    
+    Returns ({'results': ..., 'periods': ..., 'period_column': ...,
+    'statement': ...}, cache_status), with the period picked as in
+    run_extraction. Fields the index has no row for are matched with the
+    regex patterns over the same pages' text. The layout always comes from pdfplumber's word positions;
+    engine only applies when no statement pages are found and the fields
+    are extracted from text instead. Table mode also reads the rows only
+    FIELD_LABELS knows (net income and EPS); with no statement pages those
+    are "".
+    """
+    engine = engine or getattr(settings, 'EXTRACTION_ENGINE', PDFPLUMBER)
+    table_fields = fields or list(FIELD_LABELS)
+    pattern_fields = [field for field in table_fields if field in FIELD_PATTERNS]
+    if content_hash is None:
+        content_hash = hash_uploaded_file(pdf_file)
+    cache_key = result_cache_key(content_hash, page_numbers, fields, engine, mode='table')
+    statement_data, tier = get_cached_result(cache_key)
+    if statement_data is not None:
+        logger.info(f"Extraction cache hit ({tier}) for {content_hash}")
+        return select_period(statement_data, period_end_date), 'hit'
+    
+    isolation.raise_if_quarantined(content_hash)
+    with admission.admit(requested_cost(pdf_file, page_numbers), cancel_event):
+        pages = run_parse_step(
+            parse_statement_pages, pdf_file, content_hash, cancel_event, page_numbers=page_numbers
+        )
+    if pages is None:
+        logger.info("No statement pages found for table mode, using text extraction")
+        extraction, _ = run_extraction(pdf_file, None, cancel_event, content_hash, pattern_fields, engine)
+        statement_data = {
+            'results': {field: extraction['results'].get(field, '') for field in table_fields},
+            'periods': extraction['periods'],
+            'statement': {'pages': []},
+        }
+        cache_result(cache_key, statement_data)
+        return select_period(statement_data, period_end_date), 'miss'
+    
+    index = StatementIndex(pages)
+    financial_data = {field: index.lookup(field) for field in table_fields}
+    
+    # Only the FIELD_PATTERNS fields have regex patterns to fall back to
+    missing = [field for field in pattern_fields if not financial_data[field]]
+    if missing:
+        text = "\n".join(line for page in pages for line in page['lines'])
+        financial_data.update(extract_financial_values(text, missing))
+    
+    metrics.record_field_results(financial_data)
+    statement_data = {
+        'results': financial_data,
+        'periods': period_values(pages, table_fields),
+        'statement': index.to_dict(),
+    }
+    cache_result(cache_key, statement_data)
+    return select_period(statement_data, period_end_date), 'miss'
+
+def parse_statement_pages(pdf_file, page_numbers=None, cancel_event=None):
+    """
+    The parsing step of run_statement_extraction: the row layout of the
+    given pages, or of the located statement pages. None when no statement
+    pages are found.
+    """
+    if page_numbers is None:
+        page_numbers = locate_statement_pages(pdf_file)
+        if page_numbers is None:
+            return None
+    return extract_statement_pages(pdf_file, page_numbers, cancel_event=cancel_event)
+
+def extract_statement_pages(pdf_file, pages, cancel_event=None):
+    """Row layout (see core.statement) of each of the given 1-based pages"""
+    statement_pages = []
+    try:
+        if hasattr(pdf_file, 'seek'):
+            pdf_file.seek(0)
+        low_memory = low_memory_mode()
+        with metrics.STAGE_DURATION.time(stage='layout'), low_memory_gc(), \
+                pdfplumber.open(pdf_file, pages=pages) as pdf:
             for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+                raise_if_cancelled(cancel_event)
+                page_statement = build_page_statement(page.extract_words(), clean=clean_financial_value)
+                page_statement['page'] = page.page_number
+                if low_memory:
+                    page.close()
+                statement_pages.append(page_statement)
+    except ExtractionCancelled:
+        raise
     except Exception as e:
-        logger.error(f"Error extracting text from PDF: {str(e)}")
+        logger.error(f"Error extracting statement layout from PDF: {str(e)}")
         raise e
+    metrics.PAGES_PARSED.observe(len(statement_pages))
+    return statement_pages
+
+def extract_text_from_pdf(pdf_file, pages=None, parallel=None, cancel_event=None, stop_after_fields=None,
+                          engine=PDFPLUMBER, content_hash=None):
+    """
+    Extract text from PDF file, optionally limited to the given 1-based page numbers
+    
+    engine names the core.engines text engine to use. With the document's
+    content_hash, pages come from and are added to the text artifact store
+    (see core.artifacts).
+    
+    With stop_after_fields, pages stop being opened once the financial
+    scanner has resolved those fields; the text up to that point gives the
+    same values as the whole document would.
     
-    return text
+    In low-memory mode (settings.EXTRACTION_LOW_MEMORY) each page's layout is
+    released as soon as its text is taken, so memory holds one page's layout
+    plus the text read so far, whatever the page count.
+    """
+    if content_hash and artifacts.artifact_dir():
+        page_texts = iter_page_texts_with_artifacts(
+            pdf_file, content_hash, pages, parallel, cancel_event, engine
+        )
+    else:
+        page_texts = iter_page_texts(pdf_file, pages, parallel, cancel_event, engine)
+    if stop_after_fields is not None:
+        page_texts = until_fields_resolved(page_texts, stop_after_fields)
+    parts = []
+    with metrics.STAGE_DURATION.time(stage='text_extraction'), low_memory_gc():
+        for page_text in page_texts:
+            parts.append(page_text + "\n" if page_text else "")
+    metrics.PAGES_PARSED.observe(len(parts))
+    return "".join(parts)
 
-def extract_financial_values(text):
+def iter_page_texts(pdf_file, pages=None, parallel=None, cancel_event=None, engine=PDFPLUMBER):
     """
-    Extract Revenue, Cost of Sales, and Operating Income from text using regex patterns
+    Yield the text of each page in order, parsing pages only as they are consumed
+    
+    In parallel mode (settings.EXTRACTION_PARALLEL by default) pdfplumber's
+    pages are split across the worker processes of the page pool; the other
+    engines are fast enough to run in process. cancel_event is checked
+    between pages.
     """
-    # Normalize text for better pattern matching
-    text = text.replace('\n', ' ').replace('\r', ' ')
+    if parallel is None:
+        parallel = getattr(settings, 'EXTRACTION_PARALLEL', False)
+    if parallel and engine == PDFPLUMBER:
+        yield from iter_page_texts_parallel(pdf_file, pages, cancel_event)
+        return
+    
+    try:
+        if hasattr(pdf_file, 'seek'):
+            pdf_file.seek(0)
+        yield from get_engine(engine).iter_pages(pdf_file, pages, cancel_event, low_memory_mode())
+    except ExtractionCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        raise e
+
+def iter_page_texts_with_artifacts(pdf_file, content_hash, pages=None, parallel=None, cancel_event=None,
+                                   engine=PDFPLUMBER):
+    """
+    Like iter_page_texts, but pages already in the document's text artifact
+    are read from it, and the pages parsed here are added to it
+    """
+    engine_key = get_engine(engine).fingerprint()
+    artifact = artifacts.load_artifact(content_hash, engine_key) or {'pages': {}}
+    stored = artifact['pages']
+    page_count = artifact.get('page_count') or document_page_count(pdf_file)
+    if page_count is None:
+        yield from iter_page_texts(pdf_file, pages, parallel, cancel_event, engine)
+        return
     
-    # Define patterns for Revenue and Cost of Sales
-    revenue_patterns = [
+    wanted = [page for page in (pages or range(1, page_count + 1)) if 1 <= page <= page_count]
+    missing = [page for page in wanted if page not in stored]
+    parsed = iter_page_texts(pdf_file, missing, parallel, cancel_event, engine) if missing else None
+    new_pages = {}
+    try:
+        for page in wanted:
+            if page in stored:
+                raise_if_cancelled(cancel_event)
+                yield stored[page]
+            else:
+                new_pages[page] = next(parsed)
+                yield new_pages[page]
+    finally:
+        if parsed is not None:
+            parsed.close()
+        metrics.ARTIFACT_PAGES.inc(len(wanted) - len(missing), result='hit')
+        metrics.ARTIFACT_PAGES.inc(len(new_pages), result='miss')
+        if new_pages:
+            try:
+                artifacts.save_pages(content_hash, engine_key, page_count, new_pages)
+            except OSError as e:
+                logger.warning(f"Text artifact write failed: {str(e)}")
+
+def low_memory_mode():
+    """Whether to release each page's parsed objects once it is extracted (settings.EXTRACTION_LOW_MEMORY)"""
+    return getattr(settings, 'EXTRACTION_LOW_MEMORY', True)
+
+def low_memory_gc():
+    """Context for a page parsing loop: relaxed young-generation GC in low-memory mode"""
+    return parse_gc() if low_memory_mode() else nullcontext()
+
+def requested_cost(pdf_file, page_numbers=None):
+    """Admission cost of extracting from the document (see core.admission): the pages it may parse"""
+    if page_numbers:
+        return len(page_numbers)
+    if hasattr(pdf_file, 'size'):
+        size = pdf_file.size
+    elif isinstance(pdf_file, (str, os.PathLike)):
+        size = os.path.getsize(pdf_file)
+    else:
+        size = None
+    return admission.extraction_cost(document_page_count(pdf_file), size)
+
+def document_page_count(pdf_file):
+    """Number of pages in the document, or None if pdfium cannot open it"""
+    try:
+        if hasattr(pdf_file, 'seek'):
+            pdf_file.seek(0)
+        return count_pages(pdf_file)
+    except Exception as e:
+        logger.warning(f"Could not count PDF pages: {str(e)}")
+        return None
+    finally:
+        if hasattr(pdf_file, 'seek'):
+            pdf_file.seek(0)
+
+def iter_page_texts_parallel(pdf_file, pages=None, cancel_event=None):
+    """Yield page texts extracted by the page pool, in page order"""
+    pool = get_page_pool()
+    try:
+        with local_pdf_path(pdf_file) as path:
+            page_numbers = pages or list(range(1, count_pages(path) + 1))
+            # Not worth the inter-process round trip for a chunk or less
+            if len(page_numbers) <= pool.chunk_size:
+                yield from iter_page_texts(
+                    path, pages=pages, parallel=False, cancel_event=cancel_event
+                )
+                return
+            page_texts = pool.iter_extract(path, page_numbers, low_memory_mode())
+            try:
+                for page_text in page_texts:
+                    raise_if_cancelled(cancel_event)
+                    yield page_text
+            finally:
+                page_texts.close()
+    except ExtractionCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        raise e
+
+def until_fields_resolved(page_texts, fields):
+    """
+    Pass page texts through until the financial scanner reports that the
+    rest of the document cannot change the given fields
+    """
+    scan = FINANCIAL_SCANNER.start(fields)
+    pages_read = 0
+    try:
+        for page_text in page_texts:
+            pages_read += 1
+            yield page_text
+            if page_text:
+                scan.feed(page_text.replace('\n', ' ').replace('\r', ' ') + ' ')
+                if scan.done:
+                    logger.info(f"All requested fields resolved after {pages_read} pages, stopping")
+                    return
+    finally:
+        page_texts.close()
+
+# Patterns per field, in priority order
+FIELD_PATTERNS = {
+    'revenue': [
         # Look for "Total revenues $ XXX,XXX" pattern
         r'total\s+revenues?\s+\$\s*([0-9,]+(?:\([0-9,]+\))?)',
         # Look for "Revenues $ XXX,XXX" pattern
@@ -97,9 +1479,8 @@ def extract_financial_values(text):
         r'total\s+revenue[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
         r'net\s+revenue[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
         r'net\s+sales[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
-    ]
-    
-    cos_patterns = [
+    ],
+    'cos': [
         # Look for "Cost of revenues XXX,XXX" pattern (main cost line, no $ symbol)
         r'^cost\s+of\s+revenues?\s+([0-9,]+(?:\([0-9,]+\))?)',
         # Look for "Cost of revenues XXX,XXX" pattern in table context
@@ -111,56 +1492,86 @@ def extract_financial_values(text):
         r'cost\s+of\s+revenue[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
         r'cost\s+of\s+goods\s+sold[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
         r'cost\s+of\s+services[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
-    ]
-    
-    # Define patterns for Operating Income
-    operating_income_patterns = [
+    ],
+    'operating_income': [
         # Look for "Income from operations XXX,XXX" pattern
         r'income\s+from\s+operations[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
         # Look for "Operating income XXX,XXX" pattern
         r'operating\s+income[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
         # Look for "Operating earnings XXX,XXX" pattern
         r'operating\s+earnings[:\s]*\$?([0-9,]+(?:\([0-9,]+\))?)',
-    ]
-    
-    # Extract Revenue
-    revenue = extract_value_with_patterns(text, revenue_patterns, "revenue")
+    ],
+}
+
+# 'values' matches each field in the page text; 'table' also returns the
+# statement's full row index (see core.statement)
+EXTRACTION_MODES = ('values', 'table')
+
+# Names used in log messages
+FIELD_NAMES = {
+    'revenue': 'revenue',
+    'cos': 'cost of sales',
+    'operating_income': 'operating income',
+}
+
+def parse_field_list(value, known=None):
+    """
+    Parse a "revenue,cos" style field selector into names from known
+    (FIELD_PATTERNS by default), in known's order
+    """
+    known = FIELD_PATTERNS if known is None else known
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested - set(known)
+    if unknown:
+        raise ValueError(f"unknown field {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("no fields given")
+    return [field for field in known if field in requested]
+
+def known_fields(mode='values'):
+    """
+    The fields a mode can extract: the FIELD_PATTERNS fields, plus in table
+    mode the statement rows only FIELD_LABELS knows (net income, EPS)
+    """
+    return FIELD_LABELS if mode == 'table' else FIELD_PATTERNS
+
+def extract_financial_values(text, fields=None):
+    """
+    Extract Revenue, Cost of Sales, and Operating Income (or just the given
+    fields) from text using regex patterns
+    """
+    # Normalize text for better pattern matching
+    text = text.replace('\n', ' ').replace('\r', ' ')
     
-    # Extract Cost of Sales
-    cos = extract_value_with_patterns(text, cos_patterns, "cost of sales")
+    # One pass over the text resolves every field
+    with metrics.STAGE_DURATION.time(stage='matching'):
+        financial_data = FINANCIAL_SCANNER.scan(text, fields)
     
-    # Extract Operating Income
-    operating_income = extract_value_with_patterns(text, operating_income_patterns, "operating income")
+    for field, value in financial_data.items():
+        if value:
+            logger.info(f"Found {FIELD_NAMES[field]}: {value}")
+        else:
+            logger.warning(f"Could not find {FIELD_NAMES[field]} in PDF")
     
-    return {
-        'revenue': revenue,
-        'cos': cos,
-        'operating_income': operating_income
-    }
+    return financial_data
 
 def extract_value_with_patterns(text, patterns, field_name):
     """
     Try multiple patterns to extract a financial value
     """
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            # Handle both single group and multiple group patterns
-            if isinstance(matches[0], tuple):
-                # Multiple groups - take the last one (usually the number)
-                value = matches[0][-1]
-            else:
-                # Single group - take the first match
-                value = matches[0]
-            
-            cleaned_value = clean_financial_value(value)
-            if cleaned_value:
-                logger.info(f"Found {field_name}: {cleaned_value}")
-                return cleaned_value
+    value = _pattern_scanner(tuple(patterns)).scan(text)['value']
+    if value:
+        logger.info(f"Found {field_name}: {value}")
+        return value
     
     logger.warning(f"Could not find {field_name} in PDF")
     return ""
 
+@lru_cache(maxsize=64)
+def _pattern_scanner(patterns):
+    """Compiled single-field scanner for an ad hoc pattern list"""
+    return FieldScanner({'value': patterns}, clean=clean_financial_value)
+
 def clean_financial_value(value):
     """
     Clean and normalize financial values
@@ -186,4 +1597,26 @@ def clean_financial_value(value):
         float(cleaned)
         return cleaned
     except ValueError:
-        return ""
\ No newline at end of file
+        return ""
+
+# Resolves every field in FIELD_PATTERNS in one pass over the text
+FINANCIAL_SCANNER = FieldScanner(FIELD_PATTERNS, clean=clean_financial_value)
+
+# Part of every extraction cache key: changes to the matching functions or
+# their patterns invalidate cached results automatically. Bump the prefix for
+# changes elsewhere in the pipeline (text extraction, page location).
+EXTRACTOR_VERSION = '2-' + code_fingerprint(
+    extract_financial_values,
+    clean_financial_value,
+    scanner,
+    FIELD_PATTERNS,
+    statement.group_lines,
+    statement.split_line,
+    statement.find_columns,
+    statement.assign_columns,
+    build_page_statement,
+    StatementIndex.lookup,
+    FIELD_LABELS,
+    build_text_statements,
+    period_values,
+)
@@ -0,0 +1,134 @@
+"""
+Worker warm-up.
+
+Without it, the first request a worker serves imports the views and the
+parsing stack (pdfplumber/pdfminer, pypdfium2, DRF) and loads pdfminer's
+font and encoding tables, so after every deploy or scale-up someone waits
+seconds for the first extraction. warm_up() does that work at startup
+(dealmover_case/wsgi.py and asgi.py call it):
+
+- imports the URLconf and the parsing stack, timing each import (importing
+  the views compiles FINANCIAL_SCANNER, the field scanner requests use)
+- runs a tiny built-in filing through the statement locator, each text
+  engine in use, the field scanner and the table-mode layout
+- moves everything allocated so far into the GC's permanent generation
+  (gc.freeze), so workers forked from a preloaded parent (gunicorn
+  --preload) do not write to, and so copy, those shared pages when they
+  collect
+
+Each phase's time is logged and exported at /metrics as
+extraction_warmup_seconds_total, with a warning past
+EXTRACTION_COLD_START_BUDGET. `manage.py warmup` prints the same report and
+fails past the budget, and the cold-start benchmark gates the whole startup.
+"""
+import gc
+import importlib
+import io
+import logging
+import sys
+import time
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Imported in this order, so each is timed without the ones before it
+WARMUP_MODULES = (
+    'pypdfium2',
+    'pdfplumber',
+    'rest_framework.views',
+    'core.views',
+)
+
+
+def warm_up(freeze_gc=None):
+    """
+    Preload and exercise the extraction pipeline. Returns the report:
+    {'imports': {module: seconds}, 'phases': {phase: seconds}, 'total': seconds}.
+    A failing phase is logged, never raised, so a worker still starts.
+    """
+    if freeze_gc is None:
+        freeze_gc = getattr(settings, 'EXTRACTION_WARMUP_FREEZE_GC', True)
+    start = time.perf_counter()
+    report = {'imports': {}, 'phases': {}}
+
+    phases = [
+        ('imports', lambda: report['imports'].update(import_parsing_stack())),
+        ('pipeline', run_pipeline),
+    ]
+    if freeze_gc:
+        phases.append(('gc_freeze', freeze_objects))
+    for phase, func in phases:
+        phase_start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            logger.error(f"Warm-up phase {phase} failed: {str(e)}")
+        report['phases'][phase] = time.perf_counter() - phase_start
+
+    report['total'] = time.perf_counter() - start
+    _record(report)
+    return report
+
+
+def import_parsing_stack():
+    """Import the URLconf and WARMUP_MODULES, returning {module: seconds} for each"""
+    from django.urls import get_resolver
+
+    timings = {}
+    for module in WARMUP_MODULES:
+        module_start = time.perf_counter()
+        if module not in sys.modules:
+            importlib.import_module(module)
+        timings[module] = time.perf_counter() - module_start
+    url_start = time.perf_counter()
+    get_resolver().url_patterns
+    timings['urlconf'] = time.perf_counter() - url_start
+    return timings
+
+
+def run_pipeline():
+    """
+    Extract from a two-page built-in filing with every stage a request can
+    use. Nothing is cached, stored or counted in the request metrics.
+    """
+    import pdfplumber
+
+    from .engines import CASCADE, PDFPLUMBER, engine_sequence, get_engine
+    from .locator import score_pages
+    from .statement import StatementIndex, build_page_statement
+    from .synthetic import synthetic_filing
+    from .views import FINANCIAL_SCANNER, clean_financial_value
+
+    data = synthetic_filing(pages=2, statement_page=2, lines_per_page=5)
+    score_pages(io.BytesIO(data))
+
+    engines = set(engine_sequence(CASCADE))
+    engines.update(engine_sequence(getattr(settings, 'EXTRACTION_ENGINE', PDFPLUMBER)))
+    for name in sorted(engines):
+        text = '\n'.join(get_engine(name).iter_pages(io.BytesIO(data), low_memory=True))
+        values = FINANCIAL_SCANNER.scan(text.replace('\n', ' '))
+        if not values['revenue']:
+            logger.warning(f"Warm-up filing gave no revenue with the {name} engine")
+
+    with pdfplumber.open(io.BytesIO(data), pages=[2]) as pdf:
+        pages = [build_page_statement(page.extract_words(), clean=clean_financial_value) for page in pdf.pages]
+    StatementIndex(pages).lookup('revenue')
+
+
+def freeze_objects():
+    """Collect, then exclude everything alive now from future collections"""
+    gc.collect()
+    gc.freeze()
+
+
+def _record(report):
+    for phase, seconds in report['phases'].items():
+        metrics.WARMUP_SECONDS.inc(seconds, phase=phase)
+    imports = ', '.join(f'{module} {seconds:.3f}s' for module, seconds in report['imports'].items())
+    logger.info(f"Worker warm-up took {report['total']:.3f}s (imports: {imports})")
+    budget = getattr(settings, 'EXTRACTION_COLD_START_BUDGET', None)
+    if budget and report['total'] > budget:
+        logger.warning(f"Worker warm-up took {report['total']:.3f}s, over the {budget:.1f}s cold-start budget")
@@ -2,6 +2,7 @@
 ASGI config for dealmover_case project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+DisconnectMiddleware lets async views notice clients that go away mid-request.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -9,8 +10,16 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from core.disconnect import DisconnectMiddleware
+from core.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dealmover_case.settings')
 
-application = get_asgi_application()
+application = DisconnectMiddleware(get_asgi_application())
+
+# Preload the parsing stack before the first request (see core.warmup)
+if getattr(settings, 'EXTRACTION_WARMUP', True):
+    warm_up()
@@ -85,6 +85,32 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# Extraction results are cached by content hash in two tiers: a bounded
+# in-process LRU and a persistent on-disk cache shared by all workers.
+# Background job state is kept on disk too, so any worker can answer a poll.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'extraction_memory': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'extraction-results',
+        'TIMEOUT': 60 * 60,  # 1 hour
+        'OPTIONS': {'MAX_ENTRIES': 512},
+    },
+    'extraction_disk': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.extraction_cache',
+        'TIMEOUT': 60 * 60 * 24 * 30,  # 30 days
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -137,3 +163,119 @@ CORS_ALLOWED_ORIGINS = [
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+DATA_UPLOAD_MAX_NUMBER_FILES = 100  # Keep in step with EXTRACTION_BATCH_MAX_FILES
+
+# Statement page locator: pre-scan pages and only extract the likely
+# income statement pages (falls back to the full document when nothing scores)
+EXTRACTION_LOCATE_STATEMENT_PAGES = True
+EXTRACTION_LOCATOR_MAX_PAGES = 3
+EXTRACTION_LOCATOR_MIN_SCORE = 8
+EXTRACTION_LOCATOR_OUTLINE_WINDOW = 10
+
+# Text extraction engine (see core.engines): 'pdfplumber', 'pdfium', 'pypdf2',
+# or 'cascade' to try pdfium first and fall back to pdfplumber when its text
+# matches no field. Requests can override it with 'engine'.
+EXTRACTION_ENGINE = 'pdfplumber'
+
+# Per-page text artifacts (see core.artifacts): parsed page text is kept,
+# gzipped, per document and engine, so later extractions skip parsing and
+# `manage.py reextract` can re-run the matchers over the stored corpus
+EXTRACTION_ARTIFACTS = True
+EXTRACTION_ARTIFACT_DIR = BASE_DIR / '.extraction_artifacts'
+
+# Extraction history (see core.history): every result is stored as an
+# Extraction row and can be queried at GET /api/extractions/ without the PDF.
+# SQLite runs in WAL mode (see core.db) so history writes do not block readers.
+EXTRACTION_HISTORY = True
+EXTRACTION_SQLITE_WAL = True
+
+# Low-memory mode: release each page's layout objects as soon as its text is
+# taken, and relax young-generation GC while parsing. Peak memory then grows
+# by one page's layout plus the extracted text, whatever the page count.
+EXTRACTION_LOW_MEMORY = True
+
+# Worker warm-up (see core.warmup): wsgi.py and asgi.py preload and exercise
+# the parsing stack at startup, then freeze the warm objects out of GC so
+# forked workers share them copy-on-write
+EXTRACTION_WARMUP = True
+EXTRACTION_WARMUP_FREEZE_GC = True
+EXTRACTION_COLD_START_BUDGET = 5.0  # Seconds; over it is logged, and fails `manage.py warmup`
+
+# Stop parsing pages once every requested field is settled (later pages
+# could not change the result)
+EXTRACTION_STOP_WHEN_RESOLVED = True
+
+# Page-parallel text extraction: split a document's pages across a pool of
+# worker processes. Workers are replaced after EXTRACTION_POOL_MAX_TASKS_PER_WORKER
+# chunks, and the pool is recycled once a worker's RSS passes the watermark.
+EXTRACTION_PARALLEL = False
+EXTRACTION_POOL_WORKERS = None  # Defaults to the number of CPUs
+EXTRACTION_POOL_CHUNK_SIZE = 8  # Pages per task
+EXTRACTION_POOL_MAX_TASKS_PER_WORKER = 50
+EXTRACTION_POOL_WORKER_RSS_LIMIT_MB = 512
+EXTRACTION_POOL_START_METHOD = 'spawn'
+
+# Process isolation (see core.isolation): parse each document in a child
+# process that is killed after EXTRACTION_ISOLATION_DEADLINE seconds and
+# cannot allocate past EXTRACTION_ISOLATION_MEMORY_MB. Documents that break a
+# limit get 422 and are refused for EXTRACTION_QUARANTINE_TTL seconds.
+EXTRACTION_ISOLATION = False
+EXTRACTION_ISOLATION_DEADLINE = 60  # Seconds of wall clock
+EXTRACTION_ISOLATION_MEMORY_MB = 2048
+EXTRACTION_ISOLATION_START_METHOD = 'forkserver'
+EXTRACTION_QUARANTINE_TTL = 24 * 60 * 60
+
+# Admission control (see core.admission): at most EXTRACTION_MAX_CONCURRENT
+# extractions parsing at most EXTRACTION_COST_BUDGET pages between them run
+# at once; up to EXTRACTION_MAX_QUEUED more wait EXTRACTION_QUEUE_TIMEOUT
+# seconds. Others get 429 (queue full) or 503 (timed out) with Retry-After.
+# None turns admission control off.
+EXTRACTION_MAX_CONCURRENT = 4
+EXTRACTION_MAX_QUEUED = 16
+EXTRACTION_QUEUE_TIMEOUT = 30
+EXTRACTION_COST_BUDGET = 2000  # Pages
+EXTRACTION_BYTES_PER_PAGE = 100 * 1024  # Cost estimate when the page count cannot be read
+
+# Background extraction jobs (POST /api/extract/jobs/): uploads are spooled to
+# EXTRACTION_SPOOL_DIR (system temp dir when None) and run on a thread pool.
+# Job state is a file in EXTRACTION_JOB_DIR, removed once untouched for
+# EXTRACTION_JOB_TTL seconds
+EXTRACTION_JOB_WORKERS = 2
+EXTRACTION_JOB_DIR = BASE_DIR / '.extraction_jobs'
+EXTRACTION_JOB_TTL = 24 * 60 * 60
+EXTRACTION_JOB_SWEEP_INTERVAL = 10 * 60
+EXTRACTION_SPOOL_DIR = None
+
+# Raw uploads (POST /api/extract/raw/ with Content-Type: application/pdf) are
+# streamed to EXTRACTION_SPOOL_DIR, so they are not bound by the multipart
+# limits above
+EXTRACTION_RAW_UPLOAD_MAX_SIZE = 250 * 1024 * 1024  # 250MB
+
+# Resumable uploads (POST /api/extract/uploads/, see core.upload_sessions):
+# chunks are appended to a file in EXTRACTION_UPLOAD_SESSION_DIR, and sessions
+# idle for EXTRACTION_UPLOAD_SESSION_TTL seconds are removed
+EXTRACTION_UPLOAD_SESSION_DIR = BASE_DIR / '.upload_sessions'
+EXTRACTION_UPLOAD_SESSION_TTL = 24 * 60 * 60
+EXTRACTION_UPLOAD_SWEEP_INTERVAL = 10 * 60
+EXTRACTION_CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+EXTRACTION_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Suggested to clients
+EXTRACTION_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Async extraction (POST /api/extract/async/, ASGI): extractions run on a
+# thread pool of EXTRACTION_ASYNC_WORKERS shared by all requests
+EXTRACTION_ASYNC_WORKERS = 4
+
+# Batch extraction (POST /api/extract/batch/): filings run on a thread pool of
+# EXTRACTION_BATCH_WORKERS per request and stream back as NDJSON lines
+EXTRACTION_BATCH_WORKERS = 4
+EXTRACTION_BATCH_MAX_FILES = 100
+
+# Per-request profiling (see core.profiling): /api/extract/ requests carrying
+# EXTRACTION_PROFILE_TOKEN in the X-Extraction-Profile header or the
+# 'profile' query parameter, plus a sampled share of all of them, run under
+# cProfile. Profiles are kept in EXTRACTION_PROFILE_DIR, newest
+# EXTRACTION_PROFILE_MAX_FILES only. No token and a zero rate turn it off.
+EXTRACTION_PROFILE_TOKEN = None
+EXTRACTION_PROFILE_SAMPLE_RATE = 0.0
+EXTRACTION_PROFILE_DIR = BASE_DIR / '.extraction_profiles'
+EXTRACTION_PROFILE_MAX_FILES = 1000
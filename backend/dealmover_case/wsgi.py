@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from core.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dealmover_case.settings')
 
 application = get_wsgi_application()
+
+# Preload the parsing stack before the first request (see core.warmup)
+if getattr(settings, 'EXTRACTION_WARMUP', True):
+    warm_up()
@@ -0,0 +1,127 @@
+"""
+Benchmark fixtures.
+
+Stage timings are stored relative to a fixed pure-Python calibration
+workload timed right after each stage, so a baseline recorded on one machine still gates runs on another
+of a different speed. A stage fails when its relative time exceeds the
+baseline by more than --benchmark-tolerance.
+"""
+import json
+import re
+import time
+from pathlib import Path
+
+import pytest
+
+from core.synthetic import synthetic_filing
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+CALIBRATION_ROUNDS = 5
+# Fast stages are repeated until this much time has been measured
+MIN_MEASURE_SECONDS = 1.0
+MAX_ROUNDS = 100
+
+
+def calibration_workload():
+    """Fixed mix of interpreter, string and regex work"""
+    pattern = re.compile(r'total\s+revenues?\s+\$\s*([0-9,]+)', re.IGNORECASE)
+    text = 'Narrative text about revenue recognition and operating results. ' * 2000
+    total = 0
+    for i in range(200000):
+        total += i % 7
+    pattern.findall(text + ' Total revenues $ 307,394')
+    return total
+
+
+class BenchmarkRecorder:
+    """Times stages and checks them against the baseline"""
+
+    def __init__(self, baseline, tolerance, update):
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.update = update
+        self.results = {}
+        self.calibration = self.calibrate()
+
+    def calibrate(self):
+        """Best time of the calibration workload on this machine right now"""
+        return min(_timed(calibration_workload) for _ in range(CALIBRATION_ROUNDS))
+
+    def measure(self, name, func, rounds=5):
+        """
+        Best time of func() over at least rounds calls (more for fast stages,
+        up to MIN_MEASURE_SECONDS of calls), after one warm-up call. The
+        minimum is the least noisy estimate on a shared machine.
+        """
+        func()
+        timings = []
+        while len(timings) < rounds or (sum(timings) < MIN_MEASURE_SECONDS and len(timings) < MAX_ROUNDS):
+            timings.append(_timed(func))
+        seconds = min(timings)
+        # Calibrate next to every stage so load changes during the run cancel out
+        self.calibration = self.calibrate()
+        relative = seconds / self.calibration
+        self.results[name] = {'seconds': round(seconds, 6), 'relative': round(relative, 4)}
+
+        expected = self.baseline.get('stages', {}).get(name)
+        if self.update or expected is None:
+            return seconds
+        limit = expected['relative'] * (1 + self.tolerance)
+        assert relative <= limit, (
+            f"{name} regressed: {seconds:.4f}s is {relative:.2f}x calibration, "
+            f"baseline {expected['relative']:.2f}x (+{self.tolerance:.0%} allowed)"
+        )
+        return seconds
+
+    def write_baseline(self):
+        stages = dict(self.baseline.get('stages', {}))
+        stages.update(self.results)
+        baseline = {
+            'calibration_seconds': round(self.calibration, 6),
+            'stages': dict(sorted(stages.items())),
+        }
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + '\n')
+
+
+@pytest.fixture(scope='session')
+def benchmark(request):
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    recorder = BenchmarkRecorder(
+        baseline,
+        tolerance=request.config.getoption('--benchmark-tolerance'),
+        update=request.config.getoption('--benchmark-update'),
+    )
+    yield recorder
+    if recorder.update:
+        recorder.write_baseline()
+
+
+@pytest.fixture(scope='session')
+def synthetic_filings(tmp_path_factory):
+    """Factory for synthetic filing paths, built once per session"""
+    directory = tmp_path_factory.mktemp('filings')
+    paths = {}
+
+    def make(pages, statement_page='middle'):
+        key = (pages, statement_page)
+        if key not in paths:
+            path = directory / f'filing-{pages}-{statement_page}.pdf'
+            path.write_bytes(synthetic_filing(pages, statement_page))
+            paths[key] = path
+        return str(paths[key])
+
+    return make
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize `pages` benchmarks with --benchmark-sizes"""
+    if 'pages' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('--benchmark-sizes').split(',') if size]
+        metafunc.parametrize('pages', sizes)
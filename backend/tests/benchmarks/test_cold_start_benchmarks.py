@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+MANAGE_PY = Path(__file__).resolve().parents[2] / 'manage.py'
+
+
+class TestColdStartBenchmarks:
+    """Time a worker's startup in a fresh interpreter"""
+
+    def test_worker_cold_start(self, benchmark):
+        """Interpreter start, Django setup, imports and warm-up (manage.py warmup)"""
+        def cold_start():
+            subprocess.run(
+                [sys.executable, str(MANAGE_PY), 'warmup', '--budget', '60'],
+                check=True, capture_output=True,
+            )
+
+        benchmark.measure('worker cold start', cold_start, rounds=3)
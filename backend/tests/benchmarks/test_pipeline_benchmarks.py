@@ -0,0 +1,84 @@
+import shutil
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from core.cache import clear_cache
+from core.views import clean_financial_value, extract_financial_values, extract_text_from_pdf
+
+pytestmark = pytest.mark.benchmark
+
+
+def rounds_for(pages):
+    """Fewer rounds for the big filings so a run stays within minutes"""
+    return 1 if pages > 100 else 5
+
+
+class TestPipelineBenchmarks:
+    """Time each extraction stage on synthetic filings"""
+
+    def test_extract_text_from_pdf(self, benchmark, synthetic_filings, pages):
+        """Full-document text extraction"""
+        path = synthetic_filings(pages)
+
+        benchmark.measure(
+            f'extract_text_from_pdf[{pages}p]',
+            lambda: extract_text_from_pdf(path, parallel=False),
+            rounds=rounds_for(pages),
+        )
+
+    def test_extract_text_with_pdfium(self, benchmark, synthetic_filings, pages):
+        """Full-document text extraction with the pdfium engine"""
+        path = synthetic_filings(pages)
+
+        benchmark.measure(
+            f'extract_text_from_pdf[pdfium,{pages}p]',
+            lambda: extract_text_from_pdf(path, parallel=False, engine='pdfium'),
+            rounds=rounds_for(pages),
+        )
+
+    def test_extract_text_stops_after_statement(self, benchmark, synthetic_filings, pages):
+        """Text extraction that stops once the fields are resolved"""
+        path = synthetic_filings(pages, statement_page='start')
+        fields = ['revenue', 'cos', 'operating_income']
+
+        benchmark.measure(
+            f'extract_text_from_pdf[stop_after_fields,{pages}p]',
+            lambda: extract_text_from_pdf(path, parallel=False, stop_after_fields=fields),
+            rounds=rounds_for(pages),
+        )
+
+    def test_extract_financial_values(self, benchmark, synthetic_filings, pages):
+        """Field matching over a whole filing's text"""
+        text = extract_text_from_pdf(synthetic_filings(pages, statement_page='end'), parallel=False)
+
+        assert extract_financial_values(text)['revenue'] == '307394'
+        benchmark.measure(
+            f'extract_financial_values[{pages}p]',
+            lambda: [extract_financial_values(text) for _ in range(10)],
+        )
+
+    def test_clean_financial_value(self, benchmark):
+        """Value normalization"""
+        values = ['307,394', '(1,424)', '$ 5.80', '', 'n/a', '1,234,567,890'] * 2000
+
+        benchmark.measure(
+            'clean_financial_value[12000 values]',
+            lambda: [clean_financial_value(value) for value in values],
+        )
+
+    def test_extract_view(self, benchmark, synthetic_filings, pages):
+        """The full /api/extract/ request with a cold cache"""
+        with open(synthetic_filings(pages), 'rb') as f:
+            content = f.read()
+        client = Client()
+
+        def post():
+            clear_cache()
+            shutil.rmtree(settings.EXTRACTION_ARTIFACT_DIR, ignore_errors=True)
+            pdf_file = SimpleUploadedFile('filing.pdf', content, content_type='application/pdf')
+            response = client.post('/api/extract/', {'pdf_file': pdf_file})
+            assert response.status_code == 200
+            assert response.json()['cache'] == 'miss'
+
+        benchmark.measure(f'extract_financial_data view[{pages}p]', post, rounds=rounds_for(pages))
@@ -2,7 +2,10 @@ import pytest
 from django.test import TestCase, Client
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock import patch, mock_open
+import hashlib
 import json
+import os
+import time
 
 
 class TestPDFExtractionAPI(TestCase):
@@ -187,6 +190,1096 @@ class TestPDFExtractionAPI(TestCase):
                 data = response.json()
                 assert 'results' in data
 
+    @patch('core.views.extract_text_from_pdf')
+    @patch('core.views.extract_financial_values')
+    def test_api_post_with_page_range(self, mock_extract_values, mock_extract_text):
+        """Test that a client page range limits extraction to those pages"""
+        mock_extract_text.return_value = "Some text"
+        mock_extract_values.return_value = {
+            'revenue': '1000000',
+            'cos': '600000',
+            'operating_income': '400000'
+        }
+        
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'pages': '45-47,50'})
+        
+        assert response.status_code == 200
+        assert mock_extract_text.call_args.kwargs['pages'] == [45, 46, 47, 50]
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_api_post_with_field_selection(self, mock_extract_text):
+        """Test fields= limits the results and the fields parsing waits for"""
+        mock_extract_text.return_value = "Total revenues $1,234,567 Cost of sales 100"
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'fields': 'revenue'})
+        
+        assert response.status_code == 200
+        assert response.json()['results'] == {'revenue': '1234567'}
+        assert mock_extract_text.call_args.kwargs['stop_after_fields'] == ['revenue']
+    
+    def test_api_post_with_unknown_field(self):
+        """Test unknown fields are rejected"""
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'fields': 'revenue,ebitda'})
+        
+        assert response.status_code == 400
+        assert 'ebitda' in response.json()['error']
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_api_post_with_engine(self, mock_extract_text):
+        """Test engine= picks the text engine, falling back from pdfium in cascade mode"""
+        texts = {'pdfium': "", 'pdfplumber': "Total revenues $1,234,567"}
+        mock_extract_text.side_effect = lambda pdf_file, **kwargs: texts[kwargs['engine']]
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'engine': 'cascade'})
+        
+        assert response.status_code == 200
+        assert response.json()['results']['revenue'] == '1234567'
+        assert [call.kwargs['engine'] for call in mock_extract_text.call_args_list] == ['pdfium', 'pdfplumber']
+    
+    def test_api_post_with_unknown_engine(self):
+        """Test unknown engines are rejected"""
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'engine': 'tesseract'})
+        
+        assert response.status_code == 400
+        assert 'engine must be one of' in response.json()['error']
+    
+    @patch('core.views.pdfplumber.open')
+    def test_api_post_table_mode(self, mock_pdfplumber_open):
+        """Test mode=table returns the full statement and reads fields from its rows"""
+        def word(text, x0, top):
+            return {'text': text, 'x0': x0, 'x1': x0 + 6 * len(text), 'top': top, 'bottom': top + 10}
+        
+        words = [
+            word('2023', 300, 10), word('2024', 400, 10),
+            word('Revenues', 72, 30), word('$', 290, 30), word('307,394', 300, 30), word('$', 390, 30), word('350,018', 400, 30),
+            word('Net', 72, 50), word('income', 96, 50), word('73,795', 300, 50), word('100,118', 400, 50),
+            word('Cost', 72, 70), word('of', 102, 70), word('sales', 120, 70), word('(1)', 155, 70), word('1,000', 300, 70), word('2,000', 400, 70),
+        ]
+        mock_page = type('MockPage', (), {'page_number': 45, 'extract_words': lambda self: words, 'close': lambda self: None})()
+        mock_pdfplumber_open.return_value.__enter__.return_value.pages = [mock_page]
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'mode': 'table', 'pages': '45'})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['results'] == {
+            'revenue': '307394', 'cos': '1000', 'operating_income': '',
+            'net_income': '73795', 'eps_basic': '', 'eps_diluted': '',
+        }
+        page = data['statement']['pages'][0]
+        assert page['page'] == 45
+        assert page['columns'] == ['2023', '2024']
+        assert {'label': 'Net income', 'values': ['73795', '100118']} in page['rows']
+        assert mock_pdfplumber_open.call_args.kwargs['pages'] == [45]
+        
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        response = self.client.post(
+            self.api_url, {'pdf_file': pdf_file, 'mode': 'table', 'pages': '45', 'fields': 'net_income,revenue'}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()['results'] == {'revenue': '307394', 'net_income': '73795'}
+    
+    def test_api_post_table_only_fields(self):
+        """Test net income and EPS can be requested in table mode only"""
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'fields': 'net_income'})
+        
+        assert response.status_code == 400
+        assert 'unknown field net_income' in response.json()['error']
+    
+    def test_api_post_period_columns(self):
+        """Test one parse returns every period column and period_end_date picks one"""
+        from core.synthetic import synthetic_filing
+        
+        content = synthetic_filing(pages=5)
+        
+        def post(period_end_date, mode='values'):
+            pdf_file = SimpleUploadedFile("filing.pdf", content, content_type="application/pdf")
+            return self.client.post(
+                self.api_url, {'pdf_file': pdf_file, 'period_end_date': period_end_date, 'mode': mode}
+            ).json()
+        
+        current = post('2024-12-31')
+        prior = post('2023-12-31')
+        unknown = post('2021-12-31')
+        table = post('2024-12-31', mode='table')
+        
+        assert current['results'] == {'revenue': '350018', 'cos': '146306', 'operating_income': '112390'}
+        assert current['period_column'] == '2024'
+        assert current['periods']['2023'] == prior['results']
+        assert (current['cache'], prior['cache']) == ('miss', 'hit')
+        assert unknown['period_column'] is None
+        assert unknown['results']['revenue'] == '307394'
+        assert {field: table['results'][field] for field in current['results']} == current['results']
+        assert table['results']['net_income'] == '100118'
+        assert {
+            year: {field: values[field] for field in current['periods'][year]}
+            for year, values in table['periods'].items()
+        } == current['periods']
+    
+    def test_api_post_with_unknown_mode(self):
+        """Test unknown modes are rejected"""
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'mode': 'ocr'})
+        
+        assert response.status_code == 400
+    
+    def test_api_post_with_invalid_page_range(self):
+        """Test API POST request with a malformed page range"""
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file, 'pages': '5-3'})
+        
+        assert response.status_code == 400
+        assert 'pages' in response.json()['error']
+    
+    @patch('core.views.locate_statement_pages')
+    @patch('core.views.extract_text_from_pdf')
+    def test_api_post_falls_back_to_full_document(self, mock_extract_text, mock_locate_pages):
+        """Test located pages without any values fall back to the full document"""
+        mock_locate_pages.return_value = [3]
+        mock_extract_text.side_effect = [
+            "Narrative text only",
+            "Total revenues $1,234,567"
+        ]
+        
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file})
+        
+        assert response.status_code == 200
+        assert response.json()['results']['revenue'] == '1234567'
+        assert mock_extract_text.call_args_list[0].kwargs['pages'] == [3]
+        assert mock_extract_text.call_count == 2
+
+    @patch('core.views.extract_text_from_pdf')
+    def test_api_repeat_upload_served_from_cache(self, mock_extract_text):
+        """Test that re-uploading the same content skips PDF parsing"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        
+        responses = []
+        for _ in range(2):
+            pdf_file = SimpleUploadedFile(
+                "test.pdf",
+                b"Mock PDF content",
+                content_type="application/pdf"
+            )
+            responses.append(self.client.post(self.api_url, {'pdf_file': pdf_file}))
+        
+        first, second = [response.json() for response in responses]
+        assert first['cache'] == 'miss'
+        assert second['cache'] == 'hit'
+        assert second['results'] == first['results']
+        assert mock_extract_text.call_count == 1
+
+
+class TestRawUploadAPI(TestCase):
+    """Integration tests for raw application/pdf uploads"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = Client()
+        self.raw_url = '/api/extract/raw/'
+        self.pdf_bytes = b"%PDF-1.7\nMock PDF content"
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_raw_upload_extracts_from_spooled_file(self, mock_extract_text):
+        """Test the body is parsed from a file on disk that is removed afterwards"""
+        paths = []
+        
+        def extract_text(pdf_file, **kwargs):
+            paths.append(pdf_file)
+            with open(pdf_file, 'rb') as f:
+                assert f.read() == self.pdf_bytes
+            return "Total revenues $1,234,567"
+        
+        mock_extract_text.side_effect = extract_text
+        
+        response = self.client.post(
+            self.raw_url + '?period_end_date=2023-12-31&pages=3',
+            data=self.pdf_bytes,
+            content_type='application/pdf'
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['period_end_date'] == '2023-12-31'
+        assert data['results']['revenue'] == '1234567'
+        assert mock_extract_text.call_args.kwargs['pages'] == [3]
+        assert not os.path.exists(paths[0])
+    
+    @patch('core.views.hash_uploaded_file')
+    @patch('core.views.extract_text_from_pdf')
+    def test_raw_upload_hashed_once(self, mock_extract_text, mock_hash_uploaded_file):
+        """Test the digest from spooling is reused and shares the cache with multipart uploads"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        mock_hash_uploaded_file.return_value = hashlib.sha256(self.pdf_bytes).hexdigest()
+        
+        self.client.post('/api/extract/', {
+            'pdf_file': SimpleUploadedFile("test.pdf", self.pdf_bytes, content_type="application/pdf")
+        })
+        response = self.client.post(self.raw_url, data=self.pdf_bytes, content_type='application/pdf')
+        
+        assert response.json()['cache'] == 'hit'
+        assert mock_hash_uploaded_file.call_count == 1  # Only the multipart upload
+    
+    def test_raw_upload_requires_pdf_content_type(self):
+        """Test other content types are rejected"""
+        response = self.client.post(self.raw_url, data=self.pdf_bytes, content_type='text/plain')
+        
+        assert response.status_code == 415
+    
+    def test_raw_upload_rejects_non_pdf_body(self):
+        """Test a body without a PDF header is rejected"""
+        response = self.client.post(self.raw_url, data=b"<html></html>", content_type='application/pdf')
+        
+        assert response.status_code == 400
+        assert 'File must be a PDF' in response.json()['error']
+    
+    def test_raw_upload_size_limit(self):
+        """Test bodies over EXTRACTION_RAW_UPLOAD_MAX_SIZE get 413"""
+        with self.settings(EXTRACTION_RAW_UPLOAD_MAX_SIZE=10):
+            response = self.client.post(self.raw_url, data=self.pdf_bytes, content_type='application/pdf')
+        
+        assert response.status_code == 413
+    
+    def test_raw_upload_options_match_multipart(self):
+        """Test the query string takes the same options as the multipart endpoint, mode included"""
+        from core.synthetic import synthetic_filing
+        
+        content = synthetic_filing(pages=5)
+        
+        response = self.client.post(
+            self.raw_url + '?mode=table&fields=revenue,net_income&period_end_date=2024-12-31',
+            data=content, content_type='application/pdf'
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['results'] == {'revenue': '350018', 'net_income': '100118'}
+        assert data['statement']['pages']
+        
+        response = self.client.post(self.raw_url + '?mode=tables', data=content, content_type='application/pdf')
+        
+        assert response.status_code == 400
+        assert 'mode must be one of' in response.json()['error']
+
+
+class TestChunkedUploadAPI(TestCase):
+    """Integration tests for resumable chunked uploads"""
+    
+    def setUp(self):
+        """Set up test client and a PDF sent in 1000-byte chunks"""
+        self.client = Client()
+        self.uploads_url = '/api/extract/uploads/'
+        self.pdf_bytes = b"%PDF-1.7\nTotal revenues" + bytes(range(256)) * 10
+    
+    def create(self, **data):
+        response = self.client.post(
+            self.uploads_url, json.dumps({'size': len(self.pdf_bytes), 'filename': 'filing.pdf', **data}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        return response.json()
+    
+    def put_chunk(self, session, start, end, data=None, digest_of=None):
+        """PUT bytes start..end (inclusive) with their Content-Range and Content-Digest"""
+        import base64
+        
+        data = self.pdf_bytes[start:end + 1] if data is None else data
+        digest = base64.b64encode(hashlib.sha256(digest_of or data).digest()).decode()
+        return self.client.put(
+            session['upload_url'], data, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.pdf_bytes)}',
+            HTTP_CONTENT_DIGEST=f'sha-256=:{digest}:'
+        )
+    
+    def upload_all(self, session, start=0, chunk_size=1000):
+        for offset in range(start, len(self.pdf_bytes), chunk_size):
+            end = min(offset + chunk_size, len(self.pdf_bytes)) - 1
+            assert self.put_chunk(session, offset, end).status_code == 200
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_chunked_upload_and_finalize(self, mock_extract_text):
+        """Test a file sent in chunks is extracted with the session's options"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        session = self.create(period_end_date='2023-12-31', pages='3')
+        
+        self.upload_all(session)
+        response = self.client.post(session['finalize_url'])
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['period_end_date'] == '2023-12-31'
+        assert data['results']['revenue'] == '1234567'
+        assert mock_extract_text.call_args.kwargs['pages'] == [3]
+        assert self.client.get(session['upload_url']).status_code == 404
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_resume_after_failed_chunk(self, mock_extract_text):
+        """Test a corrupted chunk is dropped and the upload resumes from the reported offset"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        session = self.create(content_hash=hashlib.sha256(self.pdf_bytes).hexdigest())
+        self.put_chunk(session, 0, 999)
+        
+        corrupted = self.put_chunk(session, 1000, 1999, data=b'x' * 1000, digest_of=self.pdf_bytes[1000:2000])
+        status = self.client.get(session['upload_url'])
+        self.upload_all(session, start=status.json()['offset'])
+        
+        assert corrupted.status_code == 400
+        assert status.json()['offset'] == 1000
+        assert status['Upload-Offset'] == '1000'
+        assert self.client.post(session['finalize_url']).status_code == 200
+    
+    def test_chunk_at_wrong_offset_conflicts(self):
+        """Test a chunk that does not continue the upload gets 409 with the offset"""
+        session = self.create()
+        self.put_chunk(session, 0, 999)
+        
+        response = self.put_chunk(session, 1500, 1999)
+        
+        assert response.status_code == 409
+        assert response.json()['offset'] == 1000
+    
+    def test_chunk_headers_required(self):
+        """Test chunks need a Content-Range and a Content-Digest"""
+        session = self.create()
+        
+        no_range = self.client.put(session['upload_url'], b'%PDF-', content_type='application/octet-stream')
+        no_digest = self.client.put(
+            session['upload_url'], b'%PDF-', content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-4/{len(self.pdf_bytes)}'
+        )
+        
+        assert no_range.status_code == 400
+        assert no_digest.status_code == 400
+        assert 'Content-Digest' in no_digest.json()['error']
+    
+    def test_finalize_incomplete_upload_conflicts(self):
+        """Test finalizing before every byte has arrived gets 409"""
+        session = self.create()
+        self.put_chunk(session, 0, 999)
+        
+        response = self.client.post(session['finalize_url'])
+        
+        assert response.status_code == 409
+        assert response.json()['offset'] == 1000
+    
+    def test_finalize_wrong_file(self):
+        """Test a file that does not match its declared hash is rejected and discarded"""
+        session = self.create(content_hash='0' * 64)
+        self.upload_all(session)
+        
+        response = self.client.post(session['finalize_url'])
+        
+        assert response.status_code == 400
+        assert 'content_hash' in response.json()['error']
+        assert self.client.get(session['upload_url']).status_code == 404
+    
+    def test_create_validation(self):
+        """Test sessions need a size within the limit, a PDF name and valid options"""
+        def create(**data):
+            return self.client.post(self.uploads_url, json.dumps(data), content_type='application/json')
+        
+        assert create(filename='filing.pdf').status_code == 400
+        assert create(size=10, filename='filing.txt').status_code == 400
+        assert create(size=10, period_end_date='12/31/2024').status_code == 400
+        with self.settings(EXTRACTION_CHUNKED_UPLOAD_MAX_SIZE=5):
+            assert create(size=10).status_code == 413
+    
+    def test_abandon_upload(self):
+        """Test DELETE removes the session"""
+        session = self.create()
+        
+        assert self.client.delete(session['upload_url']).status_code == 204
+        assert self.client.delete(session['upload_url']).status_code == 404
+
+
+class TestAsyncExtractionAPI(TestCase):
+    """Integration tests for the async extraction endpoint"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = Client()
+        self.async_url = '/api/extract/async/'
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_async_extraction(self, mock_extract_text):
+        """Test the async endpoint returns the same payload as /api/extract/"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        response = self.client.post(self.async_url, {'pdf_file': pdf_file, 'period_end_date': '2023-12-31'})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['period_end_date'] == '2023-12-31'
+        assert data['results']['revenue'] == '1234567'
+        assert data['cache'] == 'miss'
+    
+    def test_async_extraction_validates_request(self):
+        """Test the async endpoint applies the shared request validation"""
+        text_file = SimpleUploadedFile("test.txt", b"Some text", content_type="text/plain")
+        
+        assert self.client.post(self.async_url).json()['error'] == 'No PDF file provided'
+        assert self.client.post(self.async_url, {'pdf_file': text_file}).status_code == 400
+    
+    def test_async_extraction_post_only(self):
+        """Test GET is not allowed"""
+        assert self.client.get(self.async_url).status_code == 405
+    
+    def test_async_extraction_csrf_exempt(self):
+        """Test API clients without a CSRF token are accepted, as by the DRF views"""
+        client = Client(enforce_csrf_checks=True)
+        
+        assert client.post(self.async_url).status_code == 400
+
+
+class TestBatchExtractionAPI(TestCase):
+    """Integration tests for the streamed batch extraction endpoint"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = Client()
+        self.batch_url = '/api/extract/batch/'
+    
+    def read_lines(self, response):
+        """Decode the NDJSON response body"""
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_batch_streams_one_line_per_filing(self, mock_extract_text):
+        """Test every filing gets its own result line with its own period"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        pdf_files = [
+            SimpleUploadedFile(f"filing{n}.pdf", f"Mock PDF {n}".encode(), content_type="application/pdf")
+            for n in range(3)
+        ]
+        
+        response = self.client.post(self.batch_url, {
+            'pdf_file': pdf_files,
+            'period_end_date': ['2022-12-31', '2023-12-31', '2024-12-31'],
+        })
+        
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = sorted(self.read_lines(response), key=lambda line: line['index'])
+        assert [line['filename'] for line in lines] == ['filing0.pdf', 'filing1.pdf', 'filing2.pdf']
+        assert [line['period_end_date'] for line in lines] == ['2022-12-31', '2023-12-31', '2024-12-31']
+        assert all(line['results']['revenue'] == '1234567' for line in lines)
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_batch_item_errors_do_not_fail_batch(self, mock_extract_text):
+        """Test a failing filing gets an error line while the others succeed"""
+        def extract_text(pdf_file, **kwargs):
+            if pdf_file.name == 'broken.pdf':
+                raise ValueError('No /Root object')
+            return "Total revenues $1,234,567"
+        
+        mock_extract_text.side_effect = extract_text
+        
+        response = self.client.post(self.batch_url, {
+            'pdf_file': [
+                SimpleUploadedFile("good.pdf", b"Mock PDF content", content_type="application/pdf"),
+                SimpleUploadedFile("broken.pdf", b"Broken PDF content", content_type="application/pdf"),
+                SimpleUploadedFile("notes.txt", b"Some text", content_type="text/plain"),
+            ],
+        })
+        
+        lines = {line['filename']: line for line in self.read_lines(response)}
+        assert response.status_code == 200
+        assert lines['good.pdf']['results']['revenue'] == '1234567'
+        assert 'No /Root object' in lines['broken.pdf']['error']
+        assert lines['notes.txt']['error'] == 'File must be a PDF'
+    
+    def test_batch_without_files(self):
+        """Test an empty batch is rejected"""
+        response = self.client.post(self.batch_url)
+        
+        assert response.status_code == 400
+        assert 'No PDF file provided' in response.json()['error']
+    
+    def test_batch_period_count_mismatch(self):
+        """Test period_end_date must be sent once or once per file"""
+        response = self.client.post(self.batch_url, {
+            'pdf_file': [
+                SimpleUploadedFile(f"filing{n}.pdf", b"Mock PDF", content_type="application/pdf")
+                for n in range(3)
+            ],
+            'period_end_date': ['2023-12-31', '2024-12-31'],
+        })
+        
+        assert response.status_code == 400
+    
+    def test_batch_options_match_multipart(self):
+        """Test the batch takes the same options as the multipart endpoint, mode included"""
+        from core.synthetic import synthetic_filing
+        
+        content = synthetic_filing(pages=5)
+        
+        response = self.client.post(self.batch_url, {
+            'pdf_file': [SimpleUploadedFile("filing.pdf", content, content_type="application/pdf")],
+            'period_end_date': '2024-12-31', 'mode': 'table', 'fields': 'revenue,net_income', 'pages': '1-5',
+        })
+        
+        [line] = self.read_lines(response)
+        assert line['results'] == {'revenue': '350018', 'net_income': '100118'}
+        assert line['statement']['pages']
+        
+        response = self.client.post(self.batch_url, {
+            'pdf_file': [SimpleUploadedFile("filing.pdf", content, content_type="application/pdf")],
+            'mode': 'tables',
+        })
+        
+        assert response.status_code == 400
+        assert 'mode must be one of' in response.json()['error']
+
+
+class TestExtractionJobAPI(TestCase):
+    """Integration tests for the background extraction job endpoints"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = Client()
+        self.jobs_url = '/api/extract/jobs/'
+    
+    def wait_for_job(self, status_url, timeout=5):
+        """Poll the job until it finishes"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = self.client.get(status_url).json()
+            if data['status'] in ('succeeded', 'failed', 'cancelled'):
+                return data
+            time.sleep(0.01)
+        raise AssertionError('job did not finish')
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_submit_and_poll_job(self, mock_extract_text):
+        """Test a job is accepted immediately and its results can be fetched"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        pdf_file = SimpleUploadedFile(
+            "test.pdf",
+            b"Mock PDF content",
+            content_type="application/pdf"
+        )
+        
+        response = self.client.post(self.jobs_url, {
+            'pdf_file': pdf_file,
+            'period_end_date': '2024-12-31',
+            'pages': '3',
+        })
+        
+        assert response.status_code == 202
+        submitted = response.json()
+        assert submitted['status'] == 'queued'
+        assert submitted['status_url'].endswith(f"/api/extract/jobs/{submitted['job_id']}/")
+        
+        data = self.wait_for_job(submitted['status_url'])
+        assert data['status'] == 'succeeded'
+        assert data['period_end_date'] == '2024-12-31'
+        assert data['results']['revenue'] == '1234567'
+        assert mock_extract_text.call_args.kwargs['pages'] == [3]
+    
+    def test_submit_job_validates_request(self):
+        """Test jobs are validated like synchronous requests"""
+        response = self.client.post(self.jobs_url)
+        assert response.status_code == 400
+        
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        response = self.client.post(self.jobs_url, {'pdf_file': pdf_file, 'period_end_date': '12/31/2024'})
+        assert response.status_code == 400
+        assert 'YYYY-MM-DD' in response.json()['error']
+    
+    def test_unknown_job(self):
+        """Test polling or cancelling an unknown job returns 404"""
+        assert self.client.get(self.jobs_url + 'missing/').status_code == 404
+        assert self.client.delete(self.jobs_url + 'missing/').status_code == 404
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_cancel_finished_job_conflicts(self, mock_extract_text):
+        """Test a finished job cannot be cancelled"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        submitted = self.client.post(self.jobs_url, {'pdf_file': pdf_file}).json()
+        self.wait_for_job(submitted['status_url'])
+        
+        response = self.client.delete(submitted['status_url'])
+        assert response.status_code == 409
+        assert response.json()['status'] == 'succeeded'
+
+
+class TestPrecheckAPI(TestCase):
+    """Integration tests for hash-first uploads via /api/extract/precheck/"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = Client()
+        self.precheck_url = '/api/extract/precheck/'
+        self.pdf_bytes = b"Mock PDF content"
+        self.content_hash = hashlib.sha256(self.pdf_bytes).hexdigest()
+    
+    def precheck(self, **data):
+        return self.client.post(
+            self.precheck_url, json.dumps({'content_hash': self.content_hash, **data}),
+            content_type='application/json'
+        )
+    
+    def upload(self, **data):
+        pdf_file = SimpleUploadedFile("test.pdf", self.pdf_bytes, content_type="application/pdf")
+        return self.client.post('/api/extract/', {'pdf_file': pdf_file, **data})
+    
+    def test_unknown_content_asks_for_upload(self):
+        """Test a hash the server has no result for is sent to the upload endpoint"""
+        response = self.precheck()
+        
+        assert response.status_code == 200
+        assert response.json()['known'] is False
+        assert response.json()['upload_url'].endswith('/api/extract/')
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_known_content_returns_results(self, mock_extract_text):
+        """Test a document extracted before is answered from its hash alone"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        self.upload()
+        
+        response = self.precheck(period_end_date='2023-12-31')
+        
+        data = response.json()
+        assert data['known'] is True
+        assert data['period_end_date'] == '2023-12-31'
+        assert data['results']['revenue'] == '1234567'
+        assert data['cache'] == 'hit'
+        assert mock_extract_text.call_count == 1
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_options_must_match(self, mock_extract_text):
+        """Test a result for other options does not answer the precheck"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        self.upload(fields='revenue')
+        
+        assert self.precheck(fields='revenue').json()['known'] is True
+        assert self.precheck().json()['known'] is False
+        assert self.precheck(fields='revenue', engine='pdfium').json()['known'] is False
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_known_from_history(self, mock_extract_text):
+        """Test a stored result answers once the extraction cache has dropped it"""
+        from django.core.cache import caches
+        
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        with self.settings(EXTRACTION_HISTORY=True):
+            self.upload()
+            caches['extraction_memory'].clear()
+            caches['extraction_disk'].clear()
+            
+            values = self.precheck().json()
+            other_period = self.precheck(period_end_date='2023-12-31').json()
+            table = self.precheck(mode='table').json()
+        
+        assert values['known'] is True
+        assert values['results']['revenue'] == '1234567'
+        # A row holds the values of the period it was stored for
+        assert other_period['known'] is False
+        assert table['known'] is False
+    
+    def test_precheck_validation(self):
+        """Test malformed hashes and options are rejected"""
+        response = self.client.post(self.precheck_url, {'content_hash': 'abc'})
+        assert response.status_code == 400
+        assert 'SHA-256' in response.json()['error']
+        
+        assert self.precheck(pages='a-b').status_code == 400
+        assert self.precheck(period_end_date='12/31/2024').status_code == 400
+
+
+class TestExtractionHistoryAPI(TestCase):
+    """Integration tests for stored results and GET /api/extractions/"""
+    
+    def setUp(self):
+        """Set up test client with the extraction history on"""
+        self.client = Client()
+        self.history_url = '/api/extractions/'
+        overrides = self.settings(EXTRACTION_HISTORY=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+    
+    def store(self, count):
+        """Store count results directly, oldest first"""
+        from core.history import record_extraction
+        
+        return [
+            record_extraction(f'{index:064x}', {'revenue': str(index)}, period_end_date=f'202{index}-12-31')
+            for index in range(count)
+        ]
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_extraction_is_stored(self, mock_extract_text):
+        """Test an extraction can be read back by content hash without the PDF"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        pdf_file = SimpleUploadedFile("goog.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        self.client.post('/api/extract/', {'pdf_file': pdf_file, 'period_end_date': '2024-12-31'})
+        content_hash = hashlib.sha256(b"Mock PDF content").hexdigest()
+        response = self.client.get(self.history_url, {'content_hash': content_hash})
+        
+        assert response.status_code == 200
+        [stored] = response.json()['results']
+        assert stored['filename'] == 'goog.pdf'
+        assert stored['period_end_date'] == '2024-12-31'
+        assert stored['results']['revenue'] == '1234567'
+        assert stored['cache'] == 'miss'
+    
+    def test_filters(self):
+        """Test period range and field presence filters"""
+        self.store(3)
+        
+        response = self.client.get(self.history_url, {'period_from': '2021-01-01', 'has': 'revenue'})
+        
+        assert [row['period_end_date'] for row in response.json()['results']] == ['2022-12-31', '2021-12-31']
+        assert self.client.get(self.history_url, {'has': 'cos'}).json()['results'] == []
+    
+    def test_pagination(self):
+        """Test following next walks every result once, newest first"""
+        stored = self.store(3)
+        
+        first = self.client.get(self.history_url, {'limit': 2}).json()
+        second = self.client.get(first['next']).json()
+        
+        ids = [row['id'] for row in first['results'] + second['results']]
+        assert ids == [extraction.id for extraction in reversed(stored)]
+        assert second['next'] is None
+    
+    def test_conditional_get(self):
+        """Test a matching If-None-Match gets 304 until the results change"""
+        self.store(2)
+        
+        response = self.client.get(self.history_url)
+        etag = response['ETag']
+        not_modified = self.client.get(self.history_url, HTTP_IF_NONE_MATCH=etag)
+        self.store(3)
+        changed = self.client.get(self.history_url, HTTP_IF_NONE_MATCH=etag)
+        
+        assert 'no-cache' in response['Cache-Control']
+        assert not_modified.status_code == 304
+        assert not_modified['ETag'] == etag
+        assert changed.status_code == 200
+        assert changed['ETag'] != etag
+    
+    def test_query_validation(self):
+        """Test malformed filters and page sizes are rejected"""
+        assert self.client.get(self.history_url, {'period_from': '12/31/2024'}).status_code == 400
+        assert self.client.get(self.history_url, {'has': 'ebitda'}).status_code == 400
+        assert self.client.get(self.history_url, {'limit': 0}).status_code == 400
+        assert self.client.get(self.history_url, {'cursor': 'abc'}).status_code == 400
+        assert self.client.get(self.history_url, {'engine': 'ocr'}).status_code == 400
+
+
+class TestAdmissionControl(TestCase):
+    """Integration tests for rejecting extractions beyond capacity"""
+    
+    def setUp(self):
+        """Set up test client and a single extraction slot with no queue"""
+        self.client = Client()
+        self.api_url = '/api/extract/'
+        overrides = self.settings(
+            EXTRACTION_MAX_CONCURRENT=1, EXTRACTION_MAX_QUEUED=0, EXTRACTION_QUEUE_TIMEOUT=0.05
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+    
+    def occupy_slot(self):
+        """Hold the only extraction slot until the returned event is set"""
+        import threading
+        from core.admission import get_admission_controller
+        
+        admitted, release = threading.Event(), threading.Event()
+        
+        def hold():
+            with get_admission_controller().admit():
+                admitted.set()
+                release.wait(5)
+        
+        thread = threading.Thread(target=hold)
+        thread.start()
+        admitted.wait(1)
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        return release
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_busy_server_returns_429(self, mock_extract_text):
+        """Test a request beyond capacity is rejected with Retry-After"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        self.occupy_slot()
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        response = self.client.post(self.api_url, {'pdf_file': pdf_file})
+        
+        assert response.status_code == 429
+        assert int(response['Retry-After']) >= 1
+        assert response.json()['retry_after'] == int(response['Retry-After'])
+        mock_extract_text.assert_not_called()
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_queue_timeout_returns_503(self, mock_extract_text):
+        """Test a request that waits too long for a slot gets 503"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        with self.settings(EXTRACTION_MAX_QUEUED=1):
+            self.occupy_slot()
+            response = self.client.post(self.api_url, {'pdf_file': pdf_file})
+        
+        assert response.status_code == 503
+        assert 'Retry-After' in response
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_cache_hits_skip_admission(self, mock_extract_text):
+        """Test cached results are served even when every slot is taken"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        content = b"Mock PDF content"
+        self.client.post(self.api_url, {
+            'pdf_file': SimpleUploadedFile("test.pdf", content, content_type="application/pdf"),
+        })
+        self.occupy_slot()
+        
+        response = self.client.post(self.api_url, {
+            'pdf_file': SimpleUploadedFile("test.pdf", content, content_type="application/pdf"),
+        })
+        
+        assert response.status_code == 200
+        assert response.json()['cache'] == 'hit'
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_busy_batch_item_reports_retry_after(self, mock_extract_text):
+        """Test batch filings turned away get an error line with retry_after"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        self.occupy_slot()
+        pdf_file = SimpleUploadedFile("a.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        response = self.client.post('/api/extract/batch/', {'pdf_file': [pdf_file]})
+        line = json.loads(b"".join(response.streaming_content))
+        
+        assert 'busy' in line['error']
+        assert line['retry_after'] >= 1
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_jobs_wait_for_a_slot(self, mock_extract_text):
+        """Test background jobs queue for a slot instead of failing"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        release = self.occupy_slot()
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf")
+        
+        job_id = self.client.post('/api/extract/jobs/', {'pdf_file': pdf_file}).json()['job_id']
+        time.sleep(0.2)
+        assert self.client.get(f'/api/extract/jobs/{job_id}/').json()['status'] == 'running'
+        release.set()
+        
+        for _ in range(100):
+            job = self.client.get(f'/api/extract/jobs/{job_id}/').json()
+            if job['status'] == 'succeeded':
+                break
+            time.sleep(0.05)
+        assert job['results']['revenue'] == '1234567'
+
+
+class TestIsolationAPI(TestCase):
+    """Integration tests for extractions stopped by process isolation"""
+    
+    def setUp(self):
+        """Set up test client and an isolation deadline nothing can meet"""
+        self.client = Client()
+        self.api_url = '/api/extract/'
+        overrides = self.settings(EXTRACTION_ISOLATION=True, EXTRACTION_ISOLATION_DEADLINE=0.001)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+    
+    def post_filing(self, content):
+        return self.client.post(self.api_url, {
+            'pdf_file': SimpleUploadedFile("filing.pdf", content, content_type="application/pdf"),
+        })
+    
+    def test_deadline_then_quarantine(self):
+        """Test a breach gets 422 with its reason and retries are refused as quarantined"""
+        from core.synthetic import synthetic_filing
+        
+        content = synthetic_filing(pages=5)
+        response = self.post_filing(content)
+        
+        assert response.status_code == 422
+        assert response.json()['reason'] == 'timeout'
+        
+        with self.settings(EXTRACTION_ISOLATION_DEADLINE=60):
+            response = self.post_filing(content)
+        
+        assert response.status_code == 422
+        data = response.json()
+        assert data['reason'] == 'quarantined'
+        assert 'timeout' in data['error']
+
+
+class TestProfilingAPI(TestCase):
+    """Integration tests for per-request profiles"""
+    
+    def setUp(self):
+        """Set up test client and a profile token"""
+        self.client = Client()
+        overrides = self.settings(EXTRACTION_PROFILE_TOKEN='profile-token')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+    
+    @patch('core.views.extract_text_from_pdf')
+    def post_filing(self, mock_extract_text, url='/api/extract/', **headers):
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        return self.client.post(url, {
+            'pdf_file': SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf"),
+        }, **headers)
+    
+    def test_profile_on_request(self):
+        """Test the token in the header or query profiles the request and the profile can be read back"""
+        response = self.post_filing(HTTP_X_EXTRACTION_PROFILE='profile-token')
+        from_query = self.post_filing(url='/api/extract/?profile=profile-token')
+        
+        assert response.status_code == 200
+        assert response.json()['results']['revenue'] == '1234567'
+        profile_id = response['X-Profile-Id']
+        assert from_query['X-Profile-Id'] != profile_id
+        
+        listing = self.client.get('/api/profiles/', HTTP_X_EXTRACTION_PROFILE='profile-token')
+        assert listing.status_code == 200
+        profiles = listing.json()['profiles']
+        assert {profile['id'] for profile in profiles} == {profile_id, from_query['X-Profile-Id']}
+        assert profiles[0]['endpoint'] == '/api/extract/'
+        assert profiles[0]['reason'] == 'requested'
+        
+        report = self.client.get(f'/api/profiles/{profile_id}/?profile=profile-token&sort=tottime&limit=5')
+        assert report.status_code == 200
+        assert report['Content-Type'].startswith('text/plain')
+        assert 'Ordered by: internal time' in report.content.decode()
+        
+        download = self.client.get(f'/api/profiles/{profile_id}/?profile=profile-token&output=pstats')
+        assert download.status_code == 200
+        assert download['Content-Disposition'] == f'attachment; filename="{profile_id}.prof"'
+    
+    def test_not_profiled(self):
+        """Test requests without the token, or with a wrong one, are not profiled"""
+        assert 'X-Profile-Id' not in self.post_filing()
+        assert 'X-Profile-Id' not in self.post_filing(HTTP_X_EXTRACTION_PROFILE='wrong')
+    
+    def test_sampled(self):
+        """Test a sample rate of 1 profiles every request"""
+        with self.settings(EXTRACTION_PROFILE_TOKEN=None, EXTRACTION_PROFILE_SAMPLE_RATE=1.0):
+            response = self.post_filing()
+        
+        assert response['X-Profile-Id']
+    
+    def test_profiles_need_the_token(self):
+        """Test reading profiles without the token, or with none configured, is forbidden"""
+        assert self.client.get('/api/profiles/').status_code == 403
+        assert self.client.get('/api/profiles/?profile=wrong').status_code == 403
+        with self.settings(EXTRACTION_PROFILE_TOKEN=None):
+            assert self.client.get('/api/profiles/?profile=').status_code == 403
+    
+    def test_profile_validation(self):
+        """Test unknown profiles and bad report options"""
+        profile_id = self.post_filing(HTTP_X_EXTRACTION_PROFILE='profile-token')['X-Profile-Id']
+        headers = {'HTTP_X_EXTRACTION_PROFILE': 'profile-token'}
+        
+        assert self.client.get(f'/api/profiles/{"0" * 32}/', **headers).status_code == 404
+        assert self.client.get('/api/profiles/../', **headers).status_code == 404
+        for query in ('output=svg', 'sort=random', 'limit=many'):
+            response = self.client.get(f'/api/profiles/{profile_id}/?{query}', **headers)
+            assert response.status_code == 400
+
+class TestMetricsEndpoint(TestCase):
+    """Integration tests for the Prometheus metrics endpoint"""
+    
+    def setUp(self):
+        """Set up test client and empty metrics"""
+        from core import metrics
+        metrics.reset_metrics()
+        self.client = Client()
+    
+    @patch('core.views.extract_text_from_pdf')
+    def test_metrics_after_extraction(self, mock_extract_text):
+        """Test an extraction shows up in request, stage, upload, field and cache metrics"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+        content = b"Mock PDF content"
+        
+        for _ in range(2):
+            self.client.post('/api/extract/', {
+                'pdf_file': SimpleUploadedFile("test.pdf", content, content_type="application/pdf"),
+            })
+        response = self.client.get('/metrics')
+        
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        text = response.content.decode()
+        assert 'extraction_requests_total{endpoint="extract_financial_data",status="200"} 2' in text
+        assert 'extraction_request_duration_seconds_count{endpoint="extract_financial_data"} 2' in text
+        assert 'extraction_stage_duration_seconds_count{stage="upload"} 2' in text
+        assert 'extraction_stage_duration_seconds_count{stage="matching"} 1' in text
+        assert f'extraction_upload_bytes_sum {2 * len(content)}' in text
+        assert 'extraction_field_results_total{field="revenue",result="hit"} 1' in text
+        assert 'extraction_field_results_total{field="cos",result="miss"} 1' in text
+        assert 'extraction_cache_lookups_total{result="miss"} 1' in text
+        assert 'extraction_cache_lookups_total{result="memory"} 1' in text
+        assert 'process_resident_memory_bytes ' in text
+    
+    def test_metrics_get_only(self):
+        """Test the metrics endpoint only answers GET"""
+        assert self.client.post('/metrics').status_code == 405
+
 
 class TestAPIErrorHandling(TestCase):
     """Test API error handling scenarios"""
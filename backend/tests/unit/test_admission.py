@@ -0,0 +1,215 @@
+import threading
+import time
+import pytest
+from core import admission, metrics
+from core.admission import QUEUE_FULL, QUEUE_TIMEOUT, AdmissionController, Overloaded
+from core.cancellation import ExtractionCancelled
+
+
+def hold_slot(controller, cost=1, **kwargs):
+    """Admit an extraction on a thread and keep it running until released"""
+    admitted = threading.Event()
+    release = threading.Event()
+
+    def run():
+        with controller.admit(cost, **kwargs):
+            admitted.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return admitted, release, thread
+
+
+class TestAdmissionController:
+    """Test concurrency, cost budget and queue limits"""
+
+    def setup_method(self):
+        metrics.reset_metrics()
+
+    def test_admits_up_to_max_concurrent(self):
+        """Test extractions run straight away while there is room"""
+        controller = AdmissionController(max_concurrent=2, max_queued=0)
+
+        with controller.admit():
+            with controller.admit():
+                assert controller.active == 2
+        assert controller.active == 0
+
+    def test_full_queue_rejects_with_429(self):
+        """Test a request is turned away at once when the queue is full"""
+        controller = AdmissionController(max_concurrent=1, max_queued=0)
+
+        with controller.admit():
+            start = time.monotonic()
+            with pytest.raises(Overloaded) as excinfo:
+                with controller.admit():
+                    pass
+
+        assert time.monotonic() - start < 0.1
+        assert excinfo.value.reason == QUEUE_FULL
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.retry_after >= 1
+        assert metrics.ADMISSION_REJECTIONS.value(reason=QUEUE_FULL) == 1
+
+    def test_queue_timeout_rejects_with_503(self):
+        """Test a queued request gives up after the queue timeout"""
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+
+        with controller.admit():
+            with pytest.raises(Overloaded) as excinfo:
+                with controller.admit():
+                    pass
+
+        assert excinfo.value.reason == QUEUE_TIMEOUT
+        assert excinfo.value.status_code == 503
+        assert controller.queued == 0
+        assert metrics.ADMISSION_REJECTIONS.value(reason=QUEUE_TIMEOUT) == 1
+
+    def test_queued_request_runs_when_slot_frees(self):
+        """Test a queued request is admitted once a running one finishes"""
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+        admitted, release, thread = hold_slot(controller)
+        assert admitted.wait(1)
+
+        threading.Timer(0.05, release.set).start()
+        with controller.admit():
+            assert controller.active == 1
+        thread.join()
+
+        assert metrics.ADMISSION_WAIT.count() == 1
+
+    def test_cost_budget_limits_concurrent_pages(self):
+        """Test an extraction waits while the running ones hold the page budget"""
+        controller = AdmissionController(max_concurrent=4, max_queued=1, cost_budget=100, queue_timeout=0.05)
+
+        with controller.admit(60):
+            with controller.admit(40):
+                assert controller.cost_in_use == 100
+            with pytest.raises(Overloaded):
+                with controller.admit(50):
+                    pass
+
+    def test_cost_over_budget_runs_alone(self):
+        """Test an extraction costing more than the whole budget is still admitted"""
+        controller = AdmissionController(max_concurrent=4, max_queued=0, cost_budget=100)
+
+        with controller.admit(500):
+            assert controller.cost_in_use == 100
+
+    def test_queue_is_first_come_first_served(self):
+        """Test a small request does not overtake a large one queued before it"""
+        controller = AdmissionController(max_concurrent=4, max_queued=2, cost_budget=100, queue_timeout=5)
+        admitted, release, thread = hold_slot(controller, 80)
+        assert admitted.wait(1)
+        order = []
+
+        def queued(name, cost):
+            with controller.admit(cost):
+                order.append(name)
+
+        large = threading.Thread(target=queued, args=('large', 60))
+        large.start()
+        while controller.queued < 1:
+            time.sleep(0.01)
+        small = threading.Thread(target=queued, args=('small', 10))
+        small.start()
+        while controller.queued < 2:
+            time.sleep(0.01)
+
+        release.set()
+        for waiting in (thread, large, small):
+            waiting.join(5)
+
+        assert order == ['large', 'small']
+
+    def test_cancelled_while_queued(self):
+        """Test a cancelled request leaves the queue"""
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        with controller.admit():
+            with pytest.raises(ExtractionCancelled):
+                with controller.admit(cancel_event=cancel_event):
+                    pass
+
+        assert controller.queued == 0
+
+    def test_wait_forever_ignores_queue_limit(self):
+        """Test background extractions queue even when the queue is full"""
+        controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=0.01)
+        admitted, release, thread = hold_slot(controller)
+        assert admitted.wait(1)
+
+        threading.Timer(0.1, release.set).start()
+        with controller.admit(wait_forever=True):
+            pass
+        thread.join()
+
+    def test_retry_after_follows_extraction_time(self):
+        """Test Retry-After grows with the queue and the average extraction time"""
+        controller = AdmissionController(max_concurrent=2, max_queued=4)
+        controller.average_seconds = 10
+
+        assert controller.retry_after() == 5
+        controller._waiting.extend([object()] * 3)
+        assert controller.retry_after() == 20
+
+
+class TestProcessAdmission:
+    """Test the settings-driven process-wide controller"""
+
+    def test_disabled(self, settings):
+        """Test admission control can be turned off"""
+        settings.EXTRACTION_MAX_CONCURRENT = None
+
+        assert admission.get_admission_controller() is None
+        with admission.admit(10):
+            pass
+
+    def test_follows_settings(self, settings):
+        """Test the controller is rebuilt when the settings change"""
+        settings.EXTRACTION_MAX_CONCURRENT = 3
+        settings.EXTRACTION_MAX_QUEUED = 7
+
+        controller = admission.get_admission_controller()
+
+        assert (controller.max_concurrent, controller.max_queued) == (3, 7)
+        assert admission.get_admission_controller() is controller
+
+    def test_background_waits_instead_of_rejecting(self, settings):
+        """Test background() admissions queue past a full queue"""
+        settings.EXTRACTION_MAX_CONCURRENT = 1
+        settings.EXTRACTION_MAX_QUEUED = 0
+        controller = admission.get_admission_controller()
+        admitted, release, thread = hold_slot(controller)
+        assert admitted.wait(1)
+
+        with pytest.raises(Overloaded):
+            with admission.admit():
+                pass
+        threading.Timer(0.05, release.set).start()
+        with admission.background():
+            with admission.admit():
+                pass
+        thread.join()
+
+    def test_extraction_cost(self, settings):
+        """Test costs are page counts, estimated from the size when unknown"""
+        settings.EXTRACTION_BYTES_PER_PAGE = 1000
+
+        assert admission.extraction_cost(12, size=10 ** 6) == 12
+        assert admission.extraction_cost(None, size=2500) == 3
+        assert admission.extraction_cost(None) == 1
+
+    def test_metrics_report_queue_state(self, settings):
+        """Test the running, queued and cost gauges"""
+        settings.EXTRACTION_MAX_CONCURRENT = 2
+
+        with admission.admit(25):
+            rendered = metrics.render()
+
+        assert 'extraction_admission_running 1' in rendered
+        assert 'extraction_admission_queued 0' in rendered
+        assert 'extraction_admission_cost_in_use 25' in rendered
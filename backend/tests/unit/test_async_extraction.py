@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory
+from core.cancellation import raise_if_cancelled
+from core.disconnect import DISCONNECT_SCOPE_KEY, DisconnectMiddleware, disconnect_event
+from core.views import CLIENT_CLOSED_REQUEST, extract_financial_data_async
+
+
+def make_request(disconnected=None):
+    request = AsyncRequestFactory().post('/api/extract/async/', {
+        'pdf_file': SimpleUploadedFile("test.pdf", b"Mock PDF content", content_type="application/pdf"),
+    })
+    if disconnected is not None:
+        request.scope[DISCONNECT_SCOPE_KEY] = disconnected
+    return request
+
+
+class TestDisconnectMiddleware:
+    """Test client disconnects are recorded in the ASGI scope"""
+
+    def test_disconnect_after_body_sets_event(self):
+        """Test a disconnect arriving after the body reaches the app"""
+        async def app(scope, receive, send):
+            message = await receive()
+            assert message == {'type': 'http.request', 'body': b'pdf', 'more_body': False}
+            await asyncio.wait_for(scope[DISCONNECT_SCOPE_KEY].wait(), 1)
+            seen.append('disconnected')
+
+        async def run():
+            messages = asyncio.Queue()
+            await messages.put({'type': 'http.request', 'body': b'pdf', 'more_body': False})
+            asyncio.get_running_loop().call_later(0.05, messages.put_nowait, {'type': 'http.disconnect'})
+            await DisconnectMiddleware(app)({'type': 'http'}, messages.get, None)
+
+        seen = []
+        asyncio.run(run())
+
+        assert seen == ['disconnected']
+
+    def test_connected_client_leaves_event_unset(self):
+        """Test the event stays clear while the client is connected, and the watcher stops with the app"""
+        async def app(scope, receive, send):
+            await receive()
+            await asyncio.sleep(0.01)
+            seen.append(scope[DISCONNECT_SCOPE_KEY].is_set())
+
+        async def run():
+            messages = asyncio.Queue()
+            await messages.put({'type': 'http.request', 'body': b'', 'more_body': False})
+            await DisconnectMiddleware(app)({'type': 'http'}, messages.get, None)
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        seen = []
+        pending = asyncio.run(run())
+
+        assert seen == [False]
+        assert all(task.cancelled() or task.done() for task in pending)
+
+    def test_no_event_outside_middleware(self):
+        """Test requests not served through the middleware have no event"""
+        assert disconnect_event(make_request()) is None
+
+
+class TestAsyncExtractionView:
+    """Test the async extraction view"""
+
+    @patch('core.views.extract_text_from_pdf')
+    def test_extracts_on_executor(self, mock_extract_text):
+        """Test the extraction runs off the event loop and returns the usual payload"""
+        threads = []
+
+        def extract_text(pdf_file, **kwargs):
+            threads.append(threading.current_thread().name)
+            return "Total revenues $1,234,567"
+
+        mock_extract_text.side_effect = extract_text
+
+        response = asyncio.run(extract_financial_data_async(make_request(asyncio.Event())))
+
+        assert response.status_code == 200
+        assert threads and all(name.startswith('extraction-async') for name in threads)
+
+    @patch('core.views.run_extraction')
+    def test_disconnect_cancels_extraction(self, mock_run_extraction):
+        """Test a client disconnect sets the extraction's cancel event"""
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        def run_extraction(pdf_file, page_numbers, cancel_event, **kwargs):
+            started.set()
+            while True:
+                try:
+                    raise_if_cancelled(cancel_event)
+                except Exception:
+                    cancelled.set()
+                    raise
+                cancel_event.wait(0.01)
+
+        mock_run_extraction.side_effect = run_extraction
+
+        async def run():
+            disconnected = asyncio.Event()
+            view = asyncio.ensure_future(extract_financial_data_async(make_request(disconnected)))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            disconnected.set()
+            return await view
+
+        response = asyncio.run(run())
+
+        assert response.status_code == CLIENT_CLOSED_REQUEST
+        assert cancelled.wait(5)
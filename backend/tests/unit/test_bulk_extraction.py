@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+import pytest
+from django.core.management import CommandError, call_command
+from core.bulk import ResultWriter, completed_paths, extract_file, find_pdfs, output_format
+from core.synthetic import synthetic_filing
+
+
+@pytest.fixture
+def filings(tmp_path):
+    """A directory of three small filings, a nested one, a broken PDF and a non-PDF"""
+    directory = tmp_path / 'filings'
+    (directory / 'nested').mkdir(parents=True)
+    for name, seed in (('a.pdf', 1), ('b.PDF', 2), ('nested/c.pdf', 3)):
+        (directory / name).write_bytes(synthetic_filing(pages=2, statement_page=2, seed=seed))
+    (directory / 'broken.pdf').write_bytes(b'not a pdf')
+    (directory / 'notes.txt').write_text('not a filing')
+    return directory
+
+
+def run_command(*args):
+    stderr = io.StringIO()
+    call_command('extract_batch', *args, '--workers', '0', stderr=stderr)
+    return stderr.getvalue()
+
+
+class TestFindPdfs:
+    """Test input discovery"""
+
+    def test_directory(self, filings):
+        """Test a directory gives its PDFs, case-insensitively, without subdirectories"""
+        paths = find_pdfs([str(filings)])
+
+        assert [path.rsplit('/', 1)[1] for path in paths] == ['a.pdf', 'b.PDF', 'broken.pdf']
+
+    def test_recursive_directory(self, filings):
+        """Test --recursive also finds nested PDFs"""
+        assert str(filings / 'nested' / 'c.pdf') in find_pdfs([str(filings)], recursive=True)
+
+    def test_glob_and_duplicates(self, filings):
+        """Test glob patterns and files given twice are de-duplicated"""
+        paths = find_pdfs([str(filings / '*.pdf'), str(filings / 'a.pdf')])
+
+        assert [path.rsplit('/', 1)[1] for path in paths] == ['a.pdf', 'broken.pdf']
+
+    def test_output_format(self):
+        """Test the format follows the extension unless given"""
+        assert output_format('results.csv') == 'csv'
+        assert output_format('results.jsonl') == 'jsonl'
+        assert output_format('results.csv', 'jsonl') == 'jsonl'
+
+
+class TestResultFiles:
+    """Test incremental output and resume bookkeeping"""
+
+    def test_extract_file_reports_errors(self, filings):
+        """Test a broken PDF becomes an error record instead of raising"""
+        record = extract_file(str(filings / 'broken.pdf'))
+
+        assert record['error'].startswith('Error processing PDF')
+        assert record['results'] == {}
+
+    def test_completed_paths_skip_errors(self, tmp_path):
+        """Test only records without an error count as done"""
+        output = tmp_path / 'results.jsonl'
+        output.write_text(
+            json.dumps({'path': '/a.pdf', 'error': None}) + '\n'
+            + json.dumps({'path': '/b.pdf', 'error': 'Error processing PDF: bad'}) + '\n'
+        )
+
+        assert completed_paths(str(output), 'jsonl') == {'/a.pdf'}
+
+    def test_partial_last_line_is_cut(self, tmp_path):
+        """Test a line cut off by an interruption is dropped before appending"""
+        output = tmp_path / 'results.jsonl'
+        output.write_text(json.dumps({'path': '/a.pdf', 'error': None}) + '\n{"path": "/b.p')
+
+        assert completed_paths(str(output), 'jsonl') == {'/a.pdf'}
+        assert output.read_text().endswith('}\n')
+
+    def test_csv_columns_must_match(self, tmp_path):
+        """Test resuming a CSV written with other fields is refused"""
+        output = tmp_path / 'results.csv'
+        ResultWriter(str(output), 'csv', ['revenue']).close()
+
+        with pytest.raises(ValueError, match='columns'):
+            ResultWriter(str(output), 'csv', ['revenue', 'cos'])
+
+
+class TestExtractBatchCommand:
+    """Test manage.py extract_batch"""
+
+    def test_csv_output(self, filings, tmp_path):
+        """Test one row per PDF with the field values and errors"""
+        output = tmp_path / 'results.csv'
+
+        log = run_command(str(filings), '--recursive', '--output', str(output))
+
+        with open(output, newline='') as f:
+            rows = {row['path'].rsplit('/', 1)[1]: row for row in csv.DictReader(f)}
+        assert set(rows) == {'a.pdf', 'b.PDF', 'broken.pdf', 'c.pdf'}
+        assert rows['a.pdf']['revenue'] == '307394'
+        assert rows['a.pdf']['operating_income'] == '84293'
+        assert rows['broken.pdf']['error'].startswith('Error processing PDF')
+        assert 'Extracted 4 files (1 failed)' in log
+        assert '[4/4]' in log
+
+    def test_jsonl_output_with_fields(self, filings, tmp_path):
+        """Test JSON lines with only the requested fields"""
+        output = tmp_path / 'results.jsonl'
+
+        run_command(str(filings / 'a.pdf'), '--output', str(output), '--fields', 'revenue')
+
+        record = json.loads(output.read_text())
+        assert record['results'] == {'revenue': '307394'}
+        assert record['periods'] == {'2023': {'revenue': '307394'}, '2024': {'revenue': '350018'}}
+        assert record['cache'] == 'miss'
+        assert len(record['content_hash']) == 64
+
+    def test_resume_skips_finished_files(self, filings, tmp_path):
+        """Test a resumed run only extracts new and failed files"""
+        output = tmp_path / 'results.jsonl'
+        run_command(str(filings / 'a.pdf'), str(filings / 'broken.pdf'), '--output', str(output))
+
+        log = run_command(str(filings), '--output', str(output), '--resume')
+
+        paths = [json.loads(line)['path'].rsplit('/', 1)[1] for line in output.read_text().splitlines()]
+        assert '3 PDFs found, 1 already in' in log
+        assert sorted(paths) == ['a.pdf', 'b.PDF', 'broken.pdf', 'broken.pdf']
+
+    def test_existing_output_needs_resume(self, filings, tmp_path):
+        """Test an existing output file is not overwritten or appended to by accident"""
+        output = tmp_path / 'results.jsonl'
+        output.write_text('{}\n')
+
+        with pytest.raises(CommandError, match='--resume'):
+            run_command(str(filings), '--output', str(output))
+
+    def test_invalid_fields(self, filings, tmp_path):
+        """Test unknown fields are rejected"""
+        with pytest.raises(CommandError, match='--fields'):
+            run_command(str(filings), '--output', str(tmp_path / 'results.csv'), '--fields', 'ebitda')
@@ -0,0 +1,96 @@
+import hashlib
+import importlib.util
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from core.cache import (
+    cache_result,
+    code_fingerprint,
+    extraction_cache_key,
+    get_cached_result,
+    hash_uploaded_file
+)
+
+
+class TestContentHashing:
+    """Test hashing of uploaded documents"""
+
+    def test_hash_uploaded_file(self):
+        """Test the digest matches SHA-256 of the bytes and the file is rewound"""
+        pdf_file = SimpleUploadedFile("test.pdf", b"Mock PDF content")
+
+        assert hash_uploaded_file(pdf_file) == hashlib.sha256(b"Mock PDF content").hexdigest()
+        assert pdf_file.read() == b"Mock PDF content"
+
+    def test_hash_file_path(self, tmp_path):
+        """Test hashing a document on disk"""
+        path = tmp_path / 'test.pdf'
+        path.write_bytes(b"Mock PDF content")
+
+        assert hash_uploaded_file(str(path)) == hashlib.sha256(b"Mock PDF content").hexdigest()
+
+
+class TestCacheKeys:
+    """Test cache key versioning"""
+
+    def test_key_depends_on_version_and_options(self):
+        """Test extractor version and request options change the key"""
+        key = extraction_cache_key('abc', 'v1', pages='auto')
+
+        assert key == extraction_cache_key('abc', 'v1', pages='auto')
+        assert key != extraction_cache_key('abc', 'v2', pages='auto')
+        assert key != extraction_cache_key('abc', 'v1', pages=[3])
+        assert key != extraction_cache_key('abd', 'v1', pages='auto')
+
+    def test_code_fingerprint_tracks_patterns(self):
+        """Test changing a pattern changes the fingerprint"""
+        def matcher_v1(text):
+            return ['revenue[:\\s]*([0-9,]+)']
+
+        def matcher_v2(text):
+            return ['revenues?[:\\s]*([0-9,]+)']
+
+        def matcher_v1_copy(text):
+            return ['revenue[:\\s]*([0-9,]+)']
+
+        assert code_fingerprint(matcher_v1) != code_fingerprint(matcher_v2)
+        assert code_fingerprint(matcher_v1) == code_fingerprint(matcher_v1_copy)
+
+    def test_code_fingerprint_tracks_whole_modules(self, tmp_path):
+        """Test a module's fingerprint covers every helper, but not comments or line numbers"""
+        def load(name, source):
+            path = tmp_path / f'{name}.py'
+            path.write_text(source)
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+
+        source = 'class Scanner:\n    def _best(self, values):\n        return min(values)\n'
+        original = load('scanner_v1', source)
+        reformatted = load('scanner_v1_copy', '# Picks a value\n\n' + source)
+        changed = load('scanner_v2', source.replace('min', 'max'))
+
+        assert code_fingerprint(original) == code_fingerprint(reformatted)
+        assert code_fingerprint(original) != code_fingerprint(changed)
+
+
+class TestCacheTiers:
+    """Test the memory and disk cache tiers"""
+
+    def test_cache_miss(self):
+        """Test unknown keys miss"""
+        assert get_cached_result('extraction:missing') == (None, None)
+
+    def test_cache_hit_from_memory(self):
+        """Test stored results are served from memory"""
+        cache_result('extraction:key', {'revenue': '1'})
+
+        assert get_cached_result('extraction:key') == ({'revenue': '1'}, 'memory')
+
+    def test_disk_hit_is_promoted_to_memory(self):
+        """Test results surviving only on disk are found and promoted"""
+        cache_result('extraction:key', {'revenue': '1'})
+        caches['extraction_memory'].clear()
+
+        assert get_cached_result('extraction:key') == ({'revenue': '1'}, 'disk')
+        assert get_cached_result('extraction:key') == ({'revenue': '1'}, 'memory')
@@ -0,0 +1,150 @@
+from datetime import date
+import pytest
+from django.db import connection
+from core import history
+from core.models import Extraction
+
+pytestmark = pytest.mark.django_db
+
+RESULTS = {'revenue': '307394', 'cos': '133332', 'operating_income': '84293'}
+
+
+@pytest.fixture(autouse=True)
+def history_on(settings):
+    settings.EXTRACTION_HISTORY = True
+
+
+def record(content_hash='a' * 64, results=RESULTS, **kwargs):
+    return history.record_extraction(content_hash, results, **kwargs)
+
+
+class TestRecordExtraction:
+    """Test storing extraction results"""
+
+    def test_stores_result(self):
+        """Test a result is stored with its request options and time"""
+        extraction = record(filename='goog.pdf', period_end_date='2024-12-31', fields=['revenue', 'cos'],
+                            pages=[45, 46], seconds=1.23456)
+
+        stored = Extraction.objects.get(id=extraction.id)
+        assert stored.results == RESULTS
+        assert stored.period_end_date == date(2024, 12, 31)
+        assert (stored.fields, stored.pages, stored.engine) == ('revenue,cos', '45,46', 'pdfplumber')
+        assert stored.seconds == 1.235
+
+    def test_long_page_list(self):
+        """Test a page list as long as parse_page_range allows is stored whole and found again"""
+        pages = list(range(1, 10001, 2))
+        record(pages=pages)
+
+        assert Extraction._meta.get_field('pages').max_length is None
+        assert Extraction.objects.get().pages == ','.join(str(page) for page in pages)
+        assert history.find_result('a' * 64, pages=pages) == RESULTS
+
+    def test_same_extraction_updates_row(self):
+        """Test re-extracting with the same options updates the row instead of adding one"""
+        record(seconds=2.0)
+        record(results={**RESULTS, 'revenue': '1'}, seconds=3.0)
+
+        assert Extraction.objects.count() == 1
+        assert Extraction.objects.get().results['revenue'] == '1'
+
+    def test_cache_hit_keeps_parse_time(self):
+        """Test a cache hit does not overwrite the stored parse time"""
+        record(seconds=2.0)
+        record(cache_status='hit', seconds=0.001)
+
+        assert Extraction.objects.get().seconds == 2.0
+
+    def test_cache_hit_adds_missing_row(self):
+        """Test a result cached before it was stored still gets a row"""
+        record(cache_status='hit', seconds=0.001)
+
+        assert Extraction.objects.get().cache == 'hit'
+
+    def test_other_options_get_own_row(self):
+        """Test different periods, engines and modes are kept apart"""
+        record(period_end_date='2023-12-31')
+        record(period_end_date='2024-12-31')
+        record(engine='pdfium')
+        record(mode='table')
+
+        assert Extraction.objects.count() == 4
+
+    def test_off(self, settings):
+        """Test nothing is stored with EXTRACTION_HISTORY off"""
+        settings.EXTRACTION_HISTORY = False
+
+        assert record() is None
+        assert Extraction.objects.count() == 0
+
+    def test_database_error_is_logged(self, caplog):
+        """Test a failed write is logged, not raised"""
+        assert record(results=object()) is None
+        assert 'Could not store extraction' in caplog.text
+
+
+class TestQueryExtractions:
+    """Test history filters and keyset pages"""
+
+    def test_filters(self):
+        """Test hash, period range, field presence, engine and mode filters"""
+        full = record('a' * 64, period_end_date='2024-12-31')
+        partial = record('b' * 64, {'revenue': '10', 'cos': '', 'operating_income': ''},
+                         period_end_date='2023-12-31')
+        revenue_only = record('c' * 64, {'revenue': '20'}, fields=['revenue'], engine='pdfium')
+
+        def ids(**filters):
+            return set(history.query_extractions(**filters).values_list('id', flat=True))
+
+        assert ids(content_hash='b' * 64) == {partial.id}
+        assert ids(period_from='2024-01-01') == {full.id}
+        assert ids(period_from='2023-01-01', period_to='2023-12-31') == {partial.id}
+        assert ids(has_fields=['revenue']) == {full.id, partial.id, revenue_only.id}
+        assert ids(has_fields=['cos']) == {full.id}
+        assert ids(engine='pdfium') == {revenue_only.id}
+
+    def test_pages(self):
+        """Test pages run newest first and the cursor continues below the last id"""
+        created = [record(chr(ord('a') + i) * 64).id for i in range(5)]
+
+        first, cursor = history.page_of(history.query_extractions(), 2)
+        second, cursor = history.page_of(history.query_extractions(), 2, cursor)
+        last, cursor = history.page_of(history.query_extractions(), 2, cursor)
+
+        assert [row_id for row_id, _ in first + second + last] == created[::-1]
+        assert cursor is None
+
+    def test_etag_changes_with_rows(self):
+        """Test a page's ETag changes when one of its rows is updated"""
+        record(seconds=1.0)
+        page, _ = history.page_of(history.query_extractions(), 10)
+        before = history.page_etag(page, 'query')
+
+        record(results={'revenue': '1'}, seconds=1.0)
+        page, _ = history.page_of(history.query_extractions(), 10)
+
+        assert history.page_etag(page, 'query') != before
+        assert history.page_etag(page, 'query') == history.page_etag(page, 'query')
+
+
+class TestSQLiteWAL:
+    """Test SQLite connections are switched to WAL"""
+
+    def test_file_database_in_wal_mode(self, tmp_path):
+        """Test a new connection to a database file gets WAL and a busy timeout"""
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')})
+        try:
+            wrapper.ensure_connection()
+            with wrapper.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+                cursor.execute('PRAGMA busy_timeout')
+                busy_timeout = cursor.fetchone()[0]
+        finally:
+            wrapper.close()
+
+        assert journal_mode == 'wal'
+        assert busy_timeout > 0
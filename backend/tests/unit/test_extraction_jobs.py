@@ -0,0 +1,216 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from core import jobs
+from core.cancellation import ExtractionCancelled, raise_if_cancelled
+
+
+def make_upload(content=b"Mock PDF content"):
+    return SimpleUploadedFile("test.pdf", content, content_type="application/pdf")
+
+
+def wait_for_job(job_id, timeout=5):
+    """Poll until the job finishes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get_job(job_id)
+        if job['status'] in jobs.FINISHED_STATUSES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+class TestExtractionJobs:
+    """Test the background job registry"""
+
+    def test_job_runs_task_on_spooled_copy(self):
+        """Test the task gets a path to a copy of the upload and its result is stored"""
+        seen = {}
+
+        def task(path, cancel_event=None, content_hash=None, page_numbers=None):
+            with open(path, 'rb') as f:
+                seen['content'] = f.read()
+            seen['content_hash'] = content_hash
+            return {'results': {'revenue': '1'}, 'cache': 'miss'}
+
+        job = jobs.submit_job(task, make_upload(), period_end_date='2024-12-31', page_numbers=[3])
+        assert job['status'] == jobs.QUEUED
+
+        finished = wait_for_job(job['job_id'])
+
+        assert finished['status'] == jobs.SUCCEEDED
+        assert finished['results'] == {'revenue': '1'}
+        assert finished['period_end_date'] == '2024-12-31'
+        assert seen['content'] == b"Mock PDF content"
+        assert seen['content_hash'] == hashlib.sha256(b"Mock PDF content").hexdigest()
+
+    def test_spooled_copy_removed_after_job(self):
+        """Test the spooled upload is deleted once the job is done"""
+        paths = []
+
+        def task(path, **kwargs):
+            paths.append(path)
+            return {}
+
+        job = jobs.submit_job(task, make_upload())
+        wait_for_job(job['job_id'])
+
+        assert not os.path.exists(paths[0])
+
+    def test_failed_job_records_error(self):
+        """Test a task exception marks the job failed"""
+        def task(path, **kwargs):
+            raise ValueError('broken PDF')
+
+        job = jobs.submit_job(task, make_upload())
+        finished = wait_for_job(job['job_id'])
+
+        assert finished['status'] == jobs.FAILED
+        assert 'broken PDF' in finished['error']
+
+    def test_cancel_running_job(self):
+        """Test cancelling a running job stops it at its next cancellation check"""
+        started = threading.Event()
+
+        def task(path, **kwargs):
+            started.set()
+            while True:
+                raise_if_cancelled(kwargs['cancel_event'])
+                time.sleep(0.01)
+
+        job = jobs.submit_job(task, make_upload())
+        assert started.wait(5)
+
+        jobs.cancel_job(job['job_id'])
+
+        assert wait_for_job(job['job_id'])['status'] == jobs.CANCELLED
+
+    def test_cancel_queued_job(self):
+        """Test a job that has not started is cancelled without running"""
+        release = threading.Event()
+        ran = []
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        with patch('core.jobs._get_executor', return_value=executor):
+            blocker = jobs.submit_job(lambda path, **kwargs: release.wait(5) and {}, make_upload())
+            queued = jobs.submit_job(lambda path, **kwargs: ran.append(path) or {}, make_upload())
+
+            cancelled = jobs.cancel_job(queued['job_id'])
+            release.set()
+            wait_for_job(blocker['job_id'])
+
+        executor.shutdown(wait=True)
+        assert cancelled['status'] == jobs.CANCELLED
+        assert jobs.get_job(queued['job_id'])['status'] == jobs.CANCELLED
+        assert ran == []
+
+    def test_cancel_queued_job_removes_spooled_copy(self, settings, tmp_path):
+        """Test a job cancelled before it ran leaves nothing in the spool directory"""
+        settings.EXTRACTION_SPOOL_DIR = str(tmp_path / 'spool')
+        release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        with patch('core.jobs._get_executor', return_value=executor):
+            blocker = jobs.submit_job(lambda path, **kwargs: release.wait(5) and {}, make_upload())
+            queued = jobs.submit_job(lambda path, **kwargs: {}, make_upload())
+            jobs.cancel_job(queued['job_id'])
+            release.set()
+            wait_for_job(blocker['job_id'])
+
+        executor.shutdown(wait=True)
+        assert os.listdir(settings.EXTRACTION_SPOOL_DIR) == []
+
+    def test_cancel_request_from_another_process(self):
+        """Test a cancel recorded only in the job directory reaches the running job"""
+        cancel_event = jobs.JobCancelEvent('a' * 32)
+        assert not cancel_event.is_set()
+
+        jobs._write_atomic(jobs._job_path('a' * 32, '.cancel'), '')
+        cancel_event._last_poll = 0.0
+
+        assert cancel_event.is_set()
+
+    def test_unknown_job(self):
+        """Test unknown job ids, and ids that are not job ids, give None"""
+        assert jobs.get_job('missing') is None
+        assert jobs.get_job('0' * 32) is None
+        assert jobs.get_job('../../etc/passwd') is None
+        assert jobs.cancel_job('missing') is None
+
+    def test_finished_jobs_are_forgotten(self):
+        """Test finished and cancelled jobs leave nothing in the in-process registries"""
+        release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        with patch('core.jobs._get_executor', return_value=executor):
+            blocker = jobs.submit_job(lambda path, **kwargs: release.wait(5) and {}, make_upload())
+            queued = jobs.submit_job(lambda path, **kwargs: {}, make_upload())
+            jobs.cancel_job(queued['job_id'])
+            release.set()
+            executor.shutdown(wait=True)
+        fast = jobs.submit_job(lambda path, **kwargs: {}, make_upload())
+        wait_for_job(fast['job_id'])
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and fast['job_id'] in jobs._futures:
+            time.sleep(0.01)
+        for job in (blocker, queued, fast):
+            assert job['job_id'] not in jobs._futures
+            assert job['job_id'] not in jobs._cancel_events
+
+    def test_burst_keeps_every_job(self):
+        """Test a burst of jobs does not evict the state of earlier ones"""
+        submitted = [jobs.submit_job(lambda path, **kwargs: {}, make_upload()) for _ in range(50)]
+
+        for job in submitted:
+            assert wait_for_job(job['job_id'])['status'] == jobs.SUCCEEDED
+
+    def test_sweep_removes_expired_jobs(self, settings):
+        """Test jobs untouched for EXTRACTION_JOB_TTL are removed with their cancel flag"""
+        settings.EXTRACTION_JOB_TTL = 60
+        old = wait_for_job(jobs.submit_job(lambda path, **kwargs: {}, make_upload())['job_id'])
+        recent = wait_for_job(jobs.submit_job(lambda path, **kwargs: {}, make_upload())['job_id'])
+        jobs._write_atomic(jobs._job_path(old['job_id'], '.cancel'), '')
+        past = time.time() - 120
+        os.utime(jobs._job_path(old['job_id']), (past, past))
+
+        assert jobs.sweep_jobs() == 1
+        assert jobs.get_job(old['job_id']) is None
+        assert not os.path.exists(jobs._job_path(old['job_id'], '.cancel'))
+        assert jobs.get_job(recent['job_id'])['status'] == jobs.SUCCEEDED
+
+
+class TestCancellablePageLoop:
+    """Test cancellation inside text extraction"""
+
+    @patch('core.views.pdfplumber.open')
+    def test_extraction_stops_between_pages(self, mock_pdfplumber_open):
+        """Test a set cancel event stops extract_text_from_pdf"""
+        from core.views import extract_text_from_pdf
+
+        cancel_event = threading.Event()
+        extracted = []
+
+        class Page:
+            def __init__(self, n):
+                self.n = n
+
+            def extract_text(self):
+                extracted.append(self.n)
+                cancel_event.set()
+                return f'Page {self.n}'
+
+            def close(self):
+                pass
+
+        mock_pdfplumber_open.return_value.__enter__.return_value.pages = [Page(1), Page(2)]
+
+        with pytest.raises(ExtractionCancelled):
+            extract_text_from_pdf('test.pdf', parallel=False, cancel_event=cancel_event)
+
+        assert extracted == [1]
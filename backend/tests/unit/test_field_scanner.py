@@ -0,0 +1,157 @@
+import random
+import re
+import pytest
+from core.scanner import FieldScanner
+from core.views import FIELD_PATTERNS, clean_financial_value
+
+
+def reference_scan(text, field_patterns):
+    """The per-pattern re.findall lookup the scanner replaces"""
+    results = {}
+    for field, patterns in field_patterns.items():
+        results[field] = ""
+        for pattern in patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                value = matches[0][-1] if isinstance(matches[0], tuple) else matches[0]
+                cleaned_value = clean_financial_value(value)
+                if cleaned_value:
+                    results[field] = cleaned_value
+                    break
+    return results
+
+
+@pytest.fixture
+def scanner():
+    return FieldScanner(FIELD_PATTERNS, clean=clean_financial_value)
+
+
+class TestFieldScanner:
+    """Test the single-pass multi-field scanner"""
+
+    def test_scan_all_fields(self, scanner):
+        """Test every field is resolved from one scan"""
+        text = "Total revenues $ 307,394 Costs and expenses: Cost of revenues 133,332 Income from operations 84,293"
+
+        assert scanner.scan(text) == {
+            'revenue': '307394',
+            'cos': '133332',
+            'operating_income': '84293'
+        }
+
+    def test_pattern_priority_beats_position(self, scanner):
+        """Test a higher-priority pattern wins even when it matches later"""
+        text = "Revenue: 100 ... Net sales 200 ... Total revenues $ 300"
+
+        assert scanner.scan(text)['revenue'] == '300'
+
+    def test_overlapping_labels(self, scanner):
+        """Test one field's label inside another's is still found"""
+        text = "Cost of revenues $ 5,000"
+
+        # "revenues $ 5,000" also satisfies a revenue pattern
+        assert scanner.scan(text) == reference_scan(text, FIELD_PATTERNS)
+        assert scanner.scan(text)['revenue'] == '5000'
+
+    def test_unusable_match_falls_through_to_next_pattern(self, scanner):
+        """Test a first match that cleans to nothing defers to the next pattern"""
+        text = "Total revenues $ , Net sales 2,000"
+
+        assert scanner.scan(text)['revenue'] == '2000'
+
+    def test_start_anchored_pattern(self, scanner):
+        """Test "^" patterns only match at the start of the text"""
+        assert scanner.scan("Cost of revenues 126,203 and more")['cos'] == '126203'
+        assert scanner.scan("x Cost of revenues 126,203")['cos'] == ""
+
+    def test_requested_fields_only(self, scanner):
+        """Test scanning a subset of fields"""
+        text = "Total revenues $ 307,394 Income from operations 84,293"
+
+        assert scanner.scan(text, fields=['operating_income']) == {'operating_income': '84293'}
+
+    def test_case_and_non_ascii_text(self, scanner):
+        """Test mixed case and non-ASCII characters match like IGNORECASE"""
+        text = "Company’s TOTAL REVENUES $ 1,000 — İstanbul ſegment"
+
+        assert scanner.scan(text) == reference_scan(text, FIELD_PATTERNS)
+        assert scanner.scan(text)['revenue'] == '1000'
+
+    def test_matches_reference_lookup(self, scanner):
+        """Test randomized documents give the same results as per-pattern findall"""
+        fragments = [
+            "Total revenues", "revenues", "Revenue:", "$", " ", "\n", "1,234", "(5,6)", ",",
+            "cost of revenues", "Costs and expenses:", "cost of sales", "net sales",
+            "Income from operations", "operating income", "operating earnings", "12",
+            "consolidated revenues", "net revenue", "cost of services", "cost of goods sold",
+        ]
+        rng = random.Random(0)
+        for _ in range(2000):
+            text = "".join(
+                rng.choice(fragments) + rng.choice(["", " "])
+                for _ in range(rng.randint(0, 20))
+            )
+            assert scanner.scan(text) == reference_scan(text, FIELD_PATTERNS), text
+
+    def test_patterns_without_groups_and_backreferences(self):
+        """Test whole-match patterns and backreferences behave like findall"""
+        field_patterns = {
+            'word': [r'(\w)\1\w*', r'[0-9]+'],
+            'plain': [r'ABC\d'],
+        }
+        scanner = FieldScanner(field_patterns)
+        text = "xyz 42 abc7 hello"
+
+        assert scanner.scan(text) == {'word': 'l', 'plain': 'abc7'}
+
+
+class TestIncrementalScan:
+    """Test feeding text to the scanner in pieces"""
+
+    def test_pieces_match_whole_text(self):
+        """Test randomly split documents give the same results as one scan"""
+        fragments = [
+            "Total revenues", "revenues", "Revenue:", "$", " ", "\n", "1,234", "(5,6)", ",",
+            "cost of revenues", "Costs and expenses:", "cost of sales", "net sales",
+            "Income from operations", "operating income", "12",
+        ]
+        # A small margin puts plenty of matches across piece boundaries
+        scanner = FieldScanner(FIELD_PATTERNS, clean=clean_financial_value, margin=80)
+        rng = random.Random(1)
+        for _ in range(1000):
+            text = "".join(
+                rng.choice(fragments) + rng.choice(["", " "])
+                for _ in range(rng.randint(0, 40))
+            )
+            cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 6))))
+            scan = scanner.start()
+            for begin, end in zip([0] + cuts, cuts + [len(text)]):
+                scan.feed(text[begin:end])
+            assert scan.finish() == scanner.scan(text), (text, cuts)
+
+    def test_done_once_fields_resolved(self, scanner):
+        """Test the scan reports done once later text can no longer matter"""
+        scan = scanner.start(['revenue', 'operating_income'])
+        scan.feed("Total revenues $ 307,394 Income from operations 84,293 ")
+        assert not scan.done  # Still inside the margin
+
+        scan.feed(" " * scanner.margin)
+        assert scan.done
+        assert scan.finish() == {'revenue': '307394', 'operating_income': '84293'}
+
+    def test_not_done_while_higher_priority_pattern_unmatched(self, scanner):
+        """Test a lower-priority match keeps the scan going"""
+        scan = scanner.start(['revenue'])
+        scan.feed("Net sales 200 " + " " * scanner.margin)
+        assert not scan.done
+
+        scan.feed("Total revenues $ 300")
+        assert scan.finish() == {'revenue': '300'}
+
+    def test_examined_text_is_released(self, scanner):
+        """Test the scan only holds on to a bounded window of text"""
+        scan = scanner.start()
+        for _ in range(50):
+            scan.feed("Page of notes without any figures. " * 200)
+
+        assert len(scan._text) <= 2 * scanner.margin + 7000
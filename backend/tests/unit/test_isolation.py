@@ -0,0 +1,116 @@
+import json
+import threading
+from unittest.mock import patch
+import pytest
+from core import isolation
+from core.cancellation import ExtractionCancelled
+from core.isolation import DocumentQuarantined, ExtractionAborted, run_isolated
+from core.synthetic import synthetic_filing
+from core.views import run_extraction, run_statement_extraction
+
+CONTENT_HASH = 'a' * 64
+
+
+class TestRunIsolated:
+    """Test running a function in a limited child process"""
+
+    def test_returns_result(self):
+        """Test the child's return value comes back"""
+        assert run_isolated('json.loads', ('{"revenue": "1"}',)) == {'revenue': '1'}
+
+    def test_child_errors_keep_their_type(self):
+        """Test an ordinary error in the child is raised as itself and quarantines nothing"""
+        with pytest.raises(json.JSONDecodeError):
+            run_isolated('json.loads', ('{',), content_hash=CONTENT_HASH)
+
+        isolation.raise_if_quarantined(CONTENT_HASH)
+
+    def test_deadline(self):
+        """Test a child past its deadline is killed and the document quarantined"""
+        with pytest.raises(ExtractionAborted, match='within 0.5s') as error:
+            run_isolated('time.sleep', (30,), content_hash=CONTENT_HASH, deadline=0.5)
+
+        assert error.value.reason == 'timeout'
+        with pytest.raises(DocumentQuarantined) as quarantined:
+            isolation.raise_if_quarantined(CONTENT_HASH)
+        assert quarantined.value.reason == 'quarantined'
+        assert quarantined.value.original_reason == 'timeout'
+
+    def test_memory_limit(self):
+        """Test an allocation past the memory limit aborts the child"""
+        with pytest.raises(ExtractionAborted) as error:
+            run_isolated('builtins.bytearray', (4 * 1024 ** 3,), memory_mb=1024)
+
+        assert error.value.reason == 'memory'
+
+    def test_crash(self):
+        """Test a child that dies without a result"""
+        with pytest.raises(ExtractionAborted) as error:
+            run_isolated('os.abort')
+
+        assert error.value.reason == 'crashed'
+
+    def test_cancel(self):
+        """Test setting the cancel event kills the child"""
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+
+        with pytest.raises(ExtractionCancelled):
+            run_isolated('time.sleep', (30,), cancel_event=cancel_event, deadline=10)
+
+    def test_quarantine_off(self, settings):
+        """Test EXTRACTION_QUARANTINE_TTL = 0 quarantines nothing"""
+        settings.EXTRACTION_QUARANTINE_TTL = 0
+
+        with pytest.raises(ExtractionAborted):
+            run_isolated('time.sleep', (30,), content_hash=CONTENT_HASH, deadline=0.2)
+
+        isolation.raise_if_quarantined(CONTENT_HASH)
+
+
+class TestIsolatedExtraction:
+    """Test extractions with EXTRACTION_ISOLATION on"""
+
+    @pytest.fixture(autouse=True)
+    def isolation_on(self, settings):
+        settings.EXTRACTION_ISOLATION = True
+
+    @pytest.fixture
+    def filing(self, tmp_path):
+        path = tmp_path / 'filing.pdf'
+        path.write_bytes(synthetic_filing(pages=12))
+        return str(path)
+
+    def test_same_results(self, filing):
+        """Test values and table mode extract in the child as they do in process"""
+        extraction, cache_status = run_extraction(filing, content_hash=CONTENT_HASH)
+        statement_data, _ = run_statement_extraction(filing, content_hash=CONTENT_HASH)
+
+        assert cache_status == 'miss'
+        assert extraction['results'] == {'revenue': '307394', 'cos': '133332', 'operating_income': '84293'}
+        assert statement_data['results'] == {
+            **extraction['results'], 'net_income': '73795', 'eps_basic': '', 'eps_diluted': '5.80'
+        }
+        assert statement_data['statement']['pages']
+
+    def test_table_mode_locates_pages_in_the_child(self, filing):
+        """Test table mode reads the untrusted PDF to locate its statement only in the child"""
+        with patch('core.views.locate_statement_pages', side_effect=AssertionError('located in the parent')):
+            statement_data, _ = run_statement_extraction(filing, content_hash=CONTENT_HASH)
+
+        assert statement_data['results']['revenue'] == '307394'
+
+    def test_quarantined_document_is_refused(self, filing, settings):
+        """Test a document that broke a limit is refused without parsing until released"""
+        settings.EXTRACTION_ISOLATION_DEADLINE = 0.001
+        with pytest.raises(ExtractionAborted):
+            run_extraction(filing, content_hash=CONTENT_HASH)
+
+        settings.EXTRACTION_ISOLATION_DEADLINE = 60
+        with pytest.raises(DocumentQuarantined):
+            run_extraction(filing, content_hash=CONTENT_HASH)
+        with pytest.raises(DocumentQuarantined):
+            run_statement_extraction(filing, content_hash=CONTENT_HASH)
+
+        isolation.release(CONTENT_HASH)
+        assert run_extraction(filing, content_hash=CONTENT_HASH)[1] == 'miss'
@@ -0,0 +1,189 @@
+import importlib
+import os
+import sys
+import pytest
+from django.core.management import CommandError, call_command
+from core.loadtest import (
+    LoadGenerator, ServerError, build_workload, encode_multipart, percentile, process_tree_rss, run_load_test,
+    summarize, write_settings_module,
+)
+
+# A URLconf whose extraction endpoint takes the server down like a crash in native code
+CRASHING_URLCONF = """
+import os
+import signal
+from django.http import HttpResponse
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+
+def metrics(request):
+    return HttpResponse('')
+
+
+@csrf_exempt
+def extract(request):
+    print('extracting', flush=True)
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+urlpatterns = [path('metrics', metrics), path('api/extract/', extract)]
+"""
+
+
+def sample(latency, status=200, pages=5):
+    return {'at': 0.0, 'latency': latency, 'status': status, 'pages': pages}
+
+
+class TestReport:
+    """Test the load test statistics"""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = [i / 100 for i in range(1, 101)]
+
+        assert percentile(values, 50) == 0.5
+        assert percentile(values, 95) == 0.95
+        assert percentile(values, 99) == 0.99
+        assert percentile([0.3], 99) == 0.3
+        assert percentile([], 50) is None
+
+    def test_summarize(self):
+        """Test throughput, latency and error rates count only what they should"""
+        samples = [sample(0.1)] * 6 + [sample(0.5, status=503), sample(2.0, status=500)]
+        rss = [{'at': 0.0, 'rss_bytes': 100, 'completed': 0}, {'at': 1.0, 'rss_bytes': 300, 'completed': 8}]
+
+        report = summarize(samples, elapsed=2.0, rss_samples=rss)
+
+        assert report['requests'] == 8
+        assert report['throughput'] == 3.0
+        assert report['pages_per_second'] == 15.0
+        assert report['latency']['p99'] == 2.0
+        assert report['ok_latency']['p99'] == 0.1
+        assert report['statuses'] == {'200': 6, '500': 1, '503': 1}
+        assert report['error_rate'] == 0.25
+        assert report['rejected_rate'] == 0.125
+        assert report['peak_rss_bytes'] == 300
+
+    def test_summarize_nothing(self):
+        """Test a run without requests still reports"""
+        report = summarize([], elapsed=1.0)
+
+        assert report['requests'] == 0
+        assert report['latency']['p50'] is None
+        assert report['error_rate'] == 0.0
+        assert report['peak_rss_bytes'] is None
+
+
+class TestWorkload:
+    """Test the requests the load generator sends"""
+
+    def test_build_workload(self):
+        """Test each page count gets distinct variants"""
+        workload = build_workload([3, 6], variants=2)
+
+        assert [pages for pages, _ in workload] == [3, 3, 6, 6]
+        assert len({content for _, content in workload}) == 4
+
+    def test_encode_multipart(self):
+        """Test the PDF goes in pdf_file after the extra fields"""
+        body, content_type = encode_multipart(b'%PDF-1.4 data', {'mode': 'table'})
+        boundary = content_type.split('boundary=')[1]
+
+        assert content_type.startswith('multipart/form-data')
+        assert b'name="mode"\r\n\r\ntable\r\n' in body
+        assert b'name="pdf_file"; filename="filing.pdf"' in body
+        assert body.endswith(f'%PDF-1.4 data\r\n--{boundary}--\r\n'.encode())
+
+    def test_settings_module(self, tmp_path, monkeypatch):
+        """Test the server's settings module applies the overrides on the current settings"""
+        name = write_settings_module(str(tmp_path), {'EXTRACTION_MAX_CONCURRENT': 9, 'EXTRACTION_ENGINE': 'pdfium'})
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        module = importlib.import_module(name)
+        sys.modules.pop(name)
+
+        assert module.EXTRACTION_MAX_CONCURRENT == 9
+        assert module.EXTRACTION_ENGINE == 'pdfium'
+        assert module.ROOT_URLCONF == 'dealmover_case.urls'
+
+    def test_request_limit(self, monkeypatch):
+        """Test the generator stops after max_requests"""
+        monkeypatch.setattr('core.loadtest.send_request', lambda *args: 200)
+        generator = LoadGenerator('http://127.0.0.1:1/api/extract/', [(1, b'pdf')], concurrency=3,
+                                  duration=30, max_requests=7)
+
+        generator.run()
+
+        assert generator.completed == 7
+
+    def test_open_loop(self, monkeypatch):
+        """Test arrivals at a rate are paced and timed from their scheduled arrival"""
+        monkeypatch.setattr('core.loadtest.send_request', lambda *args: 200)
+        generator = LoadGenerator('http://127.0.0.1:1/api/extract/', [(1, b'pdf')], concurrency=2,
+                                  rate=50, duration=1)
+
+        elapsed = generator.run()
+
+        assert 20 <= generator.completed <= 100
+        assert elapsed < 2
+        assert all(0 <= sample['at'] < 1 for sample in generator.samples)
+
+    def test_connection_errors(self):
+        """Test a request that gets no response is recorded with status 0"""
+        generator = LoadGenerator('http://127.0.0.1:9/api/extract/', [(1, b'pdf')], concurrency=1,
+                                  max_requests=1, timeout=2)
+
+        generator.run()
+
+        assert generator.samples[0]['status'] == 0
+
+    def test_process_tree_rss(self):
+        """Test the memory of this process is found"""
+        rss = process_tree_rss(os.getpid())
+
+        if rss is None:
+            pytest.skip('no procfs')
+        assert rss > 10 * 1024 * 1024
+
+
+class TestLoadTest:
+    """Test a load test against a started server"""
+
+    def test_run(self, settings):
+        """Test a short closed-loop run extracts every filing and samples the server's memory"""
+        overrides = {
+            'CACHES': settings.CACHES,
+            'EXTRACTION_ARTIFACT_DIR': settings.EXTRACTION_ARTIFACT_DIR,
+            'EXTRACTION_HISTORY': False,
+        }
+
+        report = run_load_test(overrides=overrides, page_counts=[3], variants=2, concurrency=2, duration=30,
+                               max_requests=6, sample_interval=0.2)
+
+        assert report['requests'] == 6
+        assert report['statuses'] == {'200': 6}
+        assert report['ok_latency']['p50'] > 0
+        assert report['rss'] and report['peak_rss_bytes'] > 0
+        assert report['config']['server'] == 'runserver'
+
+    def test_command_options(self):
+        """Test bad options are refused before a server starts"""
+        with pytest.raises(CommandError, match='--pages'):
+            call_command('load_test', '--pages', 'five')
+        with pytest.raises(CommandError, match='NAME=VALUE'):
+            call_command('load_test', '--setting', 'EXTRACTION_ENGINE')
+        with pytest.raises(CommandError, match='--url'):
+            call_command('load_test', '--url', 'http://127.0.0.1:1', '--setting', 'EXTRACTION_ENGINE=pdfium')
+
+    def test_server_crash(self, settings, tmp_path, monkeypatch):
+        """Test a server that dies mid-run fails the run with its exit and log instead of a report"""
+        (tmp_path / 'crashing_urls.py').write_text(CRASHING_URLCONF)
+        monkeypatch.setenv('PYTHONPATH', str(tmp_path))
+        overrides = {'ROOT_URLCONF': 'crashing_urls', 'EXTRACTION_WARMUP': False}
+
+        with pytest.raises(ServerError, match='killed by SIGSEGV during the run') as error:
+            run_load_test(overrides=overrides, page_counts=[1], variants=1, concurrency=1, duration=30,
+                          max_requests=2, timeout=10)
+
+        assert 'extracting' in str(error.value)
@@ -0,0 +1,146 @@
+import gc
+import io
+import threading
+import tracemalloc
+from unittest.mock import patch
+import pdfplumber
+import pytest
+from core.engines import ENGINES, PDFPLUMBER
+from core.resources import parse_gc
+from core.synthetic import synthetic_filing
+from core.views import extract_statement_pages, extract_text_from_pdf
+
+
+def peak_traced_bytes(func):
+    """Peak Python memory allocated while func runs"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestLowMemoryExtraction:
+    """Test pages are released as soon as their text is taken"""
+
+    def test_pdfplumber_pages_closed_after_extraction(self):
+        """Test every page is closed right after its text is extracted"""
+        data = synthetic_filing(pages=3)
+        events = []
+        extract_text = pdfplumber.page.Page.extract_text
+        close = pdfplumber.page.Page.close
+
+        def track_extract(page, **kwargs):
+            events.append(('extract', page.page_number))
+            return extract_text(page, **kwargs)
+
+        def track_close(page):
+            events.append(('close', page.page_number))
+            return close(page)
+
+        with patch.object(pdfplumber.page.Page, 'extract_text', track_extract), \
+                patch.object(pdfplumber.page.Page, 'close', track_close):
+            page_texts = list(ENGINES[PDFPLUMBER].iter_pages(io.BytesIO(data), low_memory=True))
+
+        assert len(page_texts) == 3
+        # Closing the document closes every page again afterwards
+        assert events[:6] == [(event, page) for page in (1, 2, 3) for event in ('extract', 'close')]
+
+    def test_same_text_in_low_memory_mode(self):
+        """Test releasing pages does not change the extracted text"""
+        data = synthetic_filing(pages=3, statement_page=2)
+
+        low_memory = list(ENGINES[PDFPLUMBER].iter_pages(io.BytesIO(data), low_memory=True))
+        default = list(ENGINES[PDFPLUMBER].iter_pages(io.BytesIO(data)))
+
+        assert low_memory == default
+
+    def test_peak_memory_does_not_grow_with_page_count(self):
+        """Test the low-memory peak stays flat while the default grows with the document"""
+        short = synthetic_filing(pages=2, lines_per_page=10)
+        long = synthetic_filing(pages=8, lines_per_page=10)
+
+        def extract(data, low_memory):
+            return lambda: list(ENGINES[PDFPLUMBER].iter_pages(io.BytesIO(data), low_memory=low_memory))
+
+        short_peak = peak_traced_bytes(extract(short, True))
+        long_peak = peak_traced_bytes(extract(long, True))
+        default_peak = peak_traced_bytes(extract(long, False))
+
+        assert long_peak < 1.5 * short_peak
+        assert default_peak > 3 * long_peak
+
+    @patch('core.views.pdfplumber.open')
+    def test_statement_layout_pages_closed(self, mock_pdfplumber_open):
+        """Test table-mode layout releases each page after reading its words"""
+        closed = []
+        mock_page = type('MockPage', (), {
+            'page_number': 45,
+            'extract_words': lambda self: [],
+            'close': lambda self: closed.append(self.page_number),
+        })()
+        mock_pdfplumber_open.return_value.__enter__.return_value.pages = [mock_page]
+
+        extract_statement_pages('test.pdf', [45])
+
+        assert closed == [45]
+
+    @patch('core.views.pdfplumber.open')
+    def test_low_memory_mode_can_be_turned_off(self, mock_pdfplumber_open, settings):
+        """Test pages are left open with EXTRACTION_LOW_MEMORY off"""
+        settings.EXTRACTION_LOW_MEMORY = False
+        closed = []
+        mock_page = type('MockPage', (), {
+            'extract_text': lambda self: 'Page content',
+            'close': lambda self: closed.append(True),
+        })()
+        mock_pdfplumber_open.return_value.__enter__.return_value.pages = [mock_page]
+
+        assert extract_text_from_pdf('test.pdf', parallel=False) == 'Page content\n'
+        assert closed == []
+
+
+class TestParseGC:
+    """Test the relaxed young-generation GC used while parsing"""
+
+    def test_threshold_raised_and_restored(self):
+        """Test the threshold is raised in the block and restored after it"""
+        original = gc.get_threshold()
+
+        with parse_gc(threshold=50000):
+            assert gc.get_threshold() == (50000, *original[1:])
+
+        assert gc.get_threshold() == original
+
+    def test_overlapping_blocks_restore_once(self):
+        """Test concurrent parses keep the setting until the last one exits"""
+        original = gc.get_threshold()
+        inner_entered, outer_done = threading.Event(), threading.Event()
+        seen = []
+
+        def other_parse():
+            with parse_gc(threshold=50000):
+                inner_entered.set()
+                outer_done.wait(5)
+                seen.append(gc.get_threshold()[0])
+
+        thread = threading.Thread(target=other_parse)
+        with parse_gc(threshold=50000):
+            thread.start()
+            inner_entered.wait(5)
+        outer_done.set()
+        thread.join()
+
+        assert seen == [50000]
+        assert gc.get_threshold() == original
+
+    def test_restored_on_error(self):
+        """Test an exception in the block still restores the threshold"""
+        original = gc.get_threshold()
+
+        with pytest.raises(ValueError):
+            with parse_gc(threshold=50000):
+                raise ValueError('parse failed')
+
+        assert gc.get_threshold() == original
@@ -0,0 +1,88 @@
+import time
+from unittest.mock import Mock
+import pytest
+from core import metrics
+
+
+@pytest.fixture(autouse=True)
+def empty_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+class TestMetrics:
+    """Test the in-process metrics registry and its text format"""
+
+    def test_counter_series_per_label_set(self):
+        """Test counters keep a value per label combination"""
+        metrics.FIELD_RESULTS.inc(field='revenue', result='hit')
+        metrics.FIELD_RESULTS.inc(field='revenue', result='hit')
+        metrics.FIELD_RESULTS.inc(field='cos', result='miss')
+
+        assert metrics.FIELD_RESULTS.value(field='revenue', result='hit') == 2
+        assert metrics.FIELD_RESULTS.value(field='cos', result='miss') == 1
+        assert metrics.FIELD_RESULTS.value(field='cos', result='hit') == 0
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram samples use cumulative buckets, +Inf, sum and count"""
+        for pages in (1, 4, 4, 1000):
+            metrics.PAGES_PARSED.observe(pages)
+
+        text = metrics.render()
+
+        assert 'extraction_pages_parsed_bucket{le="1"} 1' in text
+        assert 'extraction_pages_parsed_bucket{le="3"} 1' in text
+        assert 'extraction_pages_parsed_bucket{le="5"} 3' in text
+        assert 'extraction_pages_parsed_bucket{le="500"} 3' in text
+        assert 'extraction_pages_parsed_bucket{le="+Inf"} 4' in text
+        assert 'extraction_pages_parsed_sum 1009' in text
+        assert 'extraction_pages_parsed_count 4' in text
+
+    def test_render_exposition_format(self):
+        """Test every metric has HELP and TYPE lines and labels are quoted"""
+        metrics.CACHE_LOOKUPS.inc(result='memory')
+
+        text = metrics.render()
+
+        assert '# TYPE extraction_cache_lookups_total counter' in text
+        assert '# TYPE extraction_stage_duration_seconds histogram' in text
+        assert '# TYPE process_resident_memory_bytes gauge' in text
+        assert 'extraction_cache_lookups_total{result="memory"} 1' in text
+        rss = [line for line in text.splitlines() if line.startswith('process_resident_memory_bytes ')]
+        assert int(rss[0].split()[1]) > 0
+
+    def test_label_values_escaped(self):
+        """Test quotes and backslashes in label values are escaped"""
+        metrics.FIELD_RESULTS.inc(field='a"b\\c', result='hit')
+
+        assert 'field="a\\"b\\\\c"' in metrics.render()
+
+    def test_track_requests(self):
+        """Test the view decorator counts status codes and times requests"""
+        view = metrics.track_requests('test')(lambda request: Mock(status_code=201))
+
+        view(Mock())
+
+        assert metrics.REQUESTS.value(endpoint='test', status=201) == 1
+        assert metrics.REQUEST_DURATION.count(endpoint='test') == 1
+
+    def test_track_requests_counts_exceptions_as_500(self):
+        """Test an exception escaping the view is counted as a 500"""
+        def view(request):
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            metrics.track_requests('test')(view)(Mock())
+
+        assert metrics.REQUESTS.value(endpoint='test', status=500) == 1
+
+    def test_recording_overhead(self):
+        """Test recording stays in the microsecond range"""
+        start = time.perf_counter()
+        for _ in range(10000):
+            metrics.STAGE_DURATION.observe(0.2, stage='matching')
+            metrics.CACHE_LOOKUPS.inc(result='miss')
+        per_update = (time.perf_counter() - start) / 20000
+
+        assert per_update < 50e-6
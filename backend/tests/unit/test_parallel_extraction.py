@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from core.parallel import PagePool, chunk_pages, extract_page_chunk
+from core.views import extract_text_from_pdf
+
+
+def make_mock_pdf(page_numbers):
+    """A pdfplumber stand-in whose pages report their own page number"""
+    pages = [
+        type('MockPage', (), {'extract_text': lambda self, n=n: f'Page {n} content', 'close': lambda self: None})()
+        for n in page_numbers
+    ]
+    return type('MockPDF', (), {'pages': pages})()
+
+
+def mock_pdfplumber_open(path, pages=None):
+    """Mimic pdfplumber.open(path, pages=...) as a context manager"""
+    class MockContext:
+        def __enter__(self):
+            return make_mock_pdf(pages)
+
+        def __exit__(self, *args):
+            return False
+
+    return MockContext()
+
+
+class ThreadPagePool(PagePool):
+    """PagePool running its tasks in threads so mocks stay in effect"""
+
+    created = 0
+
+    def _create_executor(self):
+        ThreadPagePool.created += 1
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+
+class TestPageChunking:
+    """Test splitting pages into worker tasks"""
+
+    def test_chunk_pages(self):
+        """Test chunks keep page order and respect the chunk size"""
+        assert chunk_pages(range(1, 8), chunk_size=3) == [[1, 2, 3], [4, 5, 6], [7]]
+
+    def test_chunk_pages_spreads_small_documents(self):
+        """Test small documents are split so every worker gets pages"""
+        assert chunk_pages(range(1, 9), chunk_size=8, workers=4) == [[1, 2], [3, 4], [5, 6], [7, 8]]
+
+    def test_chunk_pages_empty(self):
+        """Test no pages give no chunks"""
+        assert chunk_pages([], chunk_size=8) == []
+
+
+class TestPagePool:
+    """Test page-parallel extraction"""
+
+    @patch('core.parallel.pdfplumber.open', mock_pdfplumber_open)
+    def test_extract_page_chunk(self):
+        """Test a worker task returns the text of its pages and its memory"""
+        page_texts, worker_rss = extract_page_chunk('test.pdf', [4, 5])
+
+        assert page_texts == ['Page 4 content', 'Page 5 content']
+        assert worker_rss > 0
+
+    @patch('core.parallel.pdfplumber.open', mock_pdfplumber_open)
+    def test_extract_reassembles_page_order(self):
+        """Test chunk results come back in page order"""
+        pool = ThreadPagePool(max_workers=3, chunk_size=2)
+
+        page_texts = pool.extract('test.pdf', list(range(1, 10)))
+
+        assert page_texts == [f'Page {n} content' for n in range(1, 10)]
+        pool.shutdown()
+
+    @patch('core.parallel.pdfplumber.open')
+    def test_stopping_early_cancels_queued_chunks(self, mock_open):
+        """Test a caller that stops early leaves only a window of chunks parsed"""
+        mock_open.side_effect = mock_pdfplumber_open
+        pool = ThreadPagePool(max_workers=1, chunk_size=1)
+
+        page_texts = pool.iter_extract('test.pdf', list(range(1, 21)))
+        assert next(page_texts) == 'Page 1 content'
+        page_texts.close()
+        pool.shutdown()
+
+        assert mock_open.call_count <= 3
+
+    @patch('core.parallel.current_rss_bytes', lambda: 600 * 1024 * 1024)
+    @patch('core.parallel.pdfplumber.open', mock_pdfplumber_open)
+    def test_workers_recycled_above_rss_watermark(self):
+        """Test the pool is replaced once a worker passes the RSS watermark"""
+        pool = ThreadPagePool(max_workers=2, chunk_size=2, rss_limit_mb=512)
+        ThreadPagePool.created = 0
+
+        pool.extract('test.pdf', [1, 2, 3])
+        pool.extract('test.pdf', [1, 2, 3])
+
+        assert ThreadPagePool.created == 2
+        pool.shutdown()
+
+    @patch('core.parallel.pdfplumber.open', mock_pdfplumber_open)
+    def test_workers_kept_below_rss_watermark(self):
+        """Test the pool is reused while workers stay under the watermark"""
+        pool = ThreadPagePool(max_workers=2, chunk_size=2, rss_limit_mb=100000)
+        ThreadPagePool.created = 0
+
+        pool.extract('test.pdf', [1, 2, 3])
+        pool.extract('test.pdf', [1, 2, 3])
+
+        assert ThreadPagePool.created == 1
+        pool.shutdown()
+
+
+class TestParallelTextExtraction:
+    """Test extract_text_from_pdf in parallel mode"""
+
+    @patch('core.views.get_page_pool')
+    @patch('core.views.count_pages')
+    def test_parallel_text_matches_serial_format(self, mock_count_pages, mock_get_page_pool):
+        """Test pages from the pool are joined like serial extraction"""
+        mock_count_pages.return_value = 20
+        mock_get_page_pool.return_value.chunk_size = 8
+        mock_get_page_pool.return_value.iter_extract.return_value = (page_text for page_text in ['Page 1 content', '', 'Page 3 content'])
+
+        result = extract_text_from_pdf('test.pdf', parallel=True)
+
+        assert result == 'Page 1 content\nPage 3 content\n'
+        mock_get_page_pool.return_value.iter_extract.assert_called_once_with('test.pdf', list(range(1, 21)), True)
+
+    @patch('core.views.pdfplumber.open')
+    @patch('core.views.get_page_pool')
+    def test_parallel_small_page_selection_runs_inline(self, mock_get_page_pool, mock_pdfplumber_open):
+        """Test a selection no bigger than one chunk skips the pool"""
+        mock_get_page_pool.return_value.chunk_size = 8
+        mock_pdfplumber_open.return_value.__enter__.return_value = make_mock_pdf([3])
+
+        result = extract_text_from_pdf('test.pdf', pages=[3], parallel=True)
+
+        assert result == 'Page 3 content\n'
+        mock_get_page_pool.return_value.iter_extract.assert_not_called()
@@ -15,8 +15,8 @@ class TestPDFTextExtraction:
     def test_extract_text_from_pdf_success(self, mock_pdfplumber_open):
         """Test successful PDF text extraction"""
         # Mock PDF pages
-        mock_page1 = type('MockPage', (), {'extract_text': lambda self: 'Page 1 content'})()
-        mock_page2 = type('MockPage', (), {'extract_text': lambda self: 'Page 2 content'})()
+        mock_page1 = type('MockPage', (), {'extract_text': lambda self: 'Page 1 content', 'close': lambda self: None})()
+        mock_page2 = type('MockPage', (), {'extract_text': lambda self: 'Page 2 content', 'close': lambda self: None})()
         mock_pdf = type('MockPDF', (), {'pages': [mock_page1, mock_page2]})()
         mock_pdfplumber_open.return_value.__enter__.return_value = mock_pdf
         
@@ -32,6 +32,36 @@ class TestPDFTextExtraction:
         
         with pytest.raises(Exception, match='PDF error'):
             extract_text_from_pdf('invalid.pdf')
+    
+    @patch('core.views.pdfplumber.open')
+    def test_extract_text_stops_once_fields_resolved(self, mock_pdfplumber_open):
+        """Test pages after the ones that settle every field are never parsed"""
+        notes = 'Notes to the financial statements. ' * 60
+        statement = (
+            'Total revenues $ 307,394 Costs and expenses: Cost of revenues 133,332 '
+            'Income from operations 84,293'
+        )
+        page_texts = [notes, statement, notes, notes, notes, 'Total revenues $ 1']
+        parsed = []
+        
+        class MockPage:
+            def __init__(self, number):
+                self.number = number
+            
+            def extract_text(self):
+                parsed.append(self.number)
+                return page_texts[self.number]
+            
+            def close(self):
+                pass
+        
+        mock_pdf = type('MockPDF', (), {'pages': [MockPage(n) for n in range(len(page_texts))]})()
+        mock_pdfplumber_open.return_value.__enter__.return_value = mock_pdf
+        
+        text = extract_text_from_pdf('test.pdf', parallel=False, stop_after_fields=['revenue', 'cos', 'operating_income'])
+        
+        assert parsed == [0, 1, 2]
+        assert extract_financial_values(text) == extract_financial_values("\n".join(page_texts))
 
 
 class TestFinancialValueCleaning:
@@ -163,6 +193,14 @@ class TestFinancialValuesExtraction:
         assert result['cos'] == '1200000'
         assert result['operating_income'] == ""
     
+    def test_extract_financial_values_selected_fields(self):
+        """Test only the requested fields are extracted"""
+        text = "Total revenues $ 307,394 Cost of sales 100 Income from operations 84,293"
+        
+        result = extract_financial_values(text, ['revenue', 'operating_income'])
+        
+        assert result == {'revenue': '307394', 'operating_income': '84293'}
+    
     def test_extract_financial_values_no_data(self):
         """Test extraction when no financial data is present"""
         text = "This is just regular text with no financial information."
@@ -0,0 +1,188 @@
+import cProfile
+import os
+import pytest
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core import profiling
+from core.profiling import profile_reason, profile_requests
+
+factory = RequestFactory()
+
+
+def busy_view(request):
+    sum(i * i for i in range(10000))
+    return HttpResponse('ok')
+
+
+def store_profile(endpoint='/api/extract/'):
+    profiler = cProfile.Profile()
+    profiler.runcall(sum, range(1000))
+    return profiling.save_profile(profiler, {'endpoint': endpoint, 'method': 'POST', 'reason': 'sampled',
+                                             'status': 200, 'seconds': 0.1, 'request_id': ''})
+
+
+class TestProfileReason:
+    """Test which requests are profiled"""
+
+    def test_disabled_reads_nothing_from_the_request(self, settings, monkeypatch):
+        """Test no token and a zero rate decide without touching the request or drawing a sample"""
+        settings.EXTRACTION_PROFILE_TOKEN = None
+        settings.EXTRACTION_PROFILE_SAMPLE_RATE = 0.0
+        monkeypatch.setattr('core.profiling.random.random', lambda: pytest.fail('sampled'))
+
+        assert profile_reason(object()) is None
+
+    def test_token(self, settings):
+        """Test the token is accepted from the header or the query, and only when it matches"""
+        settings.EXTRACTION_PROFILE_TOKEN = 'secret'
+
+        assert profile_reason(factory.post('/', HTTP_X_EXTRACTION_PROFILE='secret')) == 'requested'
+        assert profile_reason(factory.post('/?profile=secret')) == 'requested'
+        assert profile_reason(factory.post('/', HTTP_X_EXTRACTION_PROFILE='secrets')) is None
+        assert profile_reason(factory.post('/')) is None
+
+    def test_sampling(self, settings, monkeypatch):
+        """Test requests are drawn at the sample rate"""
+        settings.EXTRACTION_PROFILE_SAMPLE_RATE = 0.25
+        draws = iter([0.1, 0.9])
+        monkeypatch.setattr('core.profiling.random.random', lambda: next(draws))
+
+        assert profile_reason(factory.post('/')) == 'sampled'
+        assert profile_reason(factory.post('/')) is None
+
+
+class TestProfileRequests:
+    """Test the profiling view decorator"""
+
+    @pytest.fixture(autouse=True)
+    def token(self, settings):
+        settings.EXTRACTION_PROFILE_TOKEN = 'secret'
+
+    def test_profiled_request(self):
+        """Test a profiled request stores its stats and summary and names them in X-Profile-Id"""
+        response = profile_requests(busy_view)(
+            factory.post('/api/extract/?profile=secret', HTTP_X_REQUEST_ID='abc-123')
+        )
+
+        profile_id = response[profiling.PROFILE_ID_HEADER]
+        summary = profiling.load_summary(profile_id)
+        assert summary['endpoint'] == '/api/extract/'
+        assert summary['reason'] == 'requested'
+        assert summary['status'] == 200
+        assert summary['request_id'] == 'abc-123'
+        report = profiling.format_stats(profiling.load_stats([profile_id]))
+        assert 'busy_view' in report
+
+    def test_unprofiled_request(self):
+        """Test requests that are not picked store nothing"""
+        response = profile_requests(busy_view)(factory.post('/api/extract/'))
+
+        assert profiling.PROFILE_ID_HEADER not in response
+        assert profiling.list_profiles() == []
+
+    def test_failing_view_is_profiled(self):
+        """Test a view that raises still leaves its profile, with status 500"""
+        def failing_view(request):
+            raise RuntimeError('parse failed')
+
+        with pytest.raises(RuntimeError):
+            profile_requests(failing_view)(factory.post('/api/extract/?profile=secret'))
+
+        assert [summary['status'] for summary in profiling.list_profiles()] == [500]
+
+    def test_store_failure_keeps_the_response(self, settings, tmp_path):
+        """Test a profile that cannot be written does not fail the request"""
+        blocker = tmp_path / 'not-a-directory'
+        blocker.write_text('')
+        settings.EXTRACTION_PROFILE_DIR = str(blocker)
+
+        response = profile_requests(busy_view)(factory.post('/api/extract/?profile=secret'))
+
+        assert response.status_code == 200
+        assert profiling.PROFILE_ID_HEADER not in response
+
+    def test_profiler_busy(self, monkeypatch):
+        """Test the request runs unprofiled when another profiler is active"""
+        class BusyProfile:
+            def enable(self):
+                raise ValueError('Another profiling tool is already active')
+
+        monkeypatch.setattr('core.profiling.cProfile.Profile', BusyProfile)
+
+        response = profile_requests(busy_view)(factory.post('/api/extract/?profile=secret'))
+
+        assert response.status_code == 200
+        assert profiling.PROFILE_ID_HEADER not in response
+
+
+class TestProfileStore:
+    """Test storing, reading, merging and pruning profiles"""
+
+    def test_list_newest_first(self):
+        """Test summaries are listed newest first"""
+        first, second = store_profile(), store_profile()
+
+        assert [summary['id'] for summary in profiling.list_profiles()] == [second, first]
+
+    def test_unknown_ids(self):
+        """Test ids that are not stored profiles, or not profile ids at all, are not found"""
+        assert profiling.load_summary('0' * 32) is None
+        assert profiling.load_summary('../../etc/passwd') is None
+        with pytest.raises(KeyError):
+            profiling.load_stats([store_profile(), 'f' * 32])
+
+    def test_merge(self):
+        """Test merged stats add up the calls of every profile"""
+        ids = [store_profile() for _ in range(3)]
+
+        stats = profiling.load_stats(ids)
+
+        calls = {name: primitive_calls for (_, _, name), (primitive_calls, *_) in stats.stats.items()}
+        assert calls['<built-in method builtins.sum>'] == 3
+
+    def test_prune(self, settings):
+        """Test only the newest EXTRACTION_PROFILE_MAX_FILES profiles are kept"""
+        settings.EXTRACTION_PROFILE_MAX_FILES = 2
+        ids = []
+        for i in range(4):
+            ids.append(store_profile())
+            os.utime(profiling.profile_path(ids[-1]), (i, i))
+
+        assert {summary['id'] for summary in profiling.list_profiles()} == set(ids[2:])
+        assert sorted(os.listdir(profiling.profile_dir())) == sorted(
+            f'{profile_id}{suffix}' for profile_id in ids[2:] for suffix in ('.prof', '.json')
+        )
+
+
+class TestProfilesCommand:
+    """Test manage.py profiles"""
+
+    def test_list(self, capsys):
+        """Test profiles are listed without arguments"""
+        profile_id = store_profile()
+
+        call_command('profiles')
+
+        assert profile_id in capsys.readouterr().out
+
+    def test_merge(self, capsys, tmp_path):
+        """Test --last merges the newest profiles, --endpoint filters them and --output writes pstats"""
+        store_profile('/api/extract/raw/')
+        store_profile()
+        store_profile()
+        output = tmp_path / 'merged.prof'
+
+        call_command('profiles', '--last', '5', '--endpoint', '/api/extract/', '--output', str(output))
+
+        captured = capsys.readouterr()
+        assert 'Merged 2 profiles' in captured.err
+        assert 'function calls' in captured.out
+        assert output.stat().st_size > 0
+
+    def test_unknown_profile(self):
+        """Test an unknown id or nothing to merge is an error"""
+        with pytest.raises(CommandError, match='No stored profile'):
+            call_command('profiles', 'f' * 32)
+        with pytest.raises(CommandError, match='No stored profiles'):
+            call_command('profiles', '--all')
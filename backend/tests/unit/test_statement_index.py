@@ -0,0 +1,218 @@
+from core.statement import (
+    StatementIndex,
+    build_page_statement,
+    build_text_statements,
+    find_columns,
+    normalize_label,
+    period_values,
+)
+from core.views import clean_financial_value, extract_financial_values, select_period
+
+
+def make_words(lines):
+    """
+    pdfplumber-style words from (top, [(x1, text), ...]) lines; words are
+    right-aligned at x1 with 6pt per character, like statement columns
+    """
+    words = []
+    for top, items in lines:
+        for x1, text in items:
+            words.append({'text': text, 'x0': x1 - 6 * len(text), 'x1': x1, 'top': top, 'bottom': top + 10})
+    return words
+
+
+def label(x0, text):
+    """Label words starting at x0"""
+    items, x = [], x0
+    for word in text.split():
+        items.append((x + 6 * len(word), word))
+        x += 6 * len(word) + 3
+    return items
+
+
+INCOME_STATEMENT = make_words([
+    (40, label(72, 'CONSOLIDATED STATEMENTS OF INCOME')),
+    (60, label(72, 'Year Ended December 31,')),
+    (80, [(350, '2023'), (450, '2024')]),
+    (100, label(72, 'Revenues') + [(300, '$'), (350, '307,394'), (400, '$'), (450, '350,018')]),
+    (120, label(72, 'Costs and expenses:')),
+    (140, label(72, 'Cost of revenues') + [(350, '133,332'), (450, '146,306')]),
+    (160, label(72, 'Restructuring charges (1)') + [(350, '—'), (450, '1,200')]),
+    (180, label(72, 'Income from operations') + [(350, '84,293'), (450, '112,390')]),
+    (200, label(72, 'Other income (expense), net') + [(350, '(1,424)'), (450, '7,425')]),
+    (220, label(72, 'Diluted net income per share') + [(300, '$'), (350, '5.80'), (400, '$'), (450, '8.04')]),
+    (240, label(72, 'See accompanying notes, page 12 of the 2024 report.')),
+])
+
+
+class TestColumnDetection:
+    """Test finding value columns from word positions"""
+
+    def test_right_aligned_columns(self):
+        """Test numbers of different widths in one column merge into one span"""
+        words = make_words([
+            (10, [(350, '1'), (450, '22')]),
+            (20, [(350, '333,333'), (450, '4,444')]),
+        ])
+
+        columns = find_columns(words)
+
+        assert len(columns) == 2
+        assert columns[0][1] == 350 and columns[1][1] == 450
+
+    def test_isolated_numbers_are_not_columns(self):
+        """Test a number on a single line does not make a column"""
+        words = make_words([(10, [(350, '1')]), (20, [(350, '2')]), (30, [(600, '3')])])
+
+        assert len(find_columns(words)) == 1
+
+
+class TestStatementRows:
+    """Test building the row index of a statement page"""
+
+    def test_rows_and_year_headers(self):
+        """Test year-only lines label the columns and rows hold values per column"""
+        page = build_page_statement(INCOME_STATEMENT, clean=clean_financial_value)
+        rows = {row['label']: row['values'] for row in page['rows']}
+
+        assert page['columns'] == ['2023', '2024']
+        assert rows['Revenues'] == ['307394', '350018']
+        assert rows['Cost of revenues'] == ['133332', '146306']
+        assert rows['Costs and expenses:'] == ['', '']
+
+    def test_negative_dash_and_decimal_values(self):
+        """Test parentheses, dashes and per-share values"""
+        page = build_page_statement(INCOME_STATEMENT, clean=clean_financial_value)
+        rows = {row['label']: row['values'] for row in page['rows']}
+
+        assert rows['Other income (expense), net'] == ['-1424', '7425']
+        assert rows['Restructuring charges (1)'] == ['', '1200']
+        assert rows['Diluted net income per share'] == ['5.80', '8.04']
+
+    def test_narrative_numbers_stay_in_label(self):
+        """Test numbers inside a sentence are not read as values"""
+        page = build_page_statement(INCOME_STATEMENT, clean=clean_financial_value)
+        rows = {row['label']: row['values'] for row in page['rows']}
+
+        assert rows['See accompanying notes, page 12 of the 2024 report.'] == ['', '']
+
+
+class TestStatementIndex:
+    """Test label lookups"""
+
+    def make_index(self):
+        page = build_page_statement(INCOME_STATEMENT, clean=clean_financial_value)
+        page['page'] = 1
+        return StatementIndex([page])
+
+    def test_field_lookup(self):
+        """Test known fields resolve through their statement labels"""
+        index = self.make_index()
+
+        assert index.lookup('revenue') == '307394'
+        assert index.lookup('cos') == '133332'
+        assert index.lookup('operating_income') == '84293'
+        assert index.lookup('eps_diluted') == '5.80'
+        assert index.lookup('revenue', column=1) == '350018'
+
+    def test_any_label_lookup(self):
+        """Test arbitrary line items are looked up by normalized label"""
+        index = self.make_index()
+
+        assert index.lookup('restructuring charges', column=1) == '1200'
+        assert index.lookup('net_income') == ''
+
+    def test_normalize_label(self):
+        """Test labels ignore case, punctuation and footnote markers"""
+        assert normalize_label('Restructuring  Charges (1)') == 'restructuring charges'
+        assert normalize_label('Costs and expenses:') == 'costs and expenses'
+
+    def test_to_dict(self):
+        """Test the serialized statement keeps pages, columns and rows"""
+        statement = self.make_index().to_dict()
+
+        assert statement['pages'][0]['page'] == 1
+        assert statement['pages'][0]['columns'] == ['2023', '2024']
+        assert 'lines' not in statement['pages'][0]
+
+
+STATEMENT_TEXT = """CONSOLIDATED STATEMENTS OF OPERATIONS
+Year Ended December 31,
+2022 2023 2024
+Total revenues $ 282,836 $ 307,394 $ 350,018
+Cost of revenues 126,203 133,332 146,306
+Restructuring charges — 1,200
+Income from operations 74,842 84,293 112,390
+Page 2024 of the report 12
+"""
+
+FIELDS = ['revenue', 'cos', 'operating_income']
+
+
+class TestPeriodColumns:
+    """Test reading every period column"""
+
+    def test_text_statements(self):
+        """Test year lines head the columns and rows need one value per column"""
+        [table] = build_text_statements(STATEMENT_TEXT, clean=clean_financial_value)
+        rows = {row['label']: row['values'] for row in table['rows']}
+
+        assert table['columns'] == ['2022', '2023', '2024']
+        assert rows['Total revenues'] == ['282836', '307394', '350018']
+        assert 'Restructuring charges' not in rows
+        assert 'Page 2024 of the report' not in rows
+
+    def test_period_values_from_text(self):
+        """Test each year column gets its own values"""
+        periods = period_values(build_text_statements(STATEMENT_TEXT, clean=clean_financial_value), FIELDS)
+
+        assert list(periods) == ['2022', '2023', '2024']
+        assert periods['2024'] == {'revenue': '350018', 'cos': '146306', 'operating_income': '112390'}
+        assert periods['2022']['cos'] == '126203'
+
+    def test_period_values_from_layout(self):
+        """Test the layout's year columns give the same shape"""
+        page = build_page_statement(INCOME_STATEMENT, clean=clean_financial_value)
+
+        periods = period_values([page], FIELDS)
+
+        assert periods == {
+            '2023': {'revenue': '307394', 'cos': '133332', 'operating_income': '84293'},
+            '2024': {'revenue': '350018', 'cos': '146306', 'operating_income': '112390'},
+        }
+
+    def test_no_year_headers(self):
+        """Test text without a year line has no periods"""
+        assert period_values(build_text_statements("Total revenues $1,234,567"), FIELDS) == {}
+
+    def test_select_period(self):
+        """Test period_end_date picks its year's column, and other dates keep the first values"""
+        extraction = {
+            'results': {'revenue': '307394'},
+            'periods': {'2023': {'revenue': '307394'}, '2024': {'revenue': '350018'}},
+        }
+
+        assert select_period(extraction, '2024-12-31')['results'] == {'revenue': '350018'}
+        assert select_period(extraction, '2024-12-31')['period_column'] == '2024'
+        assert select_period(extraction, '2021-12-31')['results'] == {'revenue': '307394'}
+        assert select_period(extraction, '')['period_column'] is None
+
+    def test_select_period_never_borrows_another_period(self):
+        """Test a field the period column lacks is "" and its scanned value is only listed as a fallback"""
+        text = (
+            "Year Ended December 31,\n"
+            "2023 2024\n"
+            "Revenues $ 307,394 $ 350,018 (1)\n"
+            "Cost of revenues 133,332 146,306\n"
+        )
+        extraction = {
+            'results': extract_financial_values(text, ['revenue', 'cos']),
+            'periods': period_values(build_text_statements(text, clean=clean_financial_value), ['revenue', 'cos']),
+        }
+
+        selected = select_period(extraction, '2023-12-31')
+
+        assert selected['period_column'] == '2023'
+        assert selected['results'] == {'revenue': '', 'cos': '133332'}
+        assert selected['fallback_fields'] == {'revenue': '307394'}
+        assert select_period(extraction, '2024-12-31')['results'] == {'revenue': '', 'cos': '146306'}
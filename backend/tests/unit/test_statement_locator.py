@@ -0,0 +1,169 @@
+import pytest
+from unittest.mock import patch
+from core.locator import (
+    locate_statement_pages,
+    parse_page_range,
+    score_page_text
+)
+
+
+INCOME_STATEMENT_PAGE = """
+CONSOLIDATED STATEMENTS OF OPERATIONS
+(In millions, except per share amounts)
+Year Ended December 31, 2023 2024
+Total revenues $ 307,394 $ 350,018
+Costs and expenses:
+Cost of revenues 133,332 146,306
+Research and development 45,427 49,326
+Income from operations 84,293 112,390
+Net income $ 73,795 $ 100,118
+"""
+
+TABLE_OF_CONTENTS_PAGE = """
+Item 8. Financial Statements and Supplementary Data 52
+Consolidated Statements of Operations 55
+"""
+
+NARRATIVE_PAGE = """
+We generate revenues primarily by delivering relevant, cost-effective online
+advertising. Risks related to our business are described below.
+"""
+
+
+def make_mock_pdfium(page_texts, toc=()):
+    """Build a stand-in for pypdfium2.PdfDocument over plain page texts"""
+    class MockTextPage:
+        def __init__(self, text):
+            self.text = text
+
+        def get_text_bounded(self):
+            return self.text
+
+        def close(self):
+            pass
+
+    class MockPage:
+        def __init__(self, text):
+            self.text = text
+
+        def get_textpage(self):
+            return MockTextPage(self.text)
+
+        def close(self):
+            pass
+
+    class MockDocument:
+        def __init__(self, source):
+            pass
+
+        def __len__(self):
+            return len(page_texts)
+
+        def __getitem__(self, index):
+            return MockPage(page_texts[index])
+
+        def get_toc(self):
+            return iter(toc)
+
+        def close(self):
+            pass
+
+    return MockDocument
+
+
+class TestPageScoring:
+    """Test income statement likelihood scoring"""
+
+    def test_income_statement_outscores_other_pages(self):
+        """Test the statement page ranks above TOC and narrative pages"""
+        statement_score = score_page_text(INCOME_STATEMENT_PAGE)
+
+        assert statement_score > score_page_text(TABLE_OF_CONTENTS_PAGE)
+        assert statement_score > score_page_text(NARRATIVE_PAGE)
+
+    def test_score_empty_page(self):
+        """Test empty and keyword-free pages score zero"""
+        assert score_page_text('') == 0
+        assert score_page_text(None) == 0
+        assert score_page_text('1 2 3 4 5 6 7 8 9') == 0
+
+
+class TestPageRangeParsing:
+    """Test client supplied page selections"""
+
+    def test_parse_page_range(self):
+        """Test ranges and single pages are expanded and sorted"""
+        assert parse_page_range('50,45-47') == [45, 46, 47, 50]
+        assert parse_page_range('3') == [3]
+        assert parse_page_range(' 2 - 3 , 2 ') == [2, 3]
+
+    @pytest.mark.parametrize('value', ['', 'abc', '0', '5-3', '1-a', '1-100000'])
+    def test_parse_page_range_invalid(self, value):
+        """Test malformed page selections are rejected"""
+        with pytest.raises(ValueError):
+            parse_page_range(value)
+
+
+class TestStatementPageLocation:
+    """Test locating the income statement pages in a document"""
+
+    def test_locate_statement_pages(self):
+        """Test the statement page is selected over the rest of the filing"""
+        page_texts = [TABLE_OF_CONTENTS_PAGE, NARRATIVE_PAGE, INCOME_STATEMENT_PAGE, NARRATIVE_PAGE]
+
+        with patch('core.locator.pdfium.PdfDocument', make_mock_pdfium(page_texts)):
+            assert locate_statement_pages('test.pdf') == [3]
+
+    def test_locate_statement_pages_no_candidates(self):
+        """Test None is returned when no page looks like a statement"""
+        with patch('core.locator.pdfium.PdfDocument', make_mock_pdfium([NARRATIVE_PAGE] * 3)):
+            assert locate_statement_pages('test.pdf') is None
+
+    @patch('core.locator.pdfium.PdfDocument')
+    def test_locate_statement_pages_unreadable_pdf(self, mock_pdfium_document):
+        """Test pre-scan failures fall back to the full document"""
+        mock_pdfium_document.side_effect = Exception('PDF error')
+
+        assert locate_statement_pages('invalid.pdf') is None
+
+
+CONCURRENT_PDFIUM_SCRIPT = """
+import io, os, threading
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dealmover_case.settings')
+django.setup()
+from core.engines import get_engine
+from core.locator import locate_statement_pages
+from core.synthetic import synthetic_filing
+
+content = synthetic_filing(30)
+
+def work():
+    for _ in range(10):
+        assert locate_statement_pages(io.BytesIO(content)) == [15]
+        assert len(list(get_engine('pdfium').iter_pages(io.BytesIO(content)))) == 30
+
+threads = [threading.Thread(target=work) for _ in range(4)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+"""
+
+
+class TestConcurrentPdfium:
+    """Test PDFium use from several request threads at once"""
+
+    def test_threads_share_pdfium_safely(self):
+        """Test concurrent pre-scans and pdfium text extraction do not crash the process"""
+        import subprocess
+        import sys
+        from django.conf import settings
+
+        # In a child process: unlocked PDFium use segfaults the interpreter
+        result = subprocess.run(
+            [sys.executable, '-c', CONCURRENT_PDFIUM_SCRIPT], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=120,
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
@@ -0,0 +1,42 @@
+import io
+import pdfplumber
+import pytest
+from core.synthetic import synthetic_filing
+from core.views import extract_financial_values, extract_text_from_pdf
+
+
+class TestSyntheticFilings:
+    """Test the synthetic 10-K generator used by the benchmarks"""
+
+    def test_same_arguments_same_bytes(self):
+        """Test filings are deterministic"""
+        assert synthetic_filing(pages=3, seed=1) == synthetic_filing(pages=3, seed=1)
+        assert synthetic_filing(pages=3, seed=1) != synthetic_filing(pages=3, seed=2)
+
+    @pytest.mark.parametrize('statement_page, expected', [('start', 1), ('middle', 3), ('end', 5), (4, 4)])
+    def test_statement_placement(self, statement_page, expected):
+        """Test the income statement lands on the requested page"""
+        pdf = io.BytesIO(synthetic_filing(pages=5, statement_page=statement_page))
+
+        with pdfplumber.open(pdf) as document:
+            assert len(document.pages) == 5
+            texts = [page.extract_text() for page in document.pages]
+
+        assert [i for i, text in enumerate(texts, 1) if 'STATEMENTS OF OPERATIONS' in text] == [expected]
+
+    def test_statement_values_extract(self):
+        """Test the statement parses to its known values"""
+        text = extract_text_from_pdf(io.BytesIO(synthetic_filing(pages=2)), parallel=False)
+
+        results = extract_financial_values(text)
+
+        assert results['revenue'] == '307394'
+        assert results['cos'] == '133332'
+        assert results['operating_income'] == '84293'
+
+    def test_invalid_statement_page(self):
+        """Test out-of-range statement pages are rejected"""
+        with pytest.raises(ValueError):
+            synthetic_filing(pages=5, statement_page=6)
+        with pytest.raises(ValueError):
+            synthetic_filing(pages=0)
@@ -0,0 +1,163 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from unittest.mock import patch
+import pytest
+from django.core.management import CommandError, call_command
+from core import artifacts
+from core.engines import ENGINES, PDFIUM, PDFPLUMBER
+from core.synthetic import synthetic_filing
+from core.views import extract_text_from_pdf
+
+
+@pytest.fixture
+def filing(tmp_path):
+    content = synthetic_filing(pages=6, statement_page=2)
+    path = tmp_path / 'filing.pdf'
+    path.write_bytes(content)
+    return str(path), hashlib.sha256(content).hexdigest()
+
+
+class TestArtifactStore:
+    """Test saving and loading per-page text artifacts"""
+
+    def test_pages_accumulate(self):
+        """Test saved pages are merged into the existing artifact"""
+        artifacts.save_pages('ab' * 32, 'pdfium-1', 10, {3: 'Page three'})
+        artifacts.save_pages('ab' * 32, 'pdfium-1', 10, {1: 'Page one', 2: ''})
+
+        artifact = artifacts.load_artifact('ab' * 32, 'pdfium-1')
+
+        assert artifact['page_count'] == 10
+        assert artifact['pages'] == {1: 'Page one', 2: '', 3: 'Page three'}
+        assert artifacts.artifact_text(artifact) == "Page one\nPage three\n"
+
+    def test_concurrent_saves_keep_every_page(self):
+        """Test extractions saving pages of the same document at once do not drop each other's"""
+        read_artifact = artifacts.read_artifact
+
+        def slow_read(path):
+            artifact = read_artifact(path)
+            time.sleep(0.05)
+            return artifact
+
+        with patch('core.artifacts.read_artifact', side_effect=slow_read):
+            threads = [
+                threading.Thread(target=artifacts.save_pages, args=('ef' * 32, 'pdfium-1', 8, {page: f'Page {page}'}))
+                for page in range(1, 9)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert sorted(artifacts.load_artifact('ef' * 32, 'pdfium-1')['pages']) == list(range(1, 9))
+
+    def test_missing_and_corrupt_artifacts(self, settings, tmp_path):
+        """Test missing artifacts load as None and corrupt ones are ignored"""
+        assert artifacts.load_artifact('cd' * 32, 'pdfium-1') is None
+
+        path = artifacts.artifact_path('cd' * 32, 'pdfium-1')
+        artifacts.save_pages('cd' * 32, 'pdfium-1', 1, {1: 'text'})
+        with open(path, 'wb') as f:
+            f.write(b'not gzip')
+
+        assert artifacts.load_artifact('cd' * 32, 'pdfium-1') is None
+
+    def test_iter_artifacts_by_engine(self):
+        """Test the corpus can be listed for one engine fingerprint"""
+        artifacts.save_pages('ab' * 32, 'pdfium-1', 1, {1: 'a'})
+        artifacts.save_pages('cd' * 32, 'pdfium-1', 1, {1: 'b'})
+        artifacts.save_pages('cd' * 32, 'pdfplumber-1', 1, {1: 'c'})
+
+        assert len(list(artifacts.iter_artifacts())) == 3
+        assert [a['pages'][1] for a in artifacts.iter_artifacts('pdfium-1')] == ['a', 'b']
+
+    def test_disabled(self, settings):
+        """Test EXTRACTION_ARTIFACTS = False disables the store"""
+        settings.EXTRACTION_ARTIFACTS = False
+
+        assert artifacts.artifact_dir() is None
+        assert list(artifacts.iter_artifacts()) == []
+
+
+class TestExtractionWithArtifacts:
+    """Test extraction reads stored pages instead of parsing them"""
+
+    def test_second_extraction_parses_nothing(self, filing):
+        """Test every page comes from the artifact the second time"""
+        path, content_hash = filing
+        first = extract_text_from_pdf(path, parallel=False, content_hash=content_hash)
+
+        with patch.object(ENGINES[PDFPLUMBER], 'iter_pages') as mock_iter_pages:
+            second = extract_text_from_pdf(path, parallel=False, content_hash=content_hash)
+
+        assert second == first
+        mock_iter_pages.assert_not_called()
+
+    def test_only_missing_pages_are_parsed(self, filing):
+        """Test pages left unparsed by an early stop are parsed later, and only those"""
+        path, content_hash = filing
+        extract_text_from_pdf(path, parallel=False, content_hash=content_hash, stop_after_fields=['revenue'])
+        stored = sorted(artifacts.load_artifact(content_hash, ENGINES[PDFPLUMBER].fingerprint())['pages'])
+        assert stored == list(range(1, len(stored) + 1)) and len(stored) < 6
+
+        parsed = []
+        iter_pages = ENGINES[PDFPLUMBER].iter_pages
+
+        def track_pages(pdf_file, pages=None, cancel_event=None, low_memory=False):
+            parsed.extend(pages)
+            return iter_pages(pdf_file, pages, cancel_event, low_memory)
+
+        with patch.object(ENGINES[PDFPLUMBER], 'iter_pages', side_effect=track_pages):
+            text = extract_text_from_pdf(path, parallel=False, content_hash=content_hash)
+
+        assert parsed == list(range(len(stored) + 1, 7))
+        assert text == extract_text_from_pdf(path, parallel=False)
+
+    def test_artifacts_are_per_engine(self, filing):
+        """Test each engine's text is stored separately"""
+        path, content_hash = filing
+        extract_text_from_pdf(path, parallel=False, content_hash=content_hash, pages=[2])
+        extract_text_from_pdf(path, parallel=False, content_hash=content_hash, pages=[2], engine=PDFIUM)
+
+        engines = sorted(artifact['engine'] for artifact in artifacts.iter_artifacts())
+
+        assert engines == sorted([ENGINES[PDFIUM].fingerprint(), ENGINES[PDFPLUMBER].fingerprint()])
+
+    def test_no_artifacts_without_hash(self, filing):
+        """Test callers without a content hash bypass the store"""
+        path, _ = filing
+        extract_text_from_pdf(path, parallel=False)
+
+        assert list(artifacts.iter_artifacts()) == []
+
+
+class TestReextractCommand:
+    """Test the reextract management command"""
+
+    def test_reextract_stored_corpus(self, filing):
+        """Test the command matches every stored document without opening PDFs"""
+        path, content_hash = filing
+        extract_text_from_pdf(path, parallel=False, content_hash=content_hash)
+        out, err = io.StringIO(), io.StringIO()
+
+        with patch('core.engines.pdfplumber.open') as mock_pdfplumber_open:
+            call_command('reextract', '--fields', 'revenue,cos', stdout=out, stderr=err)
+
+        mock_pdfplumber_open.assert_not_called()
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert lines == [{
+            'content_hash': content_hash,
+            'engine': ENGINES[PDFPLUMBER].fingerprint(),
+            'pages': [1, 2, 3, 4, 5, 6],
+            'results': {'revenue': '307394', 'cos': '133332'},
+        }]
+        assert 'Re-extracted 1 documents' in err.getvalue()
+
+    def test_reextract_unknown_field(self):
+        """Test unknown fields are rejected"""
+        with pytest.raises(CommandError):
+            call_command('reextract', '--fields', 'ebitda', stdout=io.StringIO(), stderr=io.StringIO())
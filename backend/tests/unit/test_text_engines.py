@@ -0,0 +1,95 @@
+import io
+import threading
+from unittest.mock import patch
+import pytest
+from core.cancellation import ExtractionCancelled
+from core.engines import (
+    CASCADE, ENGINE_CASCADE, ENGINES, PDFIUM, PDFPLUMBER, PYPDF2, engine_sequence, get_engine,
+)
+from core.synthetic import synthetic_filing
+from core.views import extract_financial_values, extract_with_engines
+
+
+@pytest.fixture(scope='module')
+def filing_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('engines') / 'filing.pdf'
+    path.write_bytes(synthetic_filing(pages=4, statement_page=3))
+    return str(path)
+
+
+class TestTextEngines:
+    """Test the pdfplumber, pdfium and PyPDF2 text engines"""
+
+    @pytest.mark.parametrize('name', [PDFPLUMBER, PDFIUM, PYPDF2])
+    def test_engines_extract_same_values(self, name, filing_path):
+        """Test every engine yields one text per page and the statement's values"""
+        page_texts = list(get_engine(name).iter_pages(filing_path))
+
+        assert len(page_texts) == 4
+        assert 'Page 2' in page_texts[1]
+        assert extract_financial_values("\n".join(page_texts)) == {
+            'revenue': '307394', 'cos': '133332', 'operating_income': '84293',
+        }
+
+    @pytest.mark.parametrize('name', [PDFPLUMBER, PDFIUM, PYPDF2])
+    def test_engines_read_selected_pages(self, name, filing_path):
+        """Test engines only read the requested 1-based pages"""
+        page_texts = list(get_engine(name).iter_pages(filing_path, pages=[2, 4]))
+
+        assert len(page_texts) == 2
+        assert 'Page 2' in page_texts[0]
+        assert 'Page 4' in page_texts[1]
+
+    @pytest.mark.parametrize('name', [PDFPLUMBER, PDFIUM, PYPDF2])
+    def test_engines_read_file_objects(self, name, filing_path):
+        """Test engines accept file-like uploads as well as paths"""
+        with open(filing_path, 'rb') as f:
+            pdf_file = io.BytesIO(f.read())
+
+        assert len(list(get_engine(name).iter_pages(pdf_file))) == 4
+
+    @pytest.mark.parametrize('name', [PDFPLUMBER, PDFIUM, PYPDF2])
+    def test_engines_check_cancellation(self, name, filing_path):
+        """Test a set cancel event stops the engine before the next page"""
+        cancel_event = threading.Event()
+        page_texts = get_engine(name).iter_pages(filing_path, cancel_event=cancel_event)
+
+        next(page_texts)
+        cancel_event.set()
+
+        with pytest.raises(ExtractionCancelled):
+            next(page_texts)
+
+    def test_engine_names(self):
+        """Test engine lookups and the cascade order"""
+        assert set(ENGINES) == {PDFPLUMBER, PDFIUM, PYPDF2}
+        assert engine_sequence(CASCADE) == ENGINE_CASCADE == (PDFIUM, PDFPLUMBER)
+        assert engine_sequence(PDFIUM) == (PDFIUM,)
+        with pytest.raises(ValueError):
+            get_engine('tesseract')
+
+
+class TestEngineCascade:
+    """Test falling back from the fast engine"""
+
+    @patch('core.views.extract_text_from_pdf')
+    def test_cascade_stops_at_first_match(self, mock_extract_text):
+        """Test pdfplumber is not run when the pdfium text matches"""
+        mock_extract_text.return_value = "Total revenues $1,234,567"
+
+        results = extract_with_engines('test.pdf', CASCADE)['results']
+
+        assert results['revenue'] == '1234567'
+        assert [call.kwargs['engine'] for call in mock_extract_text.call_args_list] == [PDFIUM]
+
+    @patch('core.views.extract_text_from_pdf')
+    def test_cascade_falls_back_when_nothing_matches(self, mock_extract_text):
+        """Test text without any match moves on to pdfplumber"""
+        texts = {PDFIUM: "", PDFPLUMBER: "Total revenues $1,234,567"}
+        mock_extract_text.side_effect = lambda pdf_file, **kwargs: texts[kwargs['engine']]
+
+        results = extract_with_engines('test.pdf', CASCADE, page_numbers=[3])['results']
+
+        assert results['revenue'] == '1234567'
+        assert [call.kwargs['engine'] for call in mock_extract_text.call_args_list] == [PDFIUM, PDFPLUMBER]
+        assert all(call.kwargs['pages'] == [3] for call in mock_extract_text.call_args_list)
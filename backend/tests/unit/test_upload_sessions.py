@@ -0,0 +1,142 @@
+import hashlib
+import io
+import os
+import time
+import pytest
+from django.core.management import call_command
+from core import upload_sessions
+from core.upload_sessions import (
+    ChecksumMismatch, IncompleteUpload, OffsetMismatch, UnknownSession, append_chunk, complete_session,
+    create_session, get_session, sweep_sessions,
+)
+from core.uploads import UploadTooLarge
+
+PDF_BYTES = b"%PDF-1.7\n" + bytes(range(256)) * 40
+
+
+def send(upload_id, start, data, sha256=None, chunk_size=1000):
+    """Append data at start, streamed in small pieces"""
+    pieces = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    return append_chunk(upload_id, start, len(data), iter(pieces), sha256 or hashlib.sha256(data).digest())
+
+
+def part_size(upload_id):
+    return get_session(upload_id)['offset']
+
+
+class TestUploadSessions:
+    """Test chunk appends, offsets and completion"""
+
+    def test_chunks_append_in_order(self):
+        """Test chunks build up the file and the offset follows them"""
+        session = create_session(len(PDF_BYTES), 'filing.pdf', {'period_end_date': '2024-12-31'})
+
+        assert send(session['upload_id'], 0, PDF_BYTES[:4000]) == 4000
+        assert send(session['upload_id'], 4000, PDF_BYTES[4000:]) == len(PDF_BYTES)
+
+        stored, path, content_hash = complete_session(session['upload_id'])
+        with open(path, 'rb') as f:
+            assert f.read() == PDF_BYTES
+        assert content_hash == hashlib.sha256(PDF_BYTES).hexdigest()
+        assert stored['options'] == {'period_end_date': '2024-12-31'}
+
+    def test_chunk_must_start_at_offset(self):
+        """Test a chunk that skips or repeats bytes is refused with the current offset"""
+        session = create_session(len(PDF_BYTES))
+        send(session['upload_id'], 0, PDF_BYTES[:1000])
+
+        with pytest.raises(OffsetMismatch) as error:
+            send(session['upload_id'], 2000, PDF_BYTES[2000:3000])
+
+        assert error.value.offset == 1000
+
+    def test_bad_checksum_rolls_back(self):
+        """Test a chunk that does not match its SHA-256 leaves the offset where it was"""
+        session = create_session(len(PDF_BYTES))
+        send(session['upload_id'], 0, PDF_BYTES[:1000])
+
+        with pytest.raises(ChecksumMismatch):
+            send(session['upload_id'], 1000, PDF_BYTES[1000:3000], sha256=hashlib.sha256(b'other').digest())
+
+        assert part_size(session['upload_id']) == 1000
+
+    def test_short_chunk_rolls_back(self):
+        """Test a chunk cut off mid-transfer is dropped so the client can resend it"""
+        session = create_session(len(PDF_BYTES))
+        data = PDF_BYTES[:3000]
+
+        with pytest.raises(ChecksumMismatch, match='Received 2000 of 3000'):
+            append_chunk(session['upload_id'], 0, 3000, iter([data[:2000]]), hashlib.sha256(data).digest())
+
+        assert part_size(session['upload_id']) == 0
+
+    def test_chunk_past_declared_size(self):
+        """Test bytes beyond the declared size are refused"""
+        session = create_session(100)
+
+        with pytest.raises(UploadTooLarge):
+            send(session['upload_id'], 0, PDF_BYTES[:200])
+
+    def test_complete_checks_file(self):
+        """Test completion needs every byte, a PDF header and the declared hash"""
+        session = create_session(len(PDF_BYTES), content_hash=hashlib.sha256(b'other').hexdigest())
+        send(session['upload_id'], 0, PDF_BYTES[:1000])
+
+        with pytest.raises(IncompleteUpload) as error:
+            complete_session(session['upload_id'])
+        assert error.value.offset == 1000
+
+        send(session['upload_id'], 1000, PDF_BYTES[1000:])
+        with pytest.raises(ChecksumMismatch, match='content_hash'):
+            complete_session(session['upload_id'])
+
+        not_pdf = create_session(5)
+        send(not_pdf['upload_id'], 0, b'hello')
+        with pytest.raises(ChecksumMismatch, match='PDF'):
+            complete_session(not_pdf['upload_id'])
+
+    def test_unknown_sessions(self):
+        """Test unknown and malformed ids, including path tricks, are not found"""
+        for upload_id in ('0' * 32, '../../etc/passwd', 'ABC'):
+            with pytest.raises(UnknownSession):
+                get_session(upload_id)
+
+
+class TestSessionExpiry:
+    """Test abandoned sessions are removed"""
+
+    def age(self, upload_id, seconds):
+        then = time.time() - seconds
+        for path in upload_sessions._paths(upload_id):
+            os.utime(path, (then, then))
+
+    def test_idle_session_expires(self, settings):
+        """Test a session idle past the TTL is gone"""
+        settings.EXTRACTION_UPLOAD_SESSION_TTL = 60
+        session = create_session(len(PDF_BYTES))
+        self.age(session['upload_id'], 120)
+
+        with pytest.raises(UnknownSession):
+            get_session(session['upload_id'])
+
+    def test_sweep_keeps_active_sessions(self):
+        """Test the sweep removes idle sessions' files and keeps recent ones"""
+        idle = create_session(len(PDF_BYTES))
+        active = create_session(len(PDF_BYTES))
+        send(idle['upload_id'], 0, PDF_BYTES[:1000])
+        self.age(idle['upload_id'], 7200)
+
+        assert sweep_sessions(max_idle=3600) == 1
+
+        remaining = sorted(os.listdir(upload_sessions.session_dir()))
+        assert remaining == [f"{active['upload_id']}.json", f"{active['upload_id']}.part"]
+
+    def test_sweep_command(self):
+        """Test manage.py sweep_uploads"""
+        session = create_session(len(PDF_BYTES))
+        self.age(session['upload_id'], 7200)
+        out = io.StringIO()
+
+        call_command('sweep_uploads', '--max-idle', '3600', stdout=out)
+
+        assert 'Removed 1 upload sessions' in out.getvalue()
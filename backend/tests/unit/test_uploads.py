@@ -0,0 +1,50 @@
+import hashlib
+import os
+import pytest
+from core.uploads import NotAPdf, UploadTooLarge, spool_upload
+
+
+PDF_BYTES = b"%PDF-1.7\n" + b"x" * 5000
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestSpoolUpload:
+    """Test streaming uploads to disk"""
+
+    def test_spool_writes_file_and_hashes_in_one_pass(self, settings, tmp_path):
+        """Test the spooled copy, digest and size match the uploaded bytes"""
+        settings.EXTRACTION_SPOOL_DIR = str(tmp_path)
+
+        path, content_hash, size = spool_upload(chunked(PDF_BYTES, 1000))
+
+        with open(path, 'rb') as f:
+            assert f.read() == PDF_BYTES
+        assert os.path.dirname(path) == str(tmp_path)
+        assert content_hash == hashlib.sha256(PDF_BYTES).hexdigest()
+        assert size == len(PDF_BYTES)
+        os.unlink(path)
+
+    def test_spool_rejects_oversized_upload(self, settings, tmp_path):
+        """Test the limit is enforced while streaming and the partial file removed"""
+        settings.EXTRACTION_SPOOL_DIR = str(tmp_path)
+
+        with pytest.raises(UploadTooLarge):
+            spool_upload(chunked(PDF_BYTES, 1000), max_size=2500)
+
+        assert os.listdir(tmp_path) == []
+
+    def test_spool_pdf_header_check(self, settings, tmp_path):
+        """Test the header check spans chunks and rejects non-PDF bodies"""
+        settings.EXTRACTION_SPOOL_DIR = str(tmp_path)
+
+        path, _, _ = spool_upload(chunked(PDF_BYTES, 3), require_pdf_header=True)
+        os.unlink(path)
+
+        with pytest.raises(NotAPdf):
+            spool_upload(chunked(b"<html>" + b"x" * 5000, 100), require_pdf_header=True)
+        with pytest.raises(NotAPdf):
+            spool_upload([b"tiny"], require_pdf_header=True)
+        assert os.listdir(tmp_path) == []
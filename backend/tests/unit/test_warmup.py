@@ -0,0 +1,82 @@
+import io
+import json
+import logging
+from unittest.mock import patch
+import pytest
+from django.core.management import CommandError, call_command
+from core import metrics
+from core.warmup import WARMUP_MODULES, warm_up
+
+
+class TestWarmUp:
+    """Test the startup warm-up of the extraction pipeline"""
+
+    def setup_method(self):
+        metrics.reset_metrics()
+
+    def test_report_covers_imports_and_phases(self, caplog):
+        """Test every import and phase is timed and the pipeline runs cleanly"""
+        with caplog.at_level(logging.WARNING, logger='core.warmup'):
+            report = warm_up(freeze_gc=False)
+
+        assert list(report['imports']) == [*WARMUP_MODULES, 'urlconf']
+        assert list(report['phases']) == ['imports', 'pipeline']
+        assert report['total'] >= sum(report['phases'].values())
+        assert caplog.records == []
+
+    def test_pipeline_does_not_touch_request_metrics(self):
+        """Test the built-in filing is not counted as a request, cache lookup or page parse"""
+        warm_up(freeze_gc=False)
+
+        assert metrics.PAGES_PARSED.count() == 0
+        assert metrics.STAGE_DURATION.count(stage='matching') == 0
+        assert metrics.CACHE_LOOKUPS.value(result='miss') == 0
+        assert metrics.WARMUP_SECONDS.value(phase='pipeline') > 0
+
+    @patch('core.warmup.gc')
+    def test_freezes_warm_objects(self, mock_gc, settings):
+        """Test the warm state is collected and frozen out of later collections"""
+        settings.EXTRACTION_WARMUP_FREEZE_GC = True
+
+        report = warm_up()
+
+        mock_gc.collect.assert_called_once_with()
+        mock_gc.freeze.assert_called_once_with()
+        assert 'gc_freeze' in report['phases']
+
+    @patch('core.warmup.run_pipeline', side_effect=RuntimeError('no fonts'))
+    def test_failing_phase_is_logged_not_raised(self, mock_run_pipeline, caplog):
+        """Test a worker still starts when a warm-up phase fails"""
+        with caplog.at_level(logging.ERROR, logger='core.warmup'):
+            report = warm_up(freeze_gc=False)
+
+        assert 'pipeline' in report['phases']
+        assert 'Warm-up phase pipeline failed: no fonts' in caplog.text
+
+    def test_over_budget_is_logged(self, settings, caplog):
+        """Test a warm-up slower than the cold-start budget logs a warning"""
+        settings.EXTRACTION_COLD_START_BUDGET = 1e-9
+
+        with caplog.at_level(logging.WARNING, logger='core.warmup'):
+            warm_up(freeze_gc=False)
+
+        assert 'over the' in caplog.text
+
+
+class TestWarmupCommand:
+    """Test manage.py warmup"""
+
+    def test_json_report(self):
+        """Test the report is printed as JSON with the budget"""
+        out = io.StringIO()
+
+        call_command('warmup', '--json', '--budget', '60', stdout=out)
+
+        report = json.loads(out.getvalue())
+        assert report['budget'] == 60
+        assert set(report['phases']) == {'imports', 'pipeline'}
+
+    def test_fails_over_budget(self):
+        """Test a warm-up over the budget fails the command"""
+        with pytest.raises(CommandError, match='cold-start budget'):
+            call_command('warmup', '--budget', '0', stdout=io.StringIO())
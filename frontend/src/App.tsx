@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import PDFUpload from './components/PDFUpload';
 import ResultsGrid from './components/ResultsGrid';
+import { hashFile } from './hashFile';
 import './App.css';
 
 interface FinancialData {
@@ -9,6 +10,34 @@ interface FinancialData {
   operating_income: string;
 }
 
+const API_URL = 'http://localhost:8001/api';
+
+// Ask the server for a stored result by the file's SHA-256 before sending
+// the file itself. Returns null when the file has to be uploaded, including
+// when hashing or the precheck fails.
+const precheckFile = async (file: File, periodEndDate: string): Promise<FinancialData | null> => {
+  try {
+    const contentHash = await hashFile(file);
+    const response = await fetch(`${API_URL}/extract/precheck/`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        content_hash: contentHash,
+        period_end_date: periodEndDate,
+        filename: file.name,
+      }),
+    });
+    if (!response.ok) {
+      return null;
+    }
+
+    const data = await response.json();
+    return data.known ? data.results : null;
+  } catch {
+    return null;
+  }
+};
+
 function App() {
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [periodEndDate, setPeriodEndDate] = useState<string>('');
@@ -32,13 +61,20 @@ function App() {
     setError('');
 
     try {
+      // Skip the upload when the server already has this filing
+      const knownResults = await precheckFile(selectedFile, periodEndDate);
+      if (knownResults) {
+        setFinancialData(knownResults);
+        return;
+      }
+
       const formData = new FormData();
       formData.append('pdf_file', selectedFile);
       if (periodEndDate) {
         formData.append('period_end_date', periodEndDate);
       }
 
-      const response = await fetch('http://localhost:8001/api/extract/', {
+      const response = await fetch(`${API_URL}/extract/`, {
         method: 'POST',
         body: formData,
       });
@@ -0,0 +1,30 @@
+interface HashReply {
+  hash?: string;
+  error?: string;
+}
+
+// Lowercase hex SHA-256 of a file, computed in a Web Worker (see hashWorker.ts)
+export function hashFile(file: File): Promise<string> {
+  return new Promise((resolve, reject) => {
+    // crypto.subtle only exists on https:// and localhost pages
+    if (typeof Worker === 'undefined' || !globalThis.crypto?.subtle) {
+      reject(new Error('Hashing is not available in this browser'));
+      return;
+    }
+
+    const worker = new Worker(new URL('./hashWorker.ts', import.meta.url), { type: 'module' });
+    worker.onmessage = (event: MessageEvent<HashReply>) => {
+      worker.terminate();
+      if (event.data.hash) {
+        resolve(event.data.hash);
+      } else {
+        reject(new Error(event.data.error || 'Hashing failed'));
+      }
+    };
+    worker.onerror = (event) => {
+      worker.terminate();
+      reject(new Error(event.message || 'Hashing failed'));
+    };
+    worker.postMessage(file);
+  });
+}
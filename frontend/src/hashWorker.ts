@@ -0,0 +1,12 @@
+// Computes the SHA-256 of a File off the main thread, so hashing a 40MB
+// filing does not freeze the page. Replies with { hash } or { error }.
+
+self.onmessage = async (event: MessageEvent<File>) => {
+  try {
+    const digest = await crypto.subtle.digest('SHA-256', await event.data.arrayBuffer());
+    const hash = Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+    self.postMessage({ hash });
+  } catch (err) {
+    self.postMessage({ error: err instanceof Error ? err.message : 'Hashing failed' });
+  }
+};